@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Размытый фон 9:16: скорость (fps) каждого режима и сходство с прежним графом
+(SSIM против REFERENCE — строка графа до общих фильтров, а не то, что сейчас
+выдает режим classic). Кодирование не участвует, выход в null — меряется
+только граф фильтров.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_blur --frames 300
+    python -m benchmarks.bench_blur --sample video.mp4 --radius 10 --power 5
+"""
+import argparse
+import time
+from core import process_scheduler
+from core.encoders import parse_ssim
+from core.filter_graphs import BLUR_MODES, FilterGraph, stream, blurred_background
+
+SOURCE = "testsrc2=size=1920x1080:rate=30"
+# Граф фона, который вкладки собирали вручную до filter_graphs (метки свои, чтобы не пересекаться)
+REFERENCE = ("split=2[ref_bg][ref_fg];[ref_bg]scale=iw/4:-1,scale=1080:1920:force_original_aspect_ratio=increase,"
+             "crop=1080:1920,boxblur={radius}:{power}[ref_blur];"
+             "[ref_fg]scale=1080:1920:force_original_aspect_ratio=decrease[ref_fit];"
+             "[ref_blur][ref_fit]overlay=(W-w)/2:(H-h)/2")
+
+
+def input_args(sample):
+    return ["-i", sample] if sample else ["-f", "lavfi", "-i", SOURCE]
+
+
+def bench(mode, sample, frames, radius, power):
+    """Кадров в секунду на графе режима (None — эталонный граф)"""
+    if mode is None:
+        graph = ["-filter_complex", f"[0:v]{REFERENCE.format(radius=radius, power=power)}[out]", "-map", "[out]"]
+    else:
+        g = FilterGraph()
+        graph = g.args(blurred_background(g, stream(0), radius, power, mode))
+    cmd = ["ffmpeg", "-hide_banner", "-nostats", *input_args(sample), *graph,
+           "-frames:v", str(frames), "-f", "null", "-"]
+    t0 = time.perf_counter()
+    res = process_scheduler.run(cmd, process_scheduler.BATCH)
+    elapsed = time.perf_counter() - t0
+    if res.returncode != 0: raise SystemExit(f"{mode}: {res.error_text()}")
+    return frames / elapsed
+
+
+def similarity(mode, sample, frames, radius, power):
+    """SSIM режима против эталонного графа на тех же кадрах"""
+    g = FilterGraph()
+    s0, s1 = g.split(stream(0), ["ref_in", "test_in"])
+    test = blurred_background(g, s1, radius, power, mode)
+    fc = f"{g.render()};{s0}{REFERENCE.format(radius=radius, power=power)}[ref];[ref]{test}ssim[out]"
+    cmd = ["ffmpeg", "-hide_banner", "-nostats", *input_args(sample), "-filter_complex", fc, "-map", "[out]",
+           "-frames:v", str(frames), "-f", "null", "-"]
+    res = process_scheduler.run(cmd, process_scheduler.BATCH)
+    return parse_ssim(res.error_text()) if res.returncode == 0 else None
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Скорость и качество режимов размытого фона")
+    ap.add_argument("--sample", help="Видео (по умолчанию синтетика 1920x1080)")
+    ap.add_argument("--frames", type=int, default=300)
+    ap.add_argument("--radius", type=int, default=20, help="Сила как у boxblur (20:10 — Reels Maker AI)")
+    ap.add_argument("--power", type=int, default=10)
+    args = ap.parse_args()
+
+    print(f"Источник: {args.sample or SOURCE}, {args.frames} кадров, boxblur={args.radius}:{args.power}")
+    print(f"{'режим':<10}{'fps':>10}{'ускорение':>12}{'SSIM':>8}")
+    base = bench(None, args.sample, args.frames, args.radius, args.power)
+    print(f"{'эталон':<10}{base:>10.1f}{1:>11.1f}x{1:>8.3f}")
+    for mode in BLUR_MODES:
+        fps = bench(mode, args.sample, args.frames, args.radius, args.power)
+        ssim = similarity(mode, args.sample, args.frames, args.radius, args.power)
+        ssim = f"{ssim:.3f}" if ssim is not None else "?"
+        print(f"{mode:<10}{fps:>10.1f}{fps / base:>11.1f}x{ssim:>8}")
+
+
+if __name__ == "__main__":
+    main()
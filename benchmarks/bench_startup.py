@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Время импорта при запуске (python -X importtime) и самые медленные модули.
+Отдельный процесс на каждый замер — кэш модулей текущего не мешает.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_startup ui.main_window --top 20
+    python -m benchmarks.bench_startup core.engine core.uniqualizer --budget 500  # ядро без Qt
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Бюджет на импорт главного окна (до появления окна), мс
+STARTUP_BUDGET_MS = 1500
+# Не должны грузиться до начала анализа
+HEAVY_MODULES = ('torch', 'whisper', 'faster_whisper', 'ctranslate2', 'google.generativeai')
+
+LINE_RE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)')
+
+
+def parse_importtime(text):
+    """Строки -X importtime -> [(модуль, свое мкс, суммарно мкс, уровень вложенности)]"""
+    rows = []
+    for line in text.splitlines():
+        m = LINE_RE.match(line)
+        if m: rows.append((m.group(4), int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2))
+    return rows
+
+
+def run_importtime(code):
+    res = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True,
+                         cwd=ROOT)
+    if res.returncode != 0:
+        raise RuntimeError(res.stderr.strip().splitlines()[-1] if res.stderr.strip() else "import failed")
+    return parse_importtime(res.stderr)
+
+
+def measure(module):
+    """
+    Импорт модуля в чистом интерпретаторе.
+    :return: (мс без учета старта самого Python, [(модуль, свое мкс, суммарно мкс, уровень)])
+    """
+    base = {row[0] for row in run_importtime("pass")}
+    rows = [r for r in run_importtime(f"import {module}") if r[0] not in base]
+    total = sum(cumulative for _, _, cumulative, level in rows if level == 0)
+    return total / 1000, rows
+
+
+def heavy_imported(rows):
+    return sorted({name for name, *_ in rows if name.split('.')[0] in HEAVY_MODULES or name in HEAVY_MODULES})
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Время импорта при запуске")
+    ap.add_argument("modules", nargs='*', default=["ui.main_window"])
+    ap.add_argument("--top", type=int, default=15, help="Сколько самых медленных модулей показать")
+    ap.add_argument("--budget", type=float, default=STARTUP_BUDGET_MS, help="Бюджет, мс")
+    args = ap.parse_args()
+
+    failed = False
+    for module in args.modules:
+        total, rows = measure(module)
+        status = "✅" if total <= args.budget else "❌"
+        failed |= total > args.budget
+        print(f"{status} {module}: {total:.0f} мс (бюджет {args.budget:.0f} мс)")
+        for name, own, cumulative, _ in sorted(rows, key=lambda r: -r[1])[:args.top]:
+            print(f"   {own / 1000:7.1f} мс  (всего {cumulative / 1000:7.1f})  {name}")
+        heavy = heavy_imported(rows)
+        if heavy:
+            failed = True
+            print(f"   ❌ Тяжелые модули при запуске: {', '.join(heavy)}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Сравнение движков транскрибации по real-time factor (RTF) на одном образце.
+RTF = время транскрибации / длительность аудио (меньше — быстрее).
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_whisper_backends sample.mp4 --model small --lang ru
+"""
+import argparse
+import time
+from core import transcription
+from core.media_probe import probe_media
+
+
+def bench(backend, path, model, lang, device):
+    t0 = time.perf_counter()
+    transcription.get_model(backend, model, device)
+    load_time = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    segments = backend.transcribe(path, model, lang, device)
+    return load_time, time.perf_counter() - t0, segments
+
+
+def main():
+    ap = argparse.ArgumentParser(description="RTF: openai-whisper vs faster-whisper")
+    ap.add_argument("sample", help="Фиксированный образец (видео или аудио)")
+    ap.add_argument("--model", default="small")
+    ap.add_argument("--lang", default=None)
+    ap.add_argument("--device", default="cpu")
+    ap.add_argument("--beam", type=int, default=5)
+    ap.add_argument("--threads", type=int, default=0)
+    args = ap.parse_args()
+
+    info = probe_media(args.sample)
+    if not info or not info['duration']:
+        raise SystemExit(f"Не удалось прочитать {args.sample}")
+    duration = info['duration']
+
+    print(f"Образец: {args.sample} ({duration:.1f} с), модель {args.model}, {args.device}")
+    print(f"{'движок':<10}{'загрузка, с':>14}{'транскр., с':>14}{'RTF':>8}{'сегм.':>8}")
+    for name in transcription.BACKENDS:
+        backend = transcription.get_backend(name, beam_size=args.beam, cpu_threads=args.threads)
+        if not backend.available():
+            print(f"{name:<10}{'нет модуля ' + backend.module:>44}")
+            continue
+        load_time, run_time, segments = bench(backend, args.sample, args.model, args.lang, args.device)
+        print(f"{name:<10}{load_time:>14.1f}{run_time:>14.1f}{run_time / duration:>8.3f}{len(segments):>8}")
+        transcription.unload_all()
+
+
+if __name__ == "__main__":
+    main()
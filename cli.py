@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Консольный запуск без интерфейса: рендер-ноды, cron, обработчики очередей.
+Та же логика, что во вкладках, но без Qt. События — в stdout строками JSON:
+
+    {"event": "log", "value": "✅ Готово: a.mp4"}
+    {"event": "progress", "value": 42}
+    {"event": "finished"}
+
+Примеры:
+    python cli.py uniq in/ --out out/ --config uniq.json --set mirror=true
+    python cli.py slice --video v.mp4 --txt marks.txt --out out/
+    python cli.py ai-analyze v.mp4 --out out/ --gemini-key KEY
+    python cli.py ai-analyze videos/ --out out/ --highlights local
+    python cli.py ai-slice v.mp4 --out out/
+
+PyQt6 не импортируется вообще, Whisper/torch и Gemini — только в ai-analyze.
+Код выхода 1, если по ходу были ошибки.
+"""
+import argparse
+import copy
+import json
+import os
+import signal
+import sys
+
+VIDEO_EXTS = ('.mp4', '.mov', '.avi')
+
+
+def emit(event, value=None):
+    rec = {'event': event}
+    if value is not None: rec['value'] = value
+    sys.stdout.write(json.dumps(rec, ensure_ascii=False) + "\n")
+    sys.stdout.flush()
+
+
+def expand_videos(paths):
+    """Файлы как есть, папки — все видео внутри (по алфавиту)"""
+    out = []
+    for p in paths:
+        if os.path.isdir(p):
+            out += sorted(os.path.join(p, n) for n in os.listdir(p) if n.lower().endswith(VIDEO_EXTS))
+        else:
+            out.append(p)
+    return out
+
+
+def load_settings(defaults, args):
+    """Умолчания вкладки <- JSON из --config <- пары --set ключ=значение"""
+    s = copy.deepcopy(defaults)
+    if args.config:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            s.update(json.load(f))
+    for item in args.set or []:
+        key, _, raw = item.partition('=')
+        try:
+            s[key] = json.loads(raw)
+        except ValueError:
+            s[key] = raw
+    return s
+
+
+def run_job(job):
+    """Запускает задачу движка в текущем потоке, события — в stdout. SIGINT/SIGTERM останавливают ffmpeg."""
+    from core.engine import EventBus, JobRunner
+    errors = []
+
+    def on_event(event):
+        if event.kind == 'error' or (event.kind == 'log' and str(event.value).startswith("❌")):
+            errors.append(event.value)
+        emit(event.kind, event.value)
+
+    bus = EventBus()
+    bus.subscribe(on_event)
+    runner = JobRunner(job, bus)
+    stop = lambda *_: runner.stop()
+    signal.signal(signal.SIGINT, stop)
+    if hasattr(signal, 'SIGTERM'): signal.signal(signal.SIGTERM, stop)
+    runner.run()
+    return 1 if errors else 0
+
+
+def cmd_uniq(args):
+    from core.engine import Job
+    from core.uniqualizer import DEFAULT_SETTINGS
+    s = load_settings(DEFAULT_SETTINGS, args)
+    s['out_dir'] = os.path.abspath(args.out)
+    if args.workers is not None: s['workers'] = args.workers
+    if args.codec: s['codec'] = args.codec
+    files = expand_videos(args.inputs)
+    if not files:
+        emit('error', "Нет видео на входе")
+        return 1
+    return run_job(Job('uniq', files, s))
+
+
+def cmd_slice(args):
+    from core.engine import Job
+    from core.slicer import DEFAULT_SETTINGS
+    s = load_settings(DEFAULT_SETTINGS, args)
+    s.update({'video': args.video, 'txt': args.txt, 'out': os.path.abspath(args.out)})
+    if args.text: s['static_text'] = args.text
+    if args.font: s['font'] = args.font
+    return run_job(Job('slice', s))
+
+
+def ai_settings(args):
+    from core.ai_slicer import DEFAULT_SETTINGS
+    s = load_settings(DEFAULT_SETTINGS, args)
+    videos = expand_videos(args.videos)
+    s.update({'video': videos[0] if videos else None, 'videos': videos, 'out': os.path.abspath(args.out)})
+    return s
+
+
+def cmd_ai_analyze(args):
+    from core.engine import Job
+    s = ai_settings(args)
+    s['gemini_key'] = args.gemini_key or s.get('gemini_key') or os.environ.get('GEMINI_API_KEY', "")
+    if args.model: s['whisper_model'] = args.model
+    if args.lang: s['whisper_lang'] = args.lang
+    if args.backend: s['whisper_backend'] = args.backend
+    if args.highlights: s['highlight_backend'] = args.highlights
+    if args.llm_url: s['llm_url'] = args.llm_url
+    if args.llm_model: s['llm_model'] = args.llm_model
+    if not s['videos']:
+        emit('error', "Нет видео на входе")
+        return 1
+    return run_job(Job('ai', s, mode='analyze'))
+
+
+def cmd_ai_slice(args):
+    from core.engine import Job
+    s = ai_settings(args)
+    if not s['videos']:
+        emit('error', "Нет видео на входе")
+        return 1
+    return run_job(Job('ai', s, mode='slice'))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="reels-maker", description="VideoUniq / Reels Maker без интерфейса")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    def common(p):
+        p.add_argument("--out", required=True, help="Папка результата")
+        p.add_argument("--config", help="JSON с настройками (ключи как во вкладке)")
+        p.add_argument("--set", action='append', metavar="KEY=VALUE", help="Переопределить настройку (значение — JSON)")
+
+    p = sub.add_parser("uniq", help="Уникализация видео")
+    p.add_argument("inputs", nargs='+', help="Видео или папки с видео")
+    p.add_argument("--workers", type=int, help="Параллельно файлов (0 = авто)")
+    p.add_argument("--codec", help="Кодировщик (auto, libx264, h264_nvenc, ...)")
+    common(p)
+    p.set_defaults(func=cmd_uniq)
+
+    p = sub.add_parser("slice", help="Нарезка по TXT-разметке")
+    p.add_argument("--video", required=True)
+    p.add_argument("--txt", required=True, help="Разметка: 00:00:10-00:01:00 | Заголовок")
+    p.add_argument("--text", help="Общий заголовок для всех клипов")
+    p.add_argument("--font", help="Файл шрифта")
+    common(p)
+    p.set_defaults(func=cmd_slice)
+
+    p = sub.add_parser("ai-analyze", help="Whisper + Gemini: поиск клипов")
+    p.add_argument("videos", nargs='+', help="Видео или папки с видео")
+    p.add_argument("--gemini-key", help="Ключ Gemini (или переменная GEMINI_API_KEY)")
+    p.add_argument("--model", help="Модель Whisper")
+    p.add_argument("--lang", help="Язык (ru, en, ...)")
+    p.add_argument("--backend", choices=["openai", "faster"], help="Движок транскрибации")
+    p.add_argument("--highlights", choices=["gemini", "http", "local"],
+                   help="Выбор моментов: Gemini, локальный LLM по HTTP или офлайн-эвристика")
+    p.add_argument("--llm-url", help="URL chat/completions локального LLM (для --highlights http)")
+    p.add_argument("--llm-model", help="Имя модели локального LLM")
+    common(p)
+    p.set_defaults(func=cmd_ai_analyze)
+
+    p = sub.add_parser("ai-slice", help="Нарезка клипов по результату ai-analyze")
+    p.add_argument("videos", nargs='+', help="Видео или папки с видео")
+    common(p)
+    p.set_defaults(func=cmd_ai_slice)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,471 @@
+import os
+import json
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from core import audio_track, highlights, transcription, transcript_cache
+from core.filter_graphs import FilterGraph, stream, blurred_background, DEFAULT_BLUR_MODE
+from core.ffmpeg_runner import FFmpegRunner, format_eta
+from core.media_probe import probe_media
+from core.silence import cut_filters
+from core import encoders, smart_cut
+from core.slice_batch import (DEFAULT_MEMORY_BUDGET_MB, max_outputs_for_budget, plan_batches,
+                              build_batch_graph, title_inputs)
+from core.signals import Signal
+from utils.text_generator import TextGenerator
+
+# Настройки по умолчанию — как на вкладке Reels Maker AI (для CLI и скриптов)
+DEFAULT_SETTINGS = {
+    'use_whisper': True, 'whisper_model': 'medium', 'whisper_lang': None,
+    'whisper_backend': 'openai', 'whisper_beam': 5, 'whisper_threads': 0,
+    'force_whisper': False, 'whisper_chunked': False,
+    'use_gemini': True, 'gemini_key': "", 'ai_prompt': "",
+    'highlight_backend': 'gemini', 'llm_url': "", 'llm_model': "",
+    'no_text_render': False, 'text_color': "#FFD700", 'stroke_color': "#000000",
+    'stroke_width_pct': 5, 'caps': True, 'font_source': None, 'max_font_size': 110,
+    'y_top': 150, 'y_bot': 600,
+    'min_duration': 60, 'max_duration': 120, 'target_duration': 90, 'auto_split': True,
+    'silence_cut': False, 'silence_db': -30, 'silence_dur': 0.5,
+    'format': "9:16 (Vertical)", 'blur_bg': True, 'blur_mode': 'fast', 'face_track': True,
+}
+# Одновременных запросов к модели выбора моментов при пакетном анализе
+HIGHLIGHT_WORKERS = 2
+
+
+class AiSlicer:
+    """Анализ (Whisper + Gemini) и нарезка рилсов без Qt; в интерфейсе — AiSlicerWorker"""
+    log_signal = Signal(str)
+    progress_signal = Signal(int)
+    finished_signal = Signal()
+    error_signal = Signal(str)
+    status_signal = Signal(str)
+
+    def __init__(self, settings, mode='analyze'):
+        self.s = settings
+        self.mode = mode
+        self.is_running = True
+        self.current_process = None
+
+        self.text_gen = TextGenerator(width=1080, height=1920)
+        # Кодировщик по калибровке машины ('auto' — самый быстрый с нужным качеством)
+        self.codec = encoders.resolve(self.s.get('codec', 'auto'))[0]
+        self.video_args = encoders.encoder_args(self.codec, crf=23)
+
+        # Очередь видео: пакетная папка или одно видео
+        self.videos = list(self.s.get('videos') or [self.s['video']])
+        self.base_out = self.s['out']
+        self.queue_pos = 0
+        self.set_target(self.videos[0])
+
+    def set_target(self, video_path):
+        """Переключает воркер на видео из очереди (в пакете у каждого своя подпапка)"""
+        self.s['video'] = video_path
+        self.track = None
+        if len(self.videos) > 1:
+            self.s['out'] = os.path.join(self.base_out, os.path.splitext(os.path.basename(video_path))[0])
+        self.json_path = os.path.join(self.s['out'], "analysis_result.json")
+        self.raw_cache_path = os.path.join(self.s['out'], "whisper_raw.json")
+        self.review_txt_path = os.path.join(self.s['out'], "00_REVIEW_SEGMENTS.txt")
+
+    def get_track(self):
+        """Звуковая дорожка текущего видео (общая для Whisper, тишины и громкости)"""
+        if self.track is None:
+            self.track = audio_track.get_audio_track(self.s['video'], on_log=self.log_signal.emit)
+        return self.track
+
+    def emit_progress(self, pct):
+        """Прогресс текущего видео с учетом позиции в очереди"""
+        self.progress_signal.emit(int((self.queue_pos + pct / 100) / len(self.videos) * 100))
+
+    def run(self):
+        # Пакетный анализ: выбор моментов идет в фоне, параллельно с транскрибацией следующих видео
+        pool = None
+        if self.mode == 'analyze' and len(self.videos) > 1:
+            pool = ThreadPoolExecutor(max_workers=HIGHLIGHT_WORKERS, thread_name_prefix="highlights")
+        if self.mode == 'slice':
+            self.codec = encoders.ensure_calibrated(self.s.get('codec', 'auto'), self.log_signal.emit)[0]
+            self.video_args = encoders.encoder_args(self.codec, crf=23)
+        try:
+            for n, path in enumerate(self.videos):
+                if not self.is_running: break
+                self.queue_pos = n
+                self.set_target(path)
+                if len(self.videos) > 1:
+                    self.log_signal.emit(f"📼 [{n + 1}/{len(self.videos)}] {os.path.basename(path)}")
+                if self.mode == 'analyze':
+                    self.run_semantic_analysis(pool)
+                elif self.mode == 'slice':
+                    self.run_slicing()
+        except Exception as e:
+            self.log_signal.emit(f"❌ КРИТИЧЕСКАЯ ОШИБКА: {str(e)}")
+            import traceback
+            traceback.print_exc()
+        finally:
+            if pool is not None: pool.shutdown(wait=True)
+
+        self.finished_signal.emit()
+
+    def stop(self):
+        self.is_running = False
+        if self.current_process:
+            try:
+                self.current_process.kill()
+                self.log_signal.emit("⚠️ Процесс остановлен.")
+            except:
+                pass
+
+    def format_ts_review(self, seconds):
+        """Формат для отчета: 00:00:00"""
+        m, s = divmod(seconds, 60)
+        h, m = divmod(m, 60)
+        return "{:02d}:{:02d}:{:02d}".format(int(h), int(m), int(s))
+
+    # ==========================================
+    # ЭТАП 1: УМНЫЙ АНАЛИЗ (ADAPTIVE AI)
+    # ==========================================
+    def run_semantic_analysis(self, pool=None):
+        video_path = self.s['video']
+        os.makedirs(self.s['out'], exist_ok=True)
+        whisper_segments = []
+
+        model_name = self.s.get('whisper_model', 'medium')
+        lang = self.s.get('whisper_lang')
+        backend_name = self.s.get('whisper_backend') or transcription.DEFAULT_BACKEND
+        # Кэш привязан к содержимому видео, а не к папке вывода
+        cache_key = transcript_cache.cache_key(video_path, model_name, lang, backend_name)
+
+        # 0. FORCE
+        if self.s.get('force_whisper') and transcript_cache.invalidate(cache_key):
+            self.log_signal.emit("🔄 Удаляю старый кэш...")
+
+        # 1. ЗАГРУЗКА КЭША
+        cached = transcript_cache.load(cache_key)
+        if cached:
+            whisper_segments = cached
+            self.log_signal.emit(f"⏩ Текст из кэша: {len(whisper_segments)} фраз.")
+
+        # 2. WHISPER (если нет кэша)
+        if not whisper_segments:
+            if not self.is_running: return
+            backend = transcription.get_backend(backend_name,
+                                                beam_size=self.s.get('whisper_beam'),
+                                                cpu_threads=self.s.get('whisper_threads'))
+            if not backend.available():
+                self.log_signal.emit(f"❌ Ошибка: Нет библиотеки {backend.module}!")
+                return
+
+            self.log_signal.emit(f"🎧 Запуск Whisper ({model_name}, {backend.name})...")
+            try:
+                # Модель берется из реестра: загружается один раз за сеанс
+                device = transcription.detect_device()
+                lang_str = f"Lang: {lang}" if lang else "Auto"
+                self.log_signal.emit(f"🎤 Транскрибация на {device.upper()} ({lang_str})...")
+
+                # Звук извлекается один раз и дальше читается из кэша
+                track = self.get_track()
+                if self.s.get('whisper_chunked'):
+                    # Длинные видео: куски по паузам в пуле процессов
+                    whisper_segments = transcription.transcribe_chunked(
+                        track, model_name, lang, backend_name, backend.options, device,
+                        workers=self.s.get('whisper_workers', 0), on_log=self.log_signal.emit,
+                        should_stop=lambda: not self.is_running)
+                else:
+                    whisper_segments = backend.transcribe(track.read(), model_name, lang, device,
+                                                          on_log=self.log_signal.emit)
+
+                if not self.is_running: return
+
+                transcript_cache.save(cache_key, whisper_segments)
+                self.log_signal.emit("💾 Текст сохранен.")
+
+            except Exception as e:
+                self.log_signal.emit(f"⚠️ Ошибка Whisper: {e}")
+                return
+
+        # Копия текста рядом с результатами (для просмотра; кэш — глобальный)
+        with open(self.raw_cache_path, 'w', encoding='utf-8') as f:
+            json.dump(whisper_segments, f, ensure_ascii=False, indent=4)
+
+        self.emit_progress(30)
+
+        # 3. ВЫБОР МОМЕНТОВ
+        backend = self.highlight_backend()
+        # Флаг use_gemini выключает только облако; локальные движки работают без него
+        if backend.name == 'gemini' and not self.s.get('use_gemini', True):
+            self.log_signal.emit("⚠️ AI-анализ выключен! Нарезка невозможна.")
+            return
+        if not backend.available():
+            self.log_signal.emit(f"❌ Ошибка: Нет библиотеки {backend.module}!")
+            return
+        if backend.name == 'gemini' and not self.s['gemini_key']:
+            self.log_signal.emit("⚠️ Нет ключа Gemini! Нарезка невозможна.")
+            return
+
+        # Общая длительность: из пробы файла, иначе по последнему сегменту
+        info = probe_media(video_path)
+        duration = info['duration'] if info and info['duration'] else (
+            whisper_segments[-1]['end'] if whisper_segments else 0)
+        self.log_signal.emit(f"🧠 Запуск AI-продюсера ({backend.name})...")
+        self.log_signal.emit(f"📊 Длительность: {int(duration / 60)} мин. План: "
+                             f"{highlights.target_quantity(duration / 60)[0]}")
+
+        track = None
+        if backend.uses_audio:
+            try:
+                track = self.get_track()
+            except Exception as e:
+                # Без звука оценка идет только по тексту
+                self.log_signal.emit(f"⚠️ Звук недоступен ({e}), оценка только по тексту")
+        args = (backend, whisper_segments, duration, track, self.json_path, self.review_txt_path)
+        if pool is not None:
+            # Пакет: модель думает над этим видео, пока Whisper слушает следующее
+            pool.submit(self.select_highlights, *args, label=f"[{os.path.basename(video_path)}] ")
+        else:
+            self.select_highlights(*args)
+        self.emit_progress(100)
+
+    def highlight_backend(self):
+        name = self.s.get('highlight_backend') or highlights.DEFAULT_BACKEND
+        return highlights.get_backend(name, api_key=self.s.get('gemini_key'), url=self.s.get('llm_url'),
+                                      model=self.s.get('llm_model'))
+
+    def select_highlights(self, backend, whisper_segments, duration, track, json_path, review_path, label=""):
+        if not self.is_running: return
+        try:
+            clips = backend.select(whisper_segments, duration, self.s, track=track, on_log=self.log_signal.emit)
+            self.log_signal.emit(f"🔥 {label}AI отобрал {len(clips)} топовых моментов!")
+            for clip in clips:
+                self.log_signal.emit(f"  🔹 {clip['title']} ({int(clip['end'] - clip['start'])}с)")
+            self.save_results(clips, json_path, review_path)
+        except Exception as e:
+            self.log_signal.emit(f"⚠️ Ошибка AI: {e}")
+            self.log_signal.emit("Попробуйте другой промпт или модель.")
+
+    def save_results(self, segments, json_path=None, review_path=None):
+        json_path = json_path or self.json_path
+        review_path = review_path or self.review_txt_path
+        # JSON для машины
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(segments, f, ensure_ascii=False, indent=4)
+
+        # TXT для человека (ВАШ ФОРМАТ)
+        with open(review_path, 'w', encoding='utf-8') as f:
+            for seg in segments:
+                st = self.format_ts_review(seg['start'])
+                en = self.format_ts_review(seg['end'])
+                # Формат: 00:00:00 - 00:00:00 | Заголовок
+                f.write(f"{st} - {en} | {seg.get('title', '---')}\n\n")
+
+        self.log_signal.emit(f"✅ ОТЧЕТ ГОТОВ!")
+        self.log_signal.emit(f"📄 Файл: {review_path}")
+
+    # ==========================================
+    # ЭТАП 2: НАРЕЗКА (Без изменений)
+    # ==========================================
+    def detect_silence_segments(self, path, start, duration, db=-30, min_dur=0.5):
+        try:
+            # Запрос к огибающей общей дорожки — без запуска ffmpeg
+            track = self.get_track() if path == self.s['video'] else audio_track.get_audio_track(path)
+            return track.keep_ranges(db, min_dur, start, start + duration)
+        except:
+            return None
+
+    def run_slicing(self):
+        if not os.path.exists(self.json_path): self.log_signal.emit("❌ Нет файла!"); return
+        with open(self.json_path, 'r', encoding='utf-8') as f:
+            segments = json.load(f)
+        total = len(segments)
+
+        # Задания: (номер, сегмент, выходной файл); готовые клипы пропускаем
+        jobs = []
+        for i, seg in enumerate(segments):
+            safe_title = "".join([c for c in seg.get('title', 'No') if c.isalnum() or c in (' ', '-', '_')]).strip()[
+                :50]
+            out_file = os.path.join(self.s['out'], f"{i + 1:02d}_{safe_title}.mp4")
+            if not os.path.exists(out_file): jobs.append((i, seg, out_file))
+        if not jobs:
+            self.emit_progress(100)
+            return
+
+        tmp_dir = tempfile.mkdtemp(prefix="ai_slicer_")
+        try:
+            info = probe_media(self.s['video'])
+            if smart_cut.can_copy(info, self.s):
+                self.log_signal.emit("⚡ Исходник уже 9:16 1080x1920, текст выключен — клипы без перекодирования")
+                for i, seg, out_file in jobs:
+                    if not self.is_running: self.log_signal.emit("⛔ Стоп."); break
+                    if not self.copy_clip(i, seg, out_file, total, info, tmp_dir) and self.is_running:
+                        self.log_signal.emit("   ⚠️ Без перекодирования не вышло — полный рендер")
+                        self.render_clip(i, seg, out_file, total, tmp_dir)
+                    self.emit_progress(((i + 1) / total) * 100)
+                return
+
+            max_out = max_outputs_for_budget(self.s.get('memory_budget_mb', DEFAULT_MEMORY_BUDGET_MB))
+            max_out = min(max_out, encoders.max_sessions(self.codec))
+            # Вырезание тишины у каждого клипа свое — такие клипы режем по одному
+            batched = self.s.get('batch_slicing', True) and not self.s.get('silence_cut') and max_out > 1
+            if batched and len(jobs) > 1:
+                batches = plan_batches([(seg['start'], seg['end']) for _, seg, _ in jobs], max_out)
+                self.log_signal.emit(f"⚡ Пакетная нарезка: {len(batches)} проход(ов) декодирования")
+                done = total - len(jobs)
+                for batch in batches:
+                    if not self.is_running: self.log_signal.emit("⛔ Стоп."); break
+                    self.render_batch([jobs[k] for k in batch], tmp_dir, done, total)
+                    done += len(batch)
+                    self.emit_progress((done / total) * 100)
+            else:
+                for i, seg, out_file in jobs:
+                    if not self.is_running: self.log_signal.emit("⛔ Стоп."); break
+                    self.render_clip(i, seg, out_file, total, tmp_dir)
+                    self.emit_progress(((i + 1) / total) * 100)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def render_title(self, seg):
+        """Заголовок клипа в памяти, обрезанный по тексту: (RGBA картинка, x, y)"""
+        disp = seg.get('title', '')
+        if self.s['caps']: disp = disp.upper()
+        font_src = self.s.get('font_source')
+        return self.text_gen.render_header(
+            disp,
+            font_source=font_src if font_src else "impact.ttf",
+            max_font_size=self.s.get('max_font_size', 110),
+            text_color=self.s.get('text_color', '#FFD700'),
+            stroke_color=self.s.get('stroke_color', '#000000'),
+            stroke_width_pct=self.s.get('stroke_width_pct', 5),
+            y_top_limit=self.s.get('y_top', 150),
+            y_bottom_limit=self.s.get('y_bot', 600)
+        )
+
+    def background(self, g, src):
+        """Размытый фон 9:16 в графе g от метки src"""
+        return blurred_background(g, src, 20, 10, self.s.get('blur_mode', DEFAULT_BLUR_MODE))
+
+    def clip_graph(self, keep=None, title_pos=None, fps=None):
+        """
+        Граф одного клипа: склейка кусков без тишины, фон, заголовок (вход 1).
+        :return: (граф, видео_метка, аудио_метка)
+        """
+        g = FilterGraph()
+        v, a = stream(0), stream(0, 'a')
+        if keep and len(keep) > 1:
+            v = g.chain(v, cut_filters(keep, fps=fps), "v_in")
+            a = g.chain(a, cut_filters(keep, audio=True), "a_out")
+        v = self.background(g, v)
+        if title_pos:
+            v = g.node([v, stream(1)], f"overlay={title_pos[0]}:{title_pos[1]}", ["v_out"])[0]
+        return g, v, a
+
+    def run_ffmpeg(self, cmd, duration, label, done, count, total, stdin_data=None):
+        def on_progress(fraction, speed, eta):
+            self.emit_progress(((done + (fraction or 0) * count) / total) * 100)
+            if speed: self.status_signal.emit(f"🎬 {label} {speed:.1f}x • ETA {format_eta(eta)}")
+
+        self.current_process = FFmpegRunner(cmd, duration=duration, on_progress=on_progress, stdin_data=stdin_data)
+        if not self.is_running: return False
+        self.current_process.run()
+        ok = self.current_process.returncode == 0
+        if not ok and self.is_running:
+            self.log_signal.emit(f"⚠️ Ошибка рендера:\n{self.current_process.error_text()}")
+        self.current_process = None
+        return ok
+
+    def render_batch(self, jobs, tmp_dir, done, total):
+        """Один проход декодирования и размытия фона на несколько клипов"""
+        b_start = min(seg['start'] for _, seg, _ in jobs)
+        b_end = max(seg['end'] for _, seg, _ in jobs)
+        has_text = not self.s.get('no_text_render', False)
+
+        cmd = ["ffmpeg", "-y", "-ss", str(b_start), "-t", str(b_end - b_start), "-i", self.s['video']]
+        ranges, overlays, titles = [], [], []
+        for i, seg, out_file in jobs:
+            self.log_signal.emit(f"🎬 Рендер [{i + 1}/{total}]: {os.path.basename(out_file)}")
+            ranges.append((seg['start'] - b_start, seg['end'] - b_start))
+            overlay = None
+            if has_text:
+                img, x, y = self.render_title(seg)
+                titles.append(img)
+                overlay = (len(titles), x, y)  # вход №0 — видео, дальше заголовки по порядку
+            overlays.append(overlay)
+
+        title_args, title_data = title_inputs(titles, tmp_dir)
+        cmd += title_args
+
+        info = probe_media(self.s['video'])
+        has_audio = bool(info and info['has_audio'])
+        fc, labels = build_batch_graph(ranges, base_graph=self.background, overlays=overlays,
+                                       has_audio=has_audio)
+        cmd += ["-filter_complex", fc]
+        for (v_label, a_label), (_, _, out_file) in zip(labels, jobs):
+            cmd += ["-map", v_label]
+            if a_label: cmd += ["-map", a_label]
+            cmd += [*self.video_args, "-c:a", "aac", out_file]
+
+        label = f"[{done + 1}-{done + len(jobs)}/{total}]"
+        self.run_ffmpeg(cmd, b_end - b_start, label, done, len(jobs), total, stdin_data=title_data)
+
+    def copy_clip(self, i, seg, out_file, total, info, tmp_dir):
+        """Клип копированием между ключевыми кадрами; перекодируются только неполные GOP на краях"""
+        src = self.s['video']
+        self.log_signal.emit(f"⚡ Копирование [{i + 1}/{total}]: {os.path.basename(out_file)}")
+        min_piece = 0.5 / info['fps'] if info.get('fps') else 0.02
+        pieces = smart_cut.plan(seg['start'], seg['end'], smart_cut.keyframes(src), min_piece)
+        params = None
+        if any(kind == 'encode' for kind, _, _ in pieces):
+            # Края кодируются с профилем/уровнем исходника, иначе склейка в mp4 может не читаться
+            params = smart_cut.stream_params(src)
+            if not smart_cut.encodable(params):
+                self.log_signal.emit("   ⚠️ Профиль исходника не повторить при кодировании краев")
+                return False
+        label = f"[{i + 1}/{total}]"
+        parts = []
+        for k, (kind, s, e) in enumerate(pieces):
+            part = os.path.join(tmp_dir, f"clip{i}_{k}.ts")
+            if not self.run_ffmpeg(smart_cut.piece_cmd(src, kind, s, e, part, info, params), e - s, label, i, 0,
+                                   total):
+                return False
+            if kind == 'encode' and not smart_cut.compatible(params, smart_cut.stream_params(part)):
+                self.log_signal.emit("   ⚠️ Параметры кодека у краев не совпали с исходником")
+                return False
+            parts.append(part)
+        list_path = smart_cut.write_concat_list(parts, os.path.join(tmp_dir, f"clip{i}.txt"))
+        cmd = smart_cut.concat_cmd(list_path, src, seg['start'], seg['end'], out_file, info)
+        return self.run_ffmpeg(cmd, seg['end'] - seg['start'], label, i, 1, total)
+
+    def render_clip(self, i, seg, out_file, total, tmp_dir):
+        """Клип отдельным процессом (с вырезанием тишины или без пакета)"""
+        video_path = self.s['video']
+        self.log_signal.emit(f"🎬 Рендер [{i + 1}/{total}]: {os.path.basename(out_file)}")
+
+        # 1. ТЕКСТ
+        has_text = not self.s.get('no_text_render', False)
+        title_args, title_data = [], None
+        if has_text:
+            img, title_x, title_y = self.render_title(seg)
+            # Один заголовок — сырым RGBA через stdin, без файла на диске
+            title_args, title_data = title_inputs([img], None)
+
+        dur = seg['end'] - seg['start']
+
+        # 2. ТИШИНА
+        keep = None
+        if self.s.get('silence_cut'):
+            self.log_signal.emit("   ✂️ Поиск тишины...")
+            keep = self.detect_silence_segments(video_path, seg['start'], dur, self.s.get('silence_db'),
+                                                self.s.get('silence_dur'))
+
+        # 3. ФИЛЬТРЫ
+        info = probe_media(video_path)
+        title_pos = (title_x, title_y) if has_text else None
+        g, v_out, a_out = self.clip_graph(keep, title_pos, info['fps'] if info else None)
+
+        # Длительность — у входа: select после последнего отрезка не завершает поток сам
+        cmd = ["ffmpeg", "-y", "-ss", str(seg['start']), "-t", str(dur), "-i", video_path]
+        cmd += title_args
+        script = os.path.join(tmp_dir, f"clip{i}_graph.txt")
+        cmd += [*g.args(v_out, a_out, script=script), *self.video_args, "-c:a", "aac", out_file]
+
+        # Длительность на выходе: после вырезания тишины клип короче
+        out_dur = sum(e - s for s, e in keep) if keep and len(keep) > 1 else dur
+        self.run_ffmpeg(cmd, out_dur, f"[{i + 1}/{total}]", i, 1, total, stdin_data=title_data)
@@ -0,0 +1,178 @@
+"""
+Звуковая дорожка сеанса: извлекается из контейнера один раз в PCM WAV
+(16 кГц моно — формат Whisper) и кэшируется на диске. Транскрибация,
+поиск тишины, громкость и волна читают этот файл без повторного декодирования.
+"""
+import os
+import hashlib
+import struct
+import threading
+import wave
+from core.ffmpeg_runner import FFmpegRunner
+from core.media_probe import file_key
+from core.silence import detect_silences, keep_ranges
+from utils.paths import get_cache_dir
+
+SAMPLE_RATE = 16000
+# Предел кэша дорожек (час звука ~115 МБ)
+MAX_CACHE_BYTES = 2 * 1024 * 1024 * 1024
+# Окно огибающей громкости, сек
+ENVELOPE_WINDOW = 0.02
+
+_lock = threading.Lock()
+_key_locks = {}
+
+
+def extract_audio(path, dst, sample_rate=SAMPLE_RATE, on_progress=None, duration=None):
+    """Один проход ffmpeg: дорожка -> 16-бит PCM WAV моно"""
+    cmd = ["ffmpeg", "-y", "-i", path, "-vn", "-ac", "1", "-ar", str(sample_rate),
+           "-c:a", "pcm_s16le", "-f", "wav", dst]
+    runner = FFmpegRunner(cmd, duration=duration, on_progress=on_progress)
+    if runner.run() != 0:
+        raise RuntimeError(f"Не удалось извлечь звук: {runner.error_text()}")
+    return dst
+
+
+def read_wav(path, start=0.0, end=None):
+    """
+    Кусок WAV как float32 массив в диапазоне [-1, 1].
+    :param start: начало, сек
+    :param end: конец, сек (None — до конца файла)
+    """
+    import numpy as np
+    with wave.open(path, 'rb') as w:
+        rate = w.getframerate()
+        total = w.getnframes()
+        first = min(total, int(start * rate))
+        last = total if end is None else min(total, int(end * rate))
+        w.setpos(first)
+        raw = w.readframes(max(0, last - first))
+    return np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def wav_duration(path):
+    with wave.open(path, 'rb') as w:
+        return w.getnframes() / float(w.getframerate())
+
+
+def _data_chunk(path):
+    """Смещение и размер блока data в WAV (ffmpeg может добавить LIST перед ним)"""
+    with open(path, 'rb') as f:
+        f.seek(12)
+        while True:
+            head = f.read(8)
+            if len(head) < 8: raise ValueError("В WAV нет блока data")
+            cid, size = struct.unpack('<4sI', head)
+            if cid == b'data': return f.tell(), size
+            f.seek(size + (size & 1), 1)
+
+
+class AudioTrack:
+    """
+    Дорожка в памяти через memmap: сэмплы не читаются целиком,
+    пока их не попросят. Огибающая RMS считается один раз.
+    """
+
+    def __init__(self, wav_path):
+        import numpy as np
+        self.path = wav_path
+        with wave.open(wav_path, 'rb') as w:
+            self.sample_rate = w.getframerate()
+        offset, size = _data_chunk(wav_path)
+        self.samples = np.memmap(wav_path, dtype='<i2', mode='r', offset=offset, shape=(size // 2,))
+        self.duration = len(self.samples) / float(self.sample_rate)
+        self._envelope = None
+
+    def read(self, start=0.0, end=None):
+        """float32 [-1, 1] — готово для Whisper"""
+        import numpy as np
+        a = int(start * self.sample_rate)
+        b = len(self.samples) if end is None else int(end * self.sample_rate)
+        return np.asarray(self.samples[a:b], dtype=np.float32) / 32768.0
+
+    def envelope(self):
+        """RMS-огибающая в dBFS с шагом ENVELOPE_WINDOW (считается один раз)"""
+        if self._envelope is None:
+            import numpy as np
+            win = max(1, int(self.sample_rate * ENVELOPE_WINDOW))
+            n = len(self.samples) // win
+            env = np.empty(n, dtype=np.float32)
+            # Блоками, чтобы не поднимать в память весь файл сразу
+            step = 3000
+            for i in range(0, n, step):
+                j = min(n, i + step)
+                block = np.asarray(self.samples[i * win:j * win], dtype=np.float32).reshape(j - i, win) / 32768.0
+                env[i:j] = np.sqrt(np.mean(block * block, axis=1))
+            self._envelope = 20 * np.log10(np.maximum(env, 1e-6))
+        return self._envelope
+
+    def loudness(self, start=0.0, end=None):
+        """Средняя громкость отрезка, dBFS"""
+        import numpy as np
+        env = self.envelope()
+        a = int(start / ENVELOPE_WINDOW)
+        b = len(env) if end is None else max(a + 1, int(end / ENVELOPE_WINDOW))
+        part = env[a:b]
+        if not len(part): return -120.0
+        # Среднее по энергии, а не по децибелам
+        return float(10 * np.log10(np.mean(10 ** (part / 10))))
+
+    def silences(self, db, min_dur, start=0.0, end=None):
+        """Паузы (starts, ends) на отрезке, время относительно start"""
+        return detect_silences(self.envelope(), ENVELOPE_WINDOW, db, min_dur, start, end)
+
+    def keep_ranges(self, db, min_dur, start=0.0, end=None):
+        """Отрезки речи между паузами относительно start или None, если пауз нет"""
+        end = self.duration if end is None else min(end, self.duration)
+        starts, ends = self.silences(db, min_dur, start, end)
+        return keep_ranges(starts, ends, end - start)
+
+    def waveform(self, bins, start=0.0, end=None):
+        """Пики по корзинам для отрисовки волны: список значений 0..1"""
+        import numpy as np
+        a = int(start * self.sample_rate)
+        b = len(self.samples) if end is None else int(end * self.sample_rate)
+        step = max(1, (b - a) // bins)
+        n = (b - a) // step
+        if n <= 0: return []
+        block = np.abs(np.asarray(self.samples[a:a + n * step]).reshape(n, step))
+        return (block.max(axis=1) / 32768.0).tolist()
+
+
+def _evict(folder, max_bytes):
+    entries = []
+    for name in os.listdir(folder):
+        if not name.endswith(".wav"): continue
+        st = os.stat(os.path.join(folder, name))
+        entries.append((st.st_mtime, st.st_size, name))
+    total = sum(size for _, size, _ in entries)
+    for _, size, name in sorted(entries):
+        if total <= max_bytes: break
+        try:
+            os.remove(os.path.join(folder, name))
+            total -= size
+        except OSError:
+            pass
+
+
+def get_audio_track(path, on_log=None, on_progress=None):
+    """
+    Дорожка исходника из кэша (~/.videouniq/audio) или извлечение один раз.
+    Ключ — путь+размер+mtime исходника.
+    """
+    folder = get_cache_dir("audio")
+    key = hashlib.sha1(file_key(path).encode()).hexdigest()
+    wav = os.path.join(folder, f"{key}.wav")
+    # Разные файлы извлекаются параллельно, один и тот же — один раз
+    with _lock:
+        key_lock = _key_locks.setdefault(key, threading.Lock())
+    with key_lock:
+        if os.path.exists(wav):
+            os.utime(wav)
+        else:
+            if on_log: on_log("🎵 Извлечение звука (один раз для всего сеанса)...")
+            tmp = wav + ".part"
+            extract_audio(path, tmp, on_progress=on_progress)
+            os.replace(tmp, wav)
+            _evict(folder, MAX_CACHE_BYTES)
+    return AudioTrack(wav)
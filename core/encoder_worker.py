@@ -0,0 +1,20 @@
+from PyQt6.QtCore import QThread, pyqtSignal
+from core import encoders
+
+
+class EncoderCalibrationWorker(QThread):
+    """Калибровка кодировщиков в фоне по кнопке «Перекалибровать»"""
+    log_signal = pyqtSignal(str)
+    finished_signal = pyqtSignal(dict)
+
+    def __init__(self, force=False):
+        super().__init__()
+        self.force = force
+
+    def run(self):
+        try:
+            calib = encoders.calibrate(force=self.force, on_log=self.log_signal.emit)
+        except Exception as e:
+            self.log_signal.emit(f"⚠️ Калибровка кодировщиков не удалась: {e}")
+            calib = {}
+        self.finished_signal.emit(calib)
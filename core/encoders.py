@@ -0,0 +1,269 @@
+"""
+Выбор видеокодировщика под конкретную машину.
+При первом запуске проверяем, какие кодировщики есть в ffmpeg, и прогоняем
+короткий тестовый кодинг на каждый пресет: скорость (fps) и качество (SSIM).
+Результат кэшируется в ~/.videouniq/encoders.json; "auto" выбирает самый
+быстрый вариант, который держит целевое качество.
+"""
+import os
+import json
+import platform
+import re
+import shutil
+import tempfile
+import threading
+import time
+from core import process_scheduler
+from core.process_scheduler import BATCH, PROBE
+from utils.paths import get_cache_dir
+
+# Кандидаты: кодировщик -> пресеты от быстрых к качественным
+CANDIDATES = {
+    'libx264': ['ultrafast', 'superfast', 'veryfast', 'faster', 'fast'],
+    'libx265': ['ultrafast', 'superfast', 'veryfast'],
+    'h264_nvenc': ['p1', 'p4'],
+    'hevc_nvenc': ['p1', 'p4'],
+    'h264_qsv': ['veryfast', 'medium'],
+    'h264_amf': ['speed', 'balanced'],
+    'h264_videotoolbox': [None],
+}
+LABELS = {
+    'libx264': "CPU x264", 'libx265': "CPU x265",
+    'h264_nvenc': "NVIDIA NVENC H.264", 'hevc_nvenc': "NVIDIA NVENC HEVC",
+    'h264_qsv': "Intel QSV H.264", 'h264_amf': "AMD AMF H.264",
+    'h264_videotoolbox': "Apple VideoToolbox H.264",
+}
+# Пресет, если калибровки еще нет (x264 — ultrafast, как было до калибровки: ее результат может выбрать другой)
+DEFAULT_PRESETS = {'libx264': 'ultrafast', 'libx265': 'ultrafast', 'h264_nvenc': 'p4', 'hevc_nvenc': 'p4',
+                   'h264_qsv': 'veryfast', 'h264_amf': 'speed', 'h264_videotoolbox': None}
+FALLBACK = 'libx264'
+# У AMF пресет задается другим ключом
+PRESET_FLAGS = {'h264_amf': '-quality'}
+# Бытовые видеокарты держат ограниченное число одновременных сессий
+MAX_GPU_SESSIONS = 3
+
+# Тестовый кодинг: вертикальный кадр рилса, CRF как при нарезке
+BENCH_SIZE = "1080x1920"
+BENCH_FRAMES = 60
+BENCH_CRF = 23
+MIN_SSIM = 0.95
+
+_lock = threading.Lock()
+_encoders = None
+_version = None
+_help = None  # вывод ffmpeg -h long
+_calibration = None
+
+
+def is_gpu(codec):
+    return any(tag in codec for tag in ('nvenc', 'qsv', 'amf', 'videotoolbox'))
+
+
+def max_sessions(codec):
+    """Сколько кодировщиков этого типа разумно держать одновременно"""
+    return MAX_GPU_SESSIONS if is_gpu(codec) else 64
+
+
+def parse_encoders(text):
+    """Имена видеокодировщиков из вывода ffmpeg -encoders"""
+    names = set()
+    for line in text.splitlines():
+        m = re.match(r'\s*V[\w.]{5}\s+(\w[\w-]*)', line)
+        if m: names.add(m.group(1))
+    return names
+
+
+def parse_ssim(text):
+    """Итоговый SSIM (All:) из лога фильтра ssim"""
+    m = re.findall(r'All:([\d.]+)', text)
+    return float(m[-1]) if m else None
+
+
+def list_encoders():
+    """Видеокодировщики, собранные в ffmpeg (один запуск за сеанс)"""
+    global _encoders
+    if _encoders is None:
+        res = process_scheduler.run(["ffmpeg", "-hide_banner", "-encoders"], PROBE)
+        _encoders = parse_encoders(res.stdout.decode('utf-8', errors='ignore'))
+    return _encoders
+
+
+def parse_version(text):
+    """Старший номер версии из 'ffmpeg version 7.0.2 ...'; сборки из git (N-xxxx, дата) -> None"""
+    m = re.match(r'ffmpeg version n?(\d+)\.', text)
+    return int(m.group(1)) if m else None
+
+
+def ffmpeg_version():
+    """Старший номер версии ffmpeg (один запуск за сеанс); None — сборка из git или версию не узнать"""
+    global _version
+    if _version is None:
+        res = process_scheduler.run(["ffmpeg", "-version"], PROBE)
+        _version = [parse_version(res.stdout.decode('utf-8', errors='ignore'))]
+    return _version[0]
+
+
+def has_option(name):
+    """ffmpeg знает ключ -name (по -h long, один запуск за сеанс) — для сборок без номера версии"""
+    global _help
+    if _help is None:
+        res = process_scheduler.run(["ffmpeg", "-hide_banner", "-h", "long"], PROBE)
+        _help = res.stdout.decode('utf-8', errors='ignore') if res.returncode == 0 else ""
+    return re.search(rf'^-{re.escape(name)}\b', _help, re.M) is not None
+
+
+def quality_args(codec, crf):
+    """CRF-подобное качество в ключах конкретного кодировщика"""
+    crf = str(int(crf))
+    if "nvenc" in codec:
+        return ["-rc", "vbr", "-cq", crf, "-qmin", crf, "-qmax", crf]
+    if "qsv" in codec:
+        return ["-global_quality", crf]
+    if "amf" in codec:
+        return ["-rc", "cqp", "-qp_i", crf, "-qp_p", crf]
+    if "videotoolbox" in codec:
+        return ["-q:v", str(max(1, min(100, 100 - int(crf) * 2)))]
+    return ["-crf", crf]
+
+
+def preset_args(codec, preset):
+    if not preset: return []
+    return [PRESET_FLAGS.get(codec, "-preset"), preset]
+
+
+def benchmark(codec, preset, frames=BENCH_FRAMES, size=BENCH_SIZE, crf=BENCH_CRF):
+    """
+    Короткий тестовый кодинг синтетического видео.
+    :return: {'codec', 'preset', 'fps', 'ssim'} или None, если кодировщик не работает
+    """
+    src = f"testsrc2=size={size}:rate=30"
+    tmp = tempfile.mkdtemp(prefix="enc_bench_")
+    out = os.path.join(tmp, "bench.mkv")
+    try:
+        cmd = ["ffmpeg", "-hide_banner", "-y", "-f", "lavfi", "-i", src, "-frames:v", str(frames),
+               "-c:v", codec] + preset_args(codec, preset) + quality_args(codec, crf) + [out]
+        t0 = time.perf_counter()
+        res = process_scheduler.run(cmd, BATCH, timeout=120)
+        elapsed = time.perf_counter() - t0
+        if res.returncode != 0 or not os.path.exists(out): return None
+
+        cmd = ["ffmpeg", "-hide_banner", "-i", out, "-f", "lavfi", "-i", src,
+               "-lavfi", "[0:v][1:v]ssim", "-frames:v", str(frames), "-f", "null", "-"]
+        res = process_scheduler.run(cmd, BATCH, timeout=120)
+        ssim = parse_ssim(res.error_text()) if res.returncode == 0 else None
+        return {'codec': codec, 'preset': preset, 'fps': round(frames / elapsed, 1), 'ssim': ssim}
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def pick(results, min_ssim=MIN_SSIM, codec=None):
+    """Самый быстрый вариант, который держит качество (SSIM неизвестен — не отбрасываем)"""
+    ok = [r for r in results
+          if (codec is None or r['codec'] == codec) and (r['ssim'] is None or r['ssim'] >= min_ssim)]
+    return max(ok, key=lambda r: r['fps']) if ok else None
+
+
+def _machine_key():
+    """Калибровка действительна для этой сборки ffmpeg на этой машине"""
+    res = process_scheduler.run(["ffmpeg", "-version"], PROBE)
+    lines = res.stdout.decode('utf-8', errors='ignore').splitlines()
+    version = lines[0] if lines else ""
+    return f"{version}|{platform.node()}|{platform.processor()}|{os.cpu_count()}"
+
+
+def _cache_path():
+    return os.path.join(get_cache_dir(), "encoders.json")
+
+
+def load_calibration():
+    """Калибровка из памяти или с диска (без проверки машины), иначе None"""
+    global _calibration
+    if _calibration is None:
+        try:
+            with open(_cache_path(), 'r', encoding='utf-8') as f:
+                _calibration = json.load(f)
+        except:
+            return None
+    return _calibration
+
+
+def calibrate(force=False, on_log=None):
+    """
+    Проверяет кодировщики и пресеты (или берет результат из кэша).
+    :return: {'key', 'results': [...], 'best': {...} или None}
+    """
+    global _calibration
+    log = on_log or (lambda msg: None)
+    with _lock:
+        key = _machine_key()
+        cached = load_calibration()
+        if cached and cached.get('key') == key and not force:
+            return cached
+
+        log("🔬 Калибровка кодировщиков...")
+        available = list_encoders()
+        results = []
+        for codec, presets in CANDIDATES.items():
+            if codec not in available: continue
+            for preset in presets:
+                res = benchmark(codec, preset)
+                if not res:
+                    log(f"   ✖ {codec} не работает на этой машине")
+                    break
+                ssim = f"{res['ssim']:.3f}" if res['ssim'] is not None else "?"
+                log(f"   ✔ {codec} {preset or ''}: {res['fps']} fps, SSIM {ssim}")
+                results.append(res)
+
+        _calibration = {'key': key, 'results': results, 'best': pick(results)}
+        try:
+            with open(_cache_path(), 'w', encoding='utf-8') as f:
+                json.dump(_calibration, f, ensure_ascii=False, indent=2)
+        except OSError:
+            pass
+        return _calibration
+
+
+def ensure_calibrated(codec='auto', on_log=None):
+    """
+    Калибровка при первом использовании 'auto' (дальше — из кэша), а не при
+    запуске приложения: прогон кодировщиков не мешает ни старту, ни превью.
+    :return: (кодировщик, пресет) как у resolve()
+    """
+    if not codec or codec == 'auto':
+        # Кэш проверяет сам calibrate(); ffmpeg может не запуститься — тогда resolve() без калибровки
+        try:
+            calibrate(on_log=on_log)
+        except Exception as e:
+            if on_log: on_log(f"⚠️ Калибровка кодировщиков не удалась: {e}")
+    return resolve(codec)
+
+
+def working_codecs():
+    """Кодировщики, прошедшие калибровку (пока ее нет — только CPU x264)"""
+    calib = load_calibration()
+    if not calib: return [FALLBACK]
+    codecs = []
+    for r in calib['results']:
+        if r['codec'] not in codecs: codecs.append(r['codec'])
+    return codecs or [FALLBACK]
+
+
+def resolve(codec='auto'):
+    """
+    'auto' или имя кодировщика -> (кодировщик, пресет) по калибровке.
+    Без калибровки — libx264 с пресетом по умолчанию.
+    """
+    calib = load_calibration()
+    results = calib['results'] if calib else []
+    if not codec or codec == 'auto':
+        best = calib.get('best') if calib else None
+        if best: return best['codec'], best['preset']
+        codec = FALLBACK
+    best = pick(results, codec=codec)
+    return codec, best['preset'] if best else DEFAULT_PRESETS.get(codec)
+
+
+def encoder_args(codec='auto', crf=BENCH_CRF):
+    """Ключи ffmpeg для видео: кодировщик, пресет и качество"""
+    codec, preset = resolve(codec)
+    return ["-c:v", codec] + preset_args(codec, preset) + quality_args(codec, crf)
@@ -0,0 +1,7 @@
+"""
+Движок задач без Qt: описание задачи (Job), исполнители (потоки, процессы,
+asyncio) и шина событий. Вкладки, CLI и пулы запускают одни и те же задачи.
+"""
+from core.engine.events import Event, EventBus
+from core.engine.jobs import Job, JobRunner, register_kind
+from core.engine.executors import ThreadExecutor, ProcessExecutor, AsyncioExecutor
@@ -0,0 +1,40 @@
+import threading
+from collections import namedtuple
+
+# Событие задачи: kind — log / progress / status / result / error / finished
+Event = namedtuple('Event', 'job_id kind value')
+
+# Сигнал обработчика -> вид события
+SIGNAL_EVENTS = {
+    'log_signal': 'log', 'progress_signal': 'progress', 'status_signal': 'status',
+    'result_signal': 'result', 'error_signal': 'error', 'finished_signal': 'finished',
+}
+EVENT_SIGNALS = {v: k for k, v in SIGNAL_EVENTS.items()}
+
+
+class EventBus:
+    """
+    Шина событий задач. Подписчик получает Event; фильтр по виду и/или задаче.
+    Обработчики вызываются в потоке, который опубликовал событие.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = []
+
+    def subscribe(self, handler, kind=None, job_id=None):
+        with self.lock:
+            self.subscribers.append((handler, kind, job_id))
+        return handler
+
+    def unsubscribe(self, handler):
+        with self.lock:
+            self.subscribers = [s for s in self.subscribers if s[0] is not handler]
+
+    def publish(self, event):
+        with self.lock:
+            subs = list(self.subscribers)
+        for handler, kind, job_id in subs:
+            if kind and kind != event.kind: continue
+            if job_id and job_id != event.job_id: continue
+            handler(event)
@@ -0,0 +1,128 @@
+"""
+Исполнители задач с общим интерфейсом submit(job) -> Future и cancel(job_id).
+События всех задач идут в одну шину, независимо от того, где задача выполняется.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from core.engine.jobs import JobRunner
+
+
+class ThreadExecutor:
+    """Задачи в потоках текущего процесса (ffmpeg и так работает в своих процессах)"""
+
+    def __init__(self, bus, max_workers=1):
+        self.bus = bus
+        self.pool = ThreadPoolExecutor(max_workers=max_workers)
+        self.lock = threading.Lock()
+        self.runners = {}
+        self.cancelled = set()
+
+    def submit(self, job):
+        return self.pool.submit(self._run, job)
+
+    def _run(self, job):
+        runner = JobRunner(job, self.bus)
+        with self.lock:
+            if job.id in self.cancelled: return
+            self.runners[job.id] = runner
+        try:
+            runner.run()
+        finally:
+            with self.lock:
+                self.runners.pop(job.id, None)
+
+    def cancel(self, job_id):
+        with self.lock:
+            self.cancelled.add(job_id)
+            runner = self.runners.get(job_id)
+        if runner: runner.stop()
+
+    def shutdown(self, wait=True):
+        with self.lock:
+            runners = list(self.runners.values())
+        if not wait:
+            for runner in runners: runner.stop()
+        self.pool.shutdown(wait=wait)
+
+
+class _QueueBus:
+    """Шина в дочернем процессе: события уходят в очередь родителю"""
+
+    def __init__(self, queue):
+        self.queue = queue
+
+    def publish(self, event):
+        self.queue.put(event)
+
+
+def _run_in_process(job, queue, stop_event):
+    runner = JobRunner(job, _QueueBus(queue))
+
+    def watch():
+        stop_event.wait()
+        runner.stop()
+
+    threading.Thread(target=watch, daemon=True).start()
+    runner.run()
+
+
+class ProcessExecutor:
+    """
+    Задачи в отдельных процессах (Whisper, тяжелый Python-код, обход GIL).
+    События из процессов пересылает поток-насос родителя.
+    """
+
+    def __init__(self, bus, max_workers=None):
+        self.bus = bus
+        self.manager = multiprocessing.Manager()
+        self.queue = self.manager.Queue()
+        self.pool = ProcessPoolExecutor(max_workers=max_workers)
+        self.stops = {}
+        self.pump = threading.Thread(target=self._pump, daemon=True)
+        self.pump.start()
+
+    def _pump(self):
+        while True:
+            event = self.queue.get()
+            if event is None: break
+            self.bus.publish(event)
+
+    def submit(self, job):
+        stop_event = self.manager.Event()
+        self.stops[job.id] = stop_event
+        future = self.pool.submit(_run_in_process, job, self.queue, stop_event)
+        future.add_done_callback(lambda _: self.stops.pop(job.id, None))
+        return future
+
+    def cancel(self, job_id):
+        stop_event = self.stops.get(job_id)
+        if stop_event: stop_event.set()
+
+    def shutdown(self, wait=True):
+        if not wait:
+            for stop_event in list(self.stops.values()): stop_event.set()
+        self.pool.shutdown(wait=wait)
+        self.queue.put(None)
+        self.pump.join(timeout=5)
+        self.manager.shutdown()
+
+
+class AsyncioExecutor:
+    """Для серверов на asyncio: await executor.run(job); выполнение — в пуле потоков"""
+
+    def __init__(self, bus, max_workers=1):
+        self.threads = ThreadExecutor(bus, max_workers)
+
+    def submit(self, job):
+        return self.threads.submit(job)
+
+    async def run(self, job):
+        import asyncio  # ~80 мс на импорт, при старте GUI не нужен
+        return await asyncio.wrap_future(self.threads.submit(job))
+
+    def cancel(self, job_id):
+        self.threads.cancel(job_id)
+
+    def shutdown(self, wait=True):
+        self.threads.shutdown(wait)
@@ -0,0 +1,56 @@
+import importlib
+import uuid
+from core.engine.events import Event, SIGNAL_EVENTS
+from core.signals import connect_all
+
+# Вид задачи -> (модуль, класс обработчика). Модуль импортируется только при запуске.
+JOB_KINDS = {
+    'uniq': ('core.uniqualizer', 'Uniqualizer'),
+    'uniq_preview': ('core.uniqualizer', 'PreviewRenderer'),
+    'slice': ('core.slicer', 'Slicer'),
+    'ai': ('core.ai_slicer', 'AiSlicer'),
+}
+
+
+def register_kind(kind, module, cls):
+    JOB_KINDS[kind] = (module, cls)
+
+
+class Job:
+    """
+    Описание задачи: вид и аргументы обработчика. Без живых объектов,
+    поэтому задачу можно передать в другой процесс или на другую машину.
+    """
+
+    def __init__(self, kind, *args, **kwargs):
+        if kind not in JOB_KINDS: raise ValueError(f"Неизвестный вид задачи: {kind}")
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.args = args
+        self.kwargs = kwargs
+
+    def create(self):
+        module, cls = JOB_KINDS[self.kind]
+        return getattr(importlib.import_module(module), cls)(*self.args, **self.kwargs)
+
+    def __repr__(self):
+        return f"Job({self.kind}, {self.id})"
+
+
+class JobRunner:
+    """Выполняет задачу в текущем потоке, сигналы обработчика -> события шины"""
+
+    def __init__(self, job, bus):
+        self.job = job
+        self.bus = bus
+        self.processor = job.create()
+        connect_all(self.processor, self.on_signal)
+
+    def on_signal(self, name, *args):
+        self.bus.publish(Event(self.job.id, SIGNAL_EVENTS.get(name, name), args[0] if args else None))
+
+    def run(self):
+        self.processor.run()
+
+    def stop(self):
+        self.processor.stop()
@@ -0,0 +1,29 @@
+from PyQt6.QtCore import QThread
+from core.engine.events import EventBus, EVENT_SIGNALS
+from core.engine.jobs import JobRunner
+
+
+class JobWorker(QThread):
+    """
+    QThread-обертка над задачей движка: события шины -> одноименные pyqtSignal
+    (log -> log_signal и т.д.). Сигналы объявляет наследник.
+    """
+
+    def __init__(self, job, bus=None):
+        super().__init__()
+        self.job = job
+        self.bus = bus or EventBus()
+        self.bus.subscribe(self.forward, job_id=job.id)
+        self.runner = JobRunner(job, self.bus)
+
+    def forward(self, event):
+        sig = getattr(self, EVENT_SIGNALS.get(event.kind, ''), None)
+        if sig is None: return
+        if event.value is None: sig.emit()
+        else: sig.emit(event.value)
+
+    def run(self):
+        self.runner.run()
+
+    def stop(self):
+        self.runner.stop()
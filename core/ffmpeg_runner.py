@@ -0,0 +1,118 @@
+import os
+import subprocess
+from collections import deque
+
+# Сколько последних строк stderr храним для отчета об ошибке
+STDERR_TAIL_LINES = 40
+
+
+def startupinfo():
+    """Скрывает консольное окно ffmpeg на Windows (на других ОС не нужно)"""
+    if os.name != 'nt': return None
+    si = subprocess.STARTUPINFO()
+    si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    return si
+
+
+def format_eta(seconds):
+    if seconds is None: return "--:--"
+    m, s = divmod(int(seconds), 60)
+    h, m = divmod(m, 60)
+    return f"{h:d}:{m:02d}:{s:02d}" if h else f"{m:02d}:{s:02d}"
+
+
+def parse_progress_block(block):
+    """
+    Разбирает один блок -progress (ключи out_time_us/out_time_ms, speed, fps).
+    out_time_ms у ffmpeg исторически тоже в микросекундах.
+    :return: (секунд выхода, скорость x, fps)
+    """
+    out_us = block.get('out_time_us') or block.get('out_time_ms')
+    try:
+        out_time = int(out_us) / 1_000_000
+    except (TypeError, ValueError):
+        out_time = None
+    try:
+        speed = float(block.get('speed', '').rstrip('x'))
+    except ValueError:
+        speed = None
+    try:
+        fps = float(block.get('fps', ''))
+    except ValueError:
+        fps = None
+    return out_time, speed, fps
+
+
+class FFmpegRunner:
+    """
+    Запуск ffmpeg с -progress pipe:1 и потоковым разбором прогресса.
+    stderr читается в отдельном потоке, хранится только хвост.
+
+    on_progress(fraction, speed, eta) вызывается на каждый блок прогресса;
+    fraction в диапазоне 0..1 (если известна длительность), eta — секунды.
+    stdin_data — байты для входа pipe:0 (например, сырой RGBA заголовка).
+    Процесс запускает общий планировщик (core.process_scheduler) с приоритетом
+    priority; timeout — секунды до принудительной остановки.
+    """
+
+    def __init__(self, cmd, duration=None, on_progress=None, tail_lines=STDERR_TAIL_LINES, stdin_data=None,
+                 priority=None, timeout=None):
+        self.cmd = [cmd[0], "-progress", "pipe:1", "-nostats"] + list(cmd[1:])
+        self.duration = duration
+        self.on_progress = on_progress
+        self.stdin_data = stdin_data
+        self.priority = priority
+        self.timeout = timeout
+        self.stderr_tail = deque(maxlen=tail_lines)
+        self.job = None
+        self.block = {}
+        self.killed = False
+        self.speed = None
+        self.fps = None
+        self.returncode = None
+
+    def run(self):
+        """Блокирует до завершения ffmpeg, возвращает код возврата"""
+        from core import process_scheduler  # asyncio грузится при первом запуске ffmpeg, а не при старте
+        priority = process_scheduler.BATCH if self.priority is None else self.priority
+        self.job = process_scheduler.get_scheduler().submit(
+            self.cmd, priority, self.timeout, self.stdin_data, on_stdout=self._read_progress,
+            on_stderr=self._read_stderr)
+        # kill() мог прийти до запуска процесса
+        if self.killed: self.job.cancel()
+        self.returncode = self.job.wait()
+        if self.job.error: self.stderr_tail.append(self.job.error)
+        if self.job.timed_out: self.stderr_tail.append(f"Превышено время ожидания ({self.timeout} с)")
+        return self.returncode
+
+    def _read_progress(self, raw):
+        line = raw.decode('utf-8', errors='ignore').strip()
+        if '=' not in line: return
+        key, val = line.split('=', 1)
+        self.block[key] = val
+        if key == 'progress':
+            self._emit(self.block)
+            self.block = {}
+
+    def _read_stderr(self, raw):
+        self.stderr_tail.append(raw.decode('utf-8', errors='ignore').rstrip())
+
+    def _emit(self, block):
+        out_time, speed, fps = parse_progress_block(block)
+        if speed: self.speed = speed
+        if fps: self.fps = fps
+        if not self.on_progress: return
+
+        fraction, eta = None, None
+        if self.duration and out_time is not None:
+            fraction = max(0.0, min(1.0, out_time / self.duration))
+            if self.speed: eta = max(0.0, (self.duration - out_time) / self.speed)
+        if block.get('progress') == 'end': fraction, eta = 1.0, 0.0
+        self.on_progress(fraction, self.speed, eta)
+
+    def error_text(self):
+        return "\n".join(self.stderr_tail)
+
+    def kill(self):
+        self.killed = True
+        if self.job: self.job.cancel()
@@ -0,0 +1,277 @@
+"""
+Построение filter_complex для всех вкладок.
+
+FilterGraph собирает граф из цепочек и узлов с метками (Pad) вместо склейки
+строк: метки уникальны и потребляются один раз, пустые фильтры (copy,
+volume=1, ...) выбрасываются, линейные цепочки сливаются в одну, а подряд
+идущие scale, где первый только уменьшает до большего размера, — в один проход.
+
+Размытый фон 9:16 раньше строился boxblur в полном кадре 1080x1920 на каждый
+кадр — это главный потребитель CPU при рендере. Режим fast размывает фон
+в кадре в FAST_DOWNSCALE раз меньше (гауссом той же силы) и растягивает:
+после сильного размытия деталей, которые потеряются при растяжении, уже нет.
+"""
+import math
+import re
+
+REELS_W, REELS_H = 1080, 1920
+# classic — boxblur в полном кадре (как было), gblur — гаусс в полном кадре,
+# fast — гаусс в уменьшенном кадре и растяжение
+BLUR_MODES = ('fast', 'gblur', 'classic')
+DEFAULT_BLUR_MODE = 'fast'
+# Размер фона в fast: 1080x1920 / 6 = 180x320 (четные стороны для yuv420p)
+FAST_DOWNSCALE = 6
+
+
+def box_sigma(radius, power):
+    """Сигма гаусса с той же дисперсией, что boxblur radius:power (power проходов окна 2r+1)"""
+    return math.sqrt(power * radius * (radius + 1) / 3)
+
+
+# Граф длиннее — через файл: строка команды в Windows ограничена 32767 символами
+GRAPH_ARG_LIMIT = 8000
+# Фильтры, которые пропускают кадры/звук без изменений
+NOOP_FILTERS = {'copy', 'null', 'acopy', 'anull'}
+# Фильтр с одним числовым параметром, при котором он ничего не делает
+NOOP_VALUES = {'volume': 1.0, 'atempo': 1.0}
+NOOP_PTS = re.compile(r'(?:1(?:\.0*)?\*)?PTS')
+# Размер scale зависит от входа (тогда предыдущий scale убирать нельзя)
+INPUT_SIZE_REF = re.compile(r'\b(?:iw|ih|in_w|in_h|a|sar|dar|hsub|vsub)\b')
+
+
+class Pad:
+    """Метка в графе: [name]; stream — поток входа (0:v), он мапится без скобок"""
+
+    def __init__(self, name, kind='v', stream=False):
+        self.name = name
+        self.kind = kind
+        self.stream = stream
+
+    def __str__(self):
+        return f"[{self.name}]"
+
+    def __repr__(self):
+        return f"Pad({self.name!r})"
+
+    @property
+    def map_arg(self):
+        return self.name if self.stream else str(self)
+
+
+def stream(index, kind='v'):
+    """Поток входа ffmpeg: stream(1, 'a') -> [1:a]"""
+    return Pad(f"{index}:{kind}", kind, stream=True)
+
+
+def split_filters(text):
+    """'a=1,b=(x,y),c' -> ['a=1', 'b=(x,y)', 'c']: запятые внутри скобок и кавычек не делят"""
+    parts, cur, depth, quote = [], "", 0, None
+    for ch in text:
+        if quote:
+            if ch == quote: quote = None
+        elif ch in "'\"":
+            quote = ch
+        elif ch in "([":
+            depth += 1
+        elif ch in ")]":
+            depth -= 1
+        elif ch == ',' and depth == 0:
+            parts.append(cur.strip())
+            cur = ""
+            continue
+        cur += ch
+    parts.append(cur.strip())
+    return [p for p in parts if p]
+
+
+def is_noop(flt):
+    name, _, args = flt.partition('=')
+    if name in NOOP_FILTERS and not args: return True
+    if name in ('setpts', 'asetpts'): return bool(NOOP_PTS.fullmatch(args))
+    if name == 'scale': return args == 'iw:ih'
+    if name in NOOP_VALUES:
+        try:
+            return float(args) == NOOP_VALUES[name]
+        except ValueError:
+            return False
+    return False
+
+
+def _scale_size(flt):
+    """'scale=W:H[:k=v...]' -> (W, H, {опции}) или None"""
+    name, _, args = flt.partition('=')
+    if name != 'scale' or not args: return None
+    pos, opts = [], {}
+    for part in args.split(':'):
+        if '=' in part:
+            k, v = part.split('=', 1)
+            opts[k] = v
+        else:
+            pos.append(part)
+    w, h = opts.pop('w', None), opts.pop('h', None)
+    if len(pos) == 2 and w is None and h is None: w, h = pos
+    elif pos: return None
+    if w is None or h is None: return None
+    return w, h, opts
+
+
+def _scale_overridden(first, second):
+    """
+    Первый scale можно убрать, только если он не теряет деталей: оба задают
+    явный размер без опций, и первый не меньше второго. Уменьшение перед
+    увеличением (scale=iw/4 перед размытием фона) — намеренное, его не трогаем.
+    """
+    a, b = _scale_size(first), _scale_size(second)
+    if not a or not b or a[2] or b[2]: return False
+    try:
+        aw, ah, bw, bh = (int(x) for x in (a[0], a[1], b[0], b[1]))
+    except ValueError:
+        return False
+    return min(bw, bh) > 0 and aw >= bw and ah >= bh
+
+
+def simplify(filters):
+    """Цепочка без пустых фильтров и без scale, который без потерь перезаписывается следующим"""
+    out = []
+    for item in filters:
+        for flt in split_filters(item):
+            if is_noop(flt): continue
+            if out and _scale_overridden(out[-1], flt): out.pop()
+            out.append(flt)
+    return out
+
+
+class FilterGraph:
+    """
+    Граф filter_complex:
+        g = FilterGraph()
+        v = g.chain(stream(0), ["hflip", "scale=1080:-2"])
+        bg, fg = g.split(v, 2)
+        ...
+        cmd += g.args(v, a)  # -filter_complex ... -map ... -map ...
+    """
+
+    def __init__(self):
+        self.entries = []  # [входы, фильтры, выходы]
+        self.names = set()
+        self.producer = {}  # имя метки -> запись, которая ее выдает
+        self.consumed = set()
+
+    def pad(self, name=None, kind='v'):
+        """Новая метка; занятое имя получает суффикс (_2, _3...)"""
+        base = name or kind
+        name, n = base, 1
+        while name in self.names:
+            n += 1
+            name = f"{base}_{n}"
+        self.names.add(name)
+        return Pad(name, kind)
+
+    def _consume(self, pad):
+        if pad.stream: return
+        if pad.name not in self.names: raise ValueError(f"Метка {pad} не из этого графа")
+        if pad.name in self.consumed: raise ValueError(f"Метка {pad} уже использована")
+        self.consumed.add(pad.name)
+
+    def node(self, inputs, filters, outputs):
+        """
+        Узел с несколькими входами/выходами (overlay, concat, split, amix).
+        :param outputs: список (имя, вид) или имен (вид как у первого входа)
+        :return: список выходных меток
+        """
+        filters = simplify(filters if isinstance(filters, (list, tuple)) else [filters])
+        for p in inputs: self._consume(p)
+        outs = [self.pad(o, inputs[0].kind) if isinstance(o, str) or o is None else self.pad(*o) for o in outputs]
+        prev = self.producer.pop(inputs[0].name, None) if len(inputs) == 1 else None
+        if prev is not None:
+            # Продолжение линейной цепочки: дописываем фильтры к ней, без промежуточной метки
+            prev[1] = simplify(prev[1] + filters)
+            prev[2] = outs
+            entry = prev
+        else:
+            entry = [list(inputs), filters, outs]
+            self.entries.append(entry)
+        if len(outs) == 1: self.producer[outs[0].name] = entry
+        return outs
+
+    def chain(self, src, filters, out=None):
+        """Линейная цепочка от src; без фильтров возвращает src как есть"""
+        filters = simplify(filters)
+        if not filters: return src
+        return self.node([src], filters, [out])[0]
+
+    def split(self, src, names):
+        """split/asplit на несколько веток; names — число или список имен"""
+        if isinstance(names, int): names = [None] * names
+        flt = f"{'a' if src.kind == 'a' else ''}split={len(names)}"
+        return self.node([src], [flt], names)
+
+    def render(self, *outputs):
+        """
+        Строка filter_complex. Если переданы выходы (что мапится в файл),
+        проверяется, что ни одна метка не осталась висеть.
+        """
+        if outputs:
+            mapped = {p.name for p in outputs if p is not None}
+            dangling = [o for _, _, outs in self.entries for o in outs
+                        if o.name not in self.consumed and o.name not in mapped]
+            if dangling: raise ValueError(f"Не подключены: {' '.join(map(str, dangling))}")
+        parts = []
+        for inputs, filters, outs in self.entries:
+            parts.append("".join(map(str, inputs)) + ",".join(filters) + "".join(map(str, outs)))
+        return ";".join(parts)
+
+    def args(self, *outputs, script=None):
+        """
+        Аргументы ffmpeg: -filter_complex (если граф не пустой) и -map на каждый выход (None пропускается).
+        :param script: путь для файла графа, если он не влезает в командную строку
+        """
+        outputs = [p for p in outputs if p is not None]
+        fc = self.render(*outputs)
+        cmd = ["-filter_complex", fc] if fc else []
+        if script and len(fc) > GRAPH_ARG_LIMIT:
+            with open(script, 'w', encoding='utf-8') as f:
+                f.write(fc)
+            cmd = [script_option(), script]
+        for p in outputs: cmd += ["-map", p.map_arg]
+        return cmd
+
+    def __str__(self):
+        return self.render()
+
+
+def script_option():
+    """
+    Ключ ffmpeg для графа из файла: -/filter_complex с 7.0, раньше -filter_complex_script.
+    Версию сборки из git не узнать — тогда старый ключ, если ffmpeg его еще знает
+    (в 7.x он устарел, но работает).
+    """
+    from core.encoders import ffmpeg_version, has_option
+    version = ffmpeg_version()
+    if version is None: return "-filter_complex_script" if has_option("filter_complex_script") else "-/filter_complex"
+    return "-filter_complex_script" if version < 7 else "-/filter_complex"
+
+
+def blurred_background(g, src, radius=20, power=10, mode=DEFAULT_BLUR_MODE, w=REELS_W, h=REELS_H):
+    """
+    Кадр целиком по центру 9:16 поверх размытой копии; возвращает выходную метку.
+    Сила размытия задается как у boxblur (radius:power) во всех режимах.
+    """
+    bg, fg = g.split(src, ["bg", "fg"])
+    if mode == 'fast':
+        sw, sh = w // FAST_DOWNSCALE, h // FAST_DOWNSCALE
+        sigma = box_sigma(radius, power) / FAST_DOWNSCALE
+        blur = [f"scale={sw}:{sh}:force_original_aspect_ratio=increase", f"crop={sw}:{sh}",
+                f"gblur=sigma={sigma:.2f}:steps=2", f"scale={w}:{h}"]
+    else:
+        flt = f"gblur=sigma={box_sigma(radius, power):.2f}:steps=2" if mode == 'gblur' else f"boxblur={radius}:{power}"
+        blur = ["scale=iw/4:-1", f"scale={w}:{h}:force_original_aspect_ratio=increase", f"crop={w}:{h}", flt]
+    bg = g.chain(bg, blur, "bg_blur")
+    fg = g.chain(fg, [f"scale={w}:{h}:force_original_aspect_ratio=decrease"], "fg_scaled")
+    return g.node([bg, fg], "overlay=(W-w)/2:(H-h)/2", ["v_bg"])[0]
+
+
+def letterbox(g, src, w=REELS_W, h=REELS_H):
+    """Кадр по центру 9:16 с черными полями"""
+    return g.chain(src, [f"scale={w}:{h}:force_original_aspect_ratio=decrease", f"pad={w}:{h}:(ow-iw)/2:(oh-ih)/2"],
+                   "v_box")
@@ -0,0 +1,309 @@
+"""
+Выбор лучших моментов (хайлайтов) по транскрипту: сменные движки.
+
+gemini — облачная модель Google (нужен ключ и интернет);
+http   — локальный LLM-сервер с OpenAI-совместимым API (llama.cpp, Ollama,
+         vLLM, LM Studio) — для рендер-фермы без выхода в сеть;
+local  — эвристика без модели и сети: темп речи, плотность ключевых слов,
+         пики громкости и паузы; считается за доли секунды.
+
+Движок получает фразы Whisper ({'id', 'start', 'end', 'text'}) и возвращает
+клипы в схеме analysis_result.json: {'start', 'end', 'title'}.
+"""
+import importlib.util
+import json
+import re
+import statistics
+
+DEFAULT_BACKEND = 'gemini'
+GEMINI_MODELS = ('gemini-2.5-flash', 'gemini-1.5-pro')
+# llama.cpp server по умолчанию; у Ollama — http://127.0.0.1:11434/v1/chat/completions
+DEFAULT_LLM_URL = "http://127.0.0.1:8080/v1/chat/completions"
+DEFAULT_LLM_MODEL = "local"
+LLM_TIMEOUT = 600
+# Клип короче — мусор (ошибка модели или обрывок фразы)
+MIN_CLIP_SEC = 10
+
+# Веса признаков эвристики (признаки нормированы: z-оценка по всему видео)
+W_RATE = 1.0
+W_KEYWORDS = 1.5
+W_LOUDNESS = 1.0
+# Бонус клипу, который начинается и заканчивается на паузе (законченная мысль)
+W_PAUSE = 0.5
+PAUSE_CAP_SEC = 2.0
+# Штраф за отклонение длительности от целевой (доля от целевой)
+W_TARGET = 0.5
+TITLE_WORDS = 5
+
+# Начала слов-крючков: вопрос, интрига, эмоция, цифры и деньги
+HOOK_STEMS = (
+    'секрет', 'никогда', 'всегда', 'главн', 'ошибк', 'важн', 'деньг', 'миллион', 'тысяч', 'почему',
+    'зачем', 'правд', 'шок', 'невероятн', 'лучш', 'худш', 'опасн', 'бесплатн', 'запрещ', 'скрыва',
+    'внимани', 'смотрите', 'представ', 'оказыва', 'на самом деле', 'история', 'страшн', 'смешн',
+    'secret', 'never', 'always', 'mistake', 'money', 'million', 'why', 'truth', 'shock', 'best',
+    'worst', 'danger', 'free', 'crazy', 'insane', 'actually', 'imagine', 'story',
+)
+
+
+def target_quantity(minutes):
+    """Сколько клипов брать: (описание для LLM, минимум, максимум). ~1 клип на 5 минут"""
+    if minutes < 6: return "Select exactly 1 best segment (The viral highlight).", 1, 1
+    if minutes < 20: return "Select 2 to 4 viral segments. Only the best parts.", 2, 4
+    if minutes < 60: return "Select 5 to 10 viral segments. Skip boring parts.", 5, 10
+    return "Select 10 to 20 viral segments. Focus on high engagement.", 10, 20
+
+
+def format_ts(seconds):
+    m, s = divmod(seconds, 60)
+    h, m = divmod(m, 60)
+    return "{:02d}:{:02d}:{:02d}".format(int(h), int(m), int(s))
+
+
+class HighlightBackend:
+    """
+    Интерфейс движка выбора хайлайтов.
+    select() получает фразы, длительность видео и настройки вкладки
+    (min_duration, max_duration, target_duration, ai_prompt).
+    """
+    name = ''
+    module = ''
+    # Нужна ли движку звуковая дорожка (громкость)
+    uses_audio = False
+
+    def __init__(self, **options):
+        self.options = options
+
+    def available(self):
+        return not self.module or importlib.util.find_spec(self.module) is not None
+
+    def select(self, segments, duration, settings, track=None, on_log=None):
+        """:return: список клипов {'start', 'end', 'title'}"""
+        raise NotImplementedError
+
+
+# --- LLM: промпт и разбор ответа общие для облака и локального сервера ---
+
+def build_prompt(segments, duration, settings):
+    minutes = duration / 60
+    target_qty_desc = target_quantity(minutes)[0]
+    transcript_buffer = "".join(f"[{seg['id']}] {format_ts(seg['start'])}: {seg['text']}\n" for seg in segments)
+    min_d = settings.get('min_duration', 60)
+    max_d = settings.get('max_duration', 180)
+    user_prompt = settings.get('ai_prompt', '')
+
+    # --- ЖЕСТКИЙ ПРОМПТ (RUSSIAN ONLY) ---
+    return f"""
+        Role: Expert Video Editor & Content Curator.
+        Task: Analyze the transcript and extract viral clips for Reels/TikTok.
+
+        Video Context: {user_prompt}
+        Total Video Duration: {int(minutes)} minutes.
+        QUANTITY GOAL: {target_qty_desc}
+
+        STRICT RULES:
+        1. DO NOT cover the whole video. IGNORE boring parts, intros, outros.
+        2. Clip duration must be between {min_d} and {max_d} seconds.
+        3. OUTPUT LANGUAGE: RUSSIAN (Русский) for Titles!
+        4. Titles must be short (3-5 words), punchy, clickbait.
+        5. Return ONLY valid JSON.
+
+        Output JSON Format:
+        [
+            {{
+                "start_id": <int: ID of the first phrase>,
+                "end_id": <int: ID of the last phrase>,
+                "title": "<RUSSIAN TITLE HERE>"
+            }}
+        ]
+
+        TRANSCRIPT:
+        {transcript_buffer}
+        """
+
+
+def parse_clips(text, segments):
+    """Ответ LLM (JSON со start_id/end_id, возможно в ```json```) -> проверенные клипы"""
+    text = text.replace('```json', '').replace('```', '').strip()
+    # Локальные модели любят добавить пояснение до или после JSON
+    a, b = text.find('['), text.rfind(']')
+    ai_clips = json.loads(text[a:b + 1] if a >= 0 and b > a else text)
+
+    clips = []
+    for clip in ai_clips:
+        if not isinstance(clip, dict): continue
+        s_id = clip.get('start_id')
+        e_id = clip.get('end_id')
+        if not isinstance(s_id, int) or not isinstance(e_id, int): continue
+        if not 0 <= s_id <= e_id < len(segments): continue
+
+        start, end = segments[s_id]['start'], segments[e_id]['end']
+        if end - start < MIN_CLIP_SEC: continue
+        clips.append({'start': start, 'end': end, 'title': clip.get('title') or 'Интересный момент'})
+    return clips
+
+
+class LlmBackend(HighlightBackend):
+    def generate(self, prompt):
+        """Текст ответа модели"""
+        raise NotImplementedError
+
+    def select(self, segments, duration, settings, track=None, on_log=None):
+        if on_log: on_log("📡 Анализ смыслов (это может занять время)...")
+        return parse_clips(self.generate(build_prompt(segments, duration, settings)), segments)
+
+
+class GeminiBackend(LlmBackend):
+    """Опции: api_key"""
+    name = 'gemini'
+    module = 'google.generativeai'
+
+    def generate(self, prompt):
+        import google.generativeai as genai
+        genai.configure(api_key=self.options.get('api_key'))
+        try:
+            model = genai.GenerativeModel(GEMINI_MODELS[0])
+        except:
+            model = genai.GenerativeModel(GEMINI_MODELS[1])
+        # Контекст 1М+ токенов: часовой транскрипт влезает целиком
+        return model.generate_content(prompt).text
+
+
+class HttpBackend(LlmBackend):
+    """
+    Локальный сервер с OpenAI-совместимым /v1/chat/completions.
+    Опции: url, model, timeout (сек).
+    """
+    name = 'http'
+
+    def generate(self, prompt):
+        import urllib.request
+        body = json.dumps({
+            'model': self.options.get('model') or DEFAULT_LLM_MODEL,
+            'messages': [{'role': 'user', 'content': prompt}],
+            'temperature': 0.2,
+        }).encode('utf-8')
+        req = urllib.request.Request(self.options.get('url') or DEFAULT_LLM_URL, data=body,
+                                     headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(req, timeout=self.options.get('timeout') or LLM_TIMEOUT) as resp:
+            data = json.loads(resp.read().decode('utf-8'))
+        return data['choices'][0]['message']['content']
+
+
+# --- Эвристика без модели ---
+
+def words(text):
+    return re.findall(r"\w+", text.lower())
+
+
+def keyword_hits(text, extra=()):
+    """Слова-крючки, вопросы/восклицания и слова из описания видео"""
+    low = text.lower()
+    hits = sum(1 for w in words(text) if w.startswith(HOOK_STEMS) or w in extra)
+    hits += sum(low.count(stem) for stem in HOOK_STEMS if ' ' in stem)
+    return hits + text.count('?') + text.count('!') + len(re.findall(r"\d+", text))
+
+
+def zscores(values):
+    if len(values) < 2: return [0.0] * len(values)
+    mean = statistics.fmean(values)
+    std = statistics.pstdev(values)
+    return [(v - mean) / std if std else 0.0 for v in values]
+
+
+def phrase_scores(segments, track=None, extra=()):
+    """Оценка каждой фразы: темп речи + ключевые слова + громкость относительно всего видео"""
+    rate, keys, loud = [], [], []
+    for seg in segments:
+        n = len(words(seg['text']))
+        dur = max(0.3, seg['end'] - seg['start'])
+        rate.append(n / dur)
+        keys.append(keyword_hits(seg['text'], extra) / max(1, n) * 10)
+    if track is not None:
+        try:
+            loud = [track.loudness(seg['start'], seg['end']) for seg in segments]
+        except Exception:
+            loud = []  # звук не читается — только признаки текста
+    scores = [W_RATE * r + W_KEYWORDS * k for r, k in zip(zscores(rate), zscores(keys))]
+    if loud: scores = [s + W_LOUDNESS * z for s, z in zip(scores, zscores(loud))]
+    return scores
+
+
+def make_title(texts, extra=()):
+    """Заголовок из самой «цепляющей» фразы клипа: первые TITLE_WORDS слов"""
+    best = max(texts, key=lambda t: keyword_hits(t, extra) / max(1, len(words(t))))
+    head = re.findall(r"[\w'-]+", best)[:TITLE_WORDS]
+    if not head: return 'Интересный момент'
+    title = " ".join(head)
+    return title[0].upper() + title[1:]
+
+
+def pick_windows(segments, scores, count, min_d, max_d, target):
+    """
+    Окна из подряд идущих фраз длиной min_d..max_d с лучшей средней оценкой,
+    без пересечений. Префиксные суммы — каждое окно оценивается за O(1).
+    :return: [(i, j)] — индексы первой и последней фразы, по времени
+    """
+    n = len(segments)
+    pre_w, pre_d = [0.0], [0.0]
+    for seg, sc in zip(segments, scores):
+        d = max(0.0, seg['end'] - seg['start'])
+        pre_w.append(pre_w[-1] + sc * d)
+        pre_d.append(pre_d[-1] + d)
+
+    def pause(a, b):
+        return min(PAUSE_CAP_SEC, max(0.0, b - a)) / PAUSE_CAP_SEC
+
+    # Видео короче min_d — берем сколько есть
+    min_d = min(min_d, segments[-1]['end'] - segments[0]['start'])
+    candidates = []
+    for i in range(n):
+        before = pause(segments[i - 1]['end'], segments[i]['start']) if i else 1.0
+        for j in range(i, n):
+            span = segments[j]['end'] - segments[i]['start']
+            if span > max_d: break
+            if span < min_d: continue
+            after = pause(segments[j]['end'], segments[j + 1]['start']) if j + 1 < n else 1.0
+            speech = pre_d[j + 1] - pre_d[i]
+            mean = (pre_w[j + 1] - pre_w[i]) / speech if speech else 0.0
+            score = mean + W_PAUSE * (before + after) / 2 - W_TARGET * abs(span - target) / target
+            candidates.append((score, i, j))
+
+    chosen = []
+    for score, i, j in sorted(candidates, reverse=True):
+        if len(chosen) >= count: break
+        if any(i <= cj and ci <= j for ci, cj in chosen): continue
+        chosen.append((i, j))
+    return sorted(chosen)
+
+
+class LocalBackend(HighlightBackend):
+    """Эвристика по признакам транскрипта и громкости — без сети и моделей"""
+    name = 'local'
+    uses_audio = True
+
+    def select(self, segments, duration, settings, track=None, on_log=None):
+        segments = [seg for seg in segments if seg['text'].strip()]
+        if not segments: return []
+        _, lo, hi = target_quantity(duration / 60)
+        count = max(lo, min(hi, round(duration / 300)))
+        min_d = settings.get('min_duration', 60)
+        max_d = settings.get('max_duration', 180)
+        target = settings.get('target_duration') or (min_d + max_d) / 2
+        extra = {w for w in words(settings.get('ai_prompt') or '') if len(w) > 3}
+
+        if on_log: on_log("🧮 Локальная оценка фраз: темп, ключевые слова, громкость, паузы...")
+        scores = phrase_scores(segments, track, extra)
+        clips = []
+        for i, j in pick_windows(segments, scores, count, min_d, max_d, target):
+            start, end = segments[i]['start'], segments[j]['end']
+            if end - start < MIN_CLIP_SEC: continue
+            title = make_title([seg['text'] for seg in segments[i:j + 1]], extra)
+            clips.append({'start': start, 'end': end, 'title': title})
+        return clips
+
+
+BACKENDS = {b.name: b for b in (GeminiBackend, HttpBackend, LocalBackend)}
+
+
+def get_backend(name=None, **options):
+    return BACKENDS.get(name or DEFAULT_BACKEND, GeminiBackend)(**options)
@@ -0,0 +1,73 @@
+"""
+Журнал пакетной уникализации в папке результата (JSONL, строка на событие).
+По нему перезапуск пропускает готовые файлы и повторяет упавшие,
+а вкладка показывает историю по каждому файлу.
+"""
+import os
+import json
+import hashlib
+import threading
+import time
+from core.media_probe import file_key
+
+MANIFEST_NAME = "uniq_manifest.jsonl"
+# Настройки, не влияющие на результат (не входят в хэш)
+IGNORED_KEYS = ('out_dir', 'workers')
+
+DONE = 'done'
+FAILED = 'failed'
+RUNNING = 'running'
+STOPPED = 'stopped'
+
+
+def settings_hash(settings):
+    """Короткий хэш настроек: другие настройки — файл обрабатывается заново"""
+    data = {k: v for k, v in settings.items() if k not in IGNORED_KEYS}
+    raw = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:12]
+
+
+class JobManifest:
+    def __init__(self, out_dir):
+        self.path = os.path.join(out_dir, MANIFEST_NAME)
+        self.lock = threading.Lock()
+        self.records = []
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        self.records.append(json.loads(line))
+                    except ValueError:
+                        pass  # недописанная строка после аварийного завершения
+        except OSError:
+            pass
+
+    def record(self, path, shash, status, output=None, duration=None, error=None):
+        rec = {
+            'input': os.path.abspath(path), 'key': file_key(path) if os.path.exists(path) else None,
+            'settings': shash, 'status': status, 'output': output, 'duration': round(duration, 2) if duration is not None else None,
+            'error': error, 'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        with self.lock:
+            self.records.append(rec)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        return rec
+
+    def last(self, path):
+        """Последняя запись по файлу или None"""
+        key = os.path.abspath(path)
+        with self.lock:
+            return next((r for r in reversed(self.records) if r['input'] == key), None)
+
+    def is_done(self, path, shash):
+        """Готов с теми же настройками, исходник не менялся и результат на месте"""
+        rec = self.last(path)
+        if not os.path.exists(path): return False
+        return bool(rec and rec['status'] == DONE and rec['settings'] == shash and rec['key'] == file_key(path)
+                    and rec['output'] and os.path.exists(rec['output']))
+
+    def history(self, path):
+        key = os.path.abspath(path)
+        with self.lock:
+            return [r for r in self.records if r['input'] == key]
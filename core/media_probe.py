@@ -0,0 +1,124 @@
+import os
+import json
+import threading
+from utils.paths import get_cache_dir
+
+# Сколько записей держим в постоянном кэше (старые вытесняются первыми)
+MAX_ENTRIES = 5000
+
+_lock = threading.Lock()
+_cache = None
+
+
+def _cache_path():
+    return os.path.join(get_cache_dir(), "probe_cache.json")
+
+
+def _load_cache():
+    global _cache
+    if _cache is None:
+        try:
+            with open(_cache_path(), 'r', encoding='utf-8') as f:
+                _cache = json.load(f)
+        except:
+            _cache = {}
+    return _cache
+
+
+def _save_cache():
+    tmp = _cache_path() + ".tmp"
+    try:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(_cache, f, ensure_ascii=False)
+        os.replace(tmp, _cache_path())
+    except:
+        pass
+
+
+def file_key(path):
+    """Ключ кэша: абсолютный путь + размер + время изменения"""
+    st = os.stat(path)
+    return f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}"
+
+
+def _parse_rate(rate):
+    try:
+        num, den = rate.split('/')
+        return round(float(num) / float(den), 3) if float(den) else 0.0
+    except:
+        return 0.0
+
+
+def parse_ffprobe(data):
+    """Сводит JSON ffprobe (-show_streams -show_format) к плоскому словарю"""
+    fmt = data.get('format', {})
+    streams = data.get('streams', [])
+    v = next((s for s in streams if s.get('codec_type') == 'video'), None)
+    a = next((s for s in streams if s.get('codec_type') == 'audio'), None)
+
+    duration = float(fmt.get('duration') or 0)
+    if not duration:
+        duration = max([float(s.get('duration') or 0) for s in streams] or [0.0])
+
+    info = {
+        'duration': duration,
+        'format': fmt.get('format_name', ''),
+        'bit_rate': int(fmt.get('bit_rate') or 0),
+        'has_video': v is not None,
+        'has_audio': a is not None,
+        'width': 0, 'height': 0, 'fps': 0.0, 'video_codec': None, 'pix_fmt': None,
+        'audio_codec': None, 'sample_rate': 0, 'channels': 0, 'channel_layout': None,
+    }
+    if v:
+        info.update({
+            'width': int(v.get('width') or 0), 'height': int(v.get('height') or 0),
+            'fps': _parse_rate(v.get('avg_frame_rate', '')) or _parse_rate(v.get('r_frame_rate', '')),
+            'video_codec': v.get('codec_name'), 'pix_fmt': v.get('pix_fmt'),
+        })
+    if a:
+        info.update({
+            'audio_codec': a.get('codec_name'), 'sample_rate': int(a.get('sample_rate') or 0),
+            'channels': int(a.get('channels') or 0), 'channel_layout': a.get('channel_layout'),
+        })
+    return info
+
+
+def run_ffprobe(path):
+    from core import process_scheduler  # asyncio грузится при первой пробе, а не при старте
+    cmd = ["ffprobe", "-v", "error", "-print_format", "json", "-show_format", "-show_streams", path]
+    res = process_scheduler.run(cmd, process_scheduler.PROBE)
+    if res.returncode != 0: return None
+    return parse_ffprobe(json.loads(res.stdout.decode('utf-8', errors='ignore')))
+
+
+def probe_media(path):
+    """
+    Один вызов ffprobe на файл: длительность, fps, разрешение, аудио.
+    Результат кэшируется на диске по ключу путь+размер+mtime.
+    :return: словарь с данными или None, если файл не читается
+    """
+    try:
+        key = file_key(path)
+    except OSError:
+        return None
+
+    with _lock:
+        cached = _load_cache().get(key)
+    if cached is not None: return cached
+
+    try:
+        info = run_ffprobe(path)
+    except:
+        info = None
+    if info is None: return None
+
+    with _lock:
+        cache = _load_cache()
+        # Старые версии того же файла больше не нужны
+        prefix = key.rsplit('|', 2)[0] + '|'
+        for k in [k for k in cache if k.startswith(prefix)]: del cache[k]
+        cache[key] = info
+        while len(cache) > MAX_ENTRIES:
+            cache.pop(next(iter(cache)))
+        _save_cache()
+    return info
@@ -0,0 +1,283 @@
+"""
+Превью без повторного декодирования: кадр на отметке (файл, время) достается
+ffmpeg один раз и хранится в памяти, фильтры превью применяются к нему
+в процессе (Pillow/NumPy). Цепочка ffmpeg-фильтров разбирается и повторяется
+теми же операциями; неизвестный фильтр — один запуск ffmpeg на сыром кадре
+из кэша (через stdin), без чтения исходного видео.
+
+Готовые картинки тоже кэшируются (LRU), поэтому переключение настроек
+туда-обратно перерисовывается за миллисекунды.
+"""
+import io
+import math
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from core import process_scheduler
+from core.filter_graphs import simplify
+from core.media_probe import file_key
+
+# Кадры в исходном разрешении (4K RGB ~25 МБ), держим немного
+FRAME_CACHE_SIZE = 6
+RENDER_CACHE_SIZE = 24
+REELS_SIZE = (1080, 1920)
+# Фон Reels размывается в уменьшенном виде (boxblur=10:5 в полном кадре)
+BLUR_DOWNSCALE = 4
+BLUR_RADIUS = 10
+BLUR_PASSES = 5
+
+_lock = threading.Lock()
+_frames = OrderedDict()  # (ключ файла, время) -> PIL.Image RGB
+_renders = OrderedDict()  # (ключ кадра, цепочка, reels, blur) -> PIL.Image RGB
+
+
+def _recall(cache, key):
+    with _lock:
+        if key not in cache: return None
+        cache.move_to_end(key)
+        return cache[key]
+
+
+def _remember(cache, key, value, limit):
+    with _lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > limit: cache.popitem(last=False)
+    return value
+
+
+def clear():
+    with _lock:
+        _frames.clear()
+        _renders.clear()
+
+
+def seek_time(duration, ts):
+    """Отметка превью внутри ролика: короткое видео — середина вместо пустого кадра"""
+    if duration and ts >= duration: return duration / 2
+    return max(0.0, ts)
+
+
+def grab_frame(path, ts):
+    """
+    Кадр на отметке ts (PIL.Image RGB), ffmpeg — только при первом обращении.
+    -ss перед -i: быстрый переход к ключевому кадру и точное декодирование до отметки.
+    """
+    from PIL import Image
+    key = (file_key(path), round(ts, 3))
+    img = _recall(_frames, key)
+    if img is not None: return img
+
+    cmd = ["ffmpeg", "-v", "error", "-ss", f"{ts:.3f}", "-i", path, "-frames:v", "1",
+           "-f", "image2pipe", "-c:v", "bmp", "pipe:1"]
+    res = process_scheduler.run(cmd, process_scheduler.PREVIEW)
+    if res.returncode != 0 or not res.stdout:
+        raise RuntimeError(f"Не удалось получить кадр: {res.error_text()}")
+    img = Image.open(io.BytesIO(res.stdout)).convert('RGB')
+    return _remember(_frames, key, img, FRAME_CACHE_SIZE)
+
+
+# --- Разбор цепочки ffmpeg ---
+
+def _opts(args):
+    """'a=1:b=2' -> {'a': '1', 'b': '2'}; позиционные — под номерами"""
+    out = {}
+    for i, part in enumerate(args.split(':') if args else []):
+        if '=' in part:
+            k, v = part.split('=', 1)
+            out[k] = v
+        else:
+            out[i] = part
+    return out
+
+
+def _angle(expr):
+    """'PI/4', '0.8*PI/180', '0.3' -> радианы"""
+    m = re.fullmatch(r'(?:(-?[\d.]+)\*)?PI(?:/([\d.]+))?', expr.strip())
+    if not m: return float(expr)
+    return float(m.group(1) or 1) * math.pi / float(m.group(2) or 1)
+
+
+EQ_KEYS = ('contrast', 'brightness', 'saturation', 'gamma', 'gamma_r', 'gamma_g', 'gamma_b')
+# Порядок коэффициентов colorchannelmixer и значения по умолчанию
+MIXER_KEYS = ('rr', 'rg', 'rb', 'ra', 'gr', 'gg', 'gb', 'ga', 'br', 'bg', 'bb', 'ba')
+MIXER_DEFAULTS = {'rr': 1.0, 'gg': 1.0, 'bb': 1.0}
+
+
+def parse_chain(chain):
+    """
+    Список фильтров ffmpeg -> операции для apply_ops, или None, если есть
+    фильтр, который в процессе не повторить (тогда превью делает ffmpeg).
+    """
+    ops = []
+    for flt in simplify(chain):
+        name, _, args = flt.partition('=')
+        o = _opts(args)
+        try:
+            if name == 'eq':
+                if any(k not in EQ_KEYS for k in o): return None
+                ops.append(('eq', {k: float(v) for k, v in o.items()}))
+            elif name == 'hue':
+                if set(o) != {'s'}: return None
+                ops.append(('eq', {'saturation': float(o['s'])}))
+            elif name == 'colorchannelmixer':
+                vals = dict(MIXER_DEFAULTS)
+                for k, v in o.items():
+                    vals[MIXER_KEYS[k] if isinstance(k, int) else k] = float(v)
+                ops.append(('mixer', [[vals.get(a + b, 0.0) for b in 'rgb'] for a in 'rgb']))
+            elif name == 'boxblur':
+                ops.append(('blur', (float(o.get(0, o.get('luma_radius', 2))),
+                                     int(o.get(1, o.get('luma_power', 2))))))
+            elif name == 'noise':
+                ops.append(('noise', float(o.get('alls', 0))))
+            elif name == 'chromashift':
+                if any(k not in ('cbh', 'crh', 'cbv', 'crv') for k in o): return None
+                ops.append(('chromashift', {k: int(v) for k, v in o.items()}))
+            elif name == 'vignette':
+                ops.append(('vignette', _angle(o.get(0, o.get('angle', 'PI/5')))))
+            elif name == 'scale':
+                m = re.fullmatch(r'iw\*([\d.]+)', o.get(0, ''))
+                if not m or o.get(1) != '-1': return None
+                ops.append(('scale', float(m.group(1))))
+            elif name == 'rotate':
+                ops.append(('rotate', _angle(o.get(0, o.get('angle', '0')))))
+            elif name == 'fps':
+                pass  # на одном кадре не видно
+            else:
+                return None
+        except (ValueError, IndexError, KeyError):
+            return None
+    return ops
+
+
+# --- Операции над кадром ---
+
+def _eq(img, p):
+    """eq: гамма, контраст и яркость — таблицей на канал (img.point), насыщенность — смесью с серым"""
+    from PIL import ImageEnhance
+    g = p.get('gamma', 1.0)
+    contrast, brightness = p.get('contrast', 1.0), p.get('brightness', 0.0)
+    lut = []
+    for gc in (g * p.get('gamma_r', 1.0), g * p.get('gamma_g', 1.0), g * p.get('gamma_b', 1.0)):
+        for v in range(256):
+            x = (v / 255.0) ** (1.0 / gc)
+            x = (x - 0.5) * contrast + 0.5 + brightness
+            lut.append(int(min(1.0, max(0.0, x)) * 255 + 0.5))
+    if lut != list(range(256)) * 3: img = img.point(lut)
+    sat = p.get('saturation', 1.0)
+    if sat == 0: return img.convert('L').convert('RGB')
+    if sat != 1.0: img = ImageEnhance.Color(img).enhance(sat)
+    return img
+
+
+@lru_cache(maxsize=8)
+def _vignette_mask(size, angle):
+    # Как в ffmpeg: множитель cos(angle * d)^4, d — расстояние до центра, 1 — угол кадра
+    import numpy as np
+    from PIL import Image
+    w, h = size
+    x = np.arange(w, dtype=np.float32) - w / 2
+    y = np.arange(h, dtype=np.float32) - h / 2
+    d = np.sqrt(x[None, :] ** 2 + y[:, None] ** 2) / math.hypot(w / 2, h / 2)
+    k = np.cos(np.minimum(d * angle, math.pi / 2)) ** 4
+    return Image.fromarray((k * 255 + 0.5).astype(np.uint8), 'L').convert('RGB')
+
+
+@lru_cache(maxsize=4)
+def _noise(size, strength):
+    """Шум для превью (на одном кадре он все равно статичен) — генерируется один раз"""
+    from PIL import Image
+    return Image.effect_noise(size, strength / 2).convert('RGB')
+
+
+def _blur(img, radius, passes):
+    """
+    boxblur радиуса r в p проходов ~ гаусс с той же дисперсией.
+    Сильное размытие считается в уменьшенном кадре — на глаз то же, в разы быстрее.
+    """
+    from PIL import Image, ImageFilter
+    if passes <= 1: return img.filter(ImageFilter.BoxBlur(radius))
+    sigma = math.sqrt(passes * radius * (radius + 1) / 3)
+    k = max(1, int(sigma // 3))
+    if k == 1: return img.filter(ImageFilter.GaussianBlur(sigma))
+    small = img.resize((max(1, img.width // k), max(1, img.height // k)), Image.BILINEAR)
+    return small.filter(ImageFilter.GaussianBlur(sigma / k)).resize(img.size, Image.BILINEAR)
+
+
+def apply_ops(img, ops):
+    from PIL import Image, ImageChops, ImageFilter
+    for name, p in ops:
+        if name == 'eq':
+            img = _eq(img, p)
+        elif name == 'mixer':
+            img = img.convert('RGB', tuple(v for row in p for v in row + [0.0]))
+        elif name == 'blur':
+            img = _blur(img, *p)
+        elif name == 'noise':
+            img = ImageChops.add(img, _noise(img.size, p), 1.0, -128)
+        elif name == 'chromashift':
+            y, cb, cr = img.convert('YCbCr').split()
+            cb = ImageChops.offset(cb, p.get('cbh', 0), p.get('cbv', 0))
+            cr = ImageChops.offset(cr, p.get('crh', 0), p.get('crv', 0))
+            img = Image.merge('YCbCr', (y, cb, cr)).convert('RGB')
+        elif name == 'vignette':
+            img = ImageChops.multiply(img, _vignette_mask(img.size, p))
+        elif name == 'scale':
+            img = img.resize((max(1, round(img.width * p)), max(1, round(img.height * p))), Image.BILINEAR)
+        elif name == 'rotate':
+            # У ffmpeg положительный угол — по часовой стрелке, у Pillow — против
+            img = img.rotate(-math.degrees(p), resample=Image.BILINEAR, fillcolor=(0, 0, 0))
+    return img
+
+
+def ffmpeg_filter(img, chain):
+    """Запасной путь: цепочка ffmpeg над кадром из памяти (rawvideo через stdin)"""
+    from PIL import Image
+    cmd = ["ffmpeg", "-v", "error", "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{img.width}x{img.height}",
+           "-i", "pipe:0", "-vf", ",".join(simplify(chain)) or "null", "-frames:v", "1", "-f", "image2pipe",
+           "-c:v", "bmp", "pipe:1"]
+    res = process_scheduler.run(cmd, process_scheduler.PREVIEW, stdin_data=img.tobytes())
+    if res.returncode != 0 or not res.stdout:
+        raise RuntimeError(f"FFmpeg Error: {res.error_text()}")
+    return Image.open(io.BytesIO(res.stdout)).convert('RGB')
+
+
+def fit_reels(img, blur=True, size=REELS_SIZE):
+    """Кадр в 9:16: целиком по центру, фон — размытая копия или черный"""
+    from PIL import Image, ImageFilter, ImageOps
+    w, h = size
+    fg = ImageOps.contain(img, size, Image.BILINEAR)
+    if blur:
+        small = (w // BLUR_DOWNSCALE, h // BLUR_DOWNSCALE)
+        bg = ImageOps.fit(img, small, Image.BILINEAR)
+        for _ in range(BLUR_PASSES): bg = bg.filter(ImageFilter.BoxBlur(BLUR_RADIUS / BLUR_DOWNSCALE))
+        bg = bg.resize(size, Image.BILINEAR)
+    else:
+        bg = Image.new('RGB', size, (0, 0, 0))
+    bg.paste(fg, ((w - fg.width) // 2, (h - fg.height) // 2))
+    return bg
+
+
+def cover(path, ts, size):
+    """Кадр, заполняющий size с обрезкой по центру (scale=increase + crop)"""
+    from PIL import Image, ImageOps
+    key = (file_key(path), round(ts, 3), 'cover', size)
+    img = _recall(_renders, key)
+    if img is not None: return img
+    img = ImageOps.fit(grab_frame(path, ts), size, Image.BILINEAR)
+    return _remember(_renders, key, img, RENDER_CACHE_SIZE)
+
+
+def render(path, ts, chain=(), reels=False, blur=True):
+    """Превью: кадр из кэша + фильтры + формат. Результат тоже кэшируется"""
+    key = (file_key(path), round(ts, 3), tuple(chain), reels, blur)
+    img = _recall(_renders, key)
+    if img is not None: return img
+
+    img = grab_frame(path, ts)
+    if chain:
+        ops = parse_chain(chain)
+        img = apply_ops(img, ops) if ops is not None else ffmpeg_filter(img, chain)
+    if reels: img = fit_reels(img, blur)
+    return _remember(_renders, key, img, RENDER_CACHE_SIZE)
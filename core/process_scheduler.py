@@ -0,0 +1,227 @@
+"""
+Общий планировщик внешних процессов (ffmpeg, ffprobe) на asyncio.
+Цикл событий живет в фоновом потоке; воркеры отдают ему команды и ждут
+результат как раньше, а процессы из всех вкладок делят один лимит.
+
+Приоритеты: превью > быстрые пробы (ffprobe) > пакетный кодинг.
+Пакетный кодинг не занимает последние INTERACTIVE_RESERVE слотов —
+превью не ждет, пока закончится рендер.
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import subprocess
+import threading
+from collections import deque
+from core.ffmpeg_runner import startupinfo
+
+PREVIEW = 0
+PROBE = 1
+BATCH = 2
+
+# Всего процессов одновременно (ffmpeg сам многопоточный, больше ядер смысла нет)
+MAX_PROCS = max(4, os.cpu_count() or 4)
+INTERACTIVE_RESERVE = 1
+STDERR_TAIL_LINES = 40
+# Строка длиннее лимита StreamReader читается кусками
+CHUNK = 64 * 1024
+
+_lock = threading.Lock()
+_scheduler = None
+
+
+class ProcessJob:
+    """
+    Одна команда в планировщике.
+    on_stdout(line) / on_stderr(line) получают строки (bytes) по мере вывода
+    и вызываются из потока планировщика — там нельзя блокироваться.
+    Без on_stdout весь stdout собирается в self.stdout.
+    """
+
+    def __init__(self, cmd, priority=BATCH, timeout=None, stdin_data=None, on_stdout=None, on_stderr=None,
+                 tail_lines=STDERR_TAIL_LINES):
+        self.cmd = list(cmd)
+        self.priority = priority
+        self.timeout = timeout
+        self.stdin_data = stdin_data
+        self.on_stdout = on_stdout
+        self.on_stderr = on_stderr
+        self.stdout = b""
+        self.stderr_tail = deque(maxlen=tail_lines)
+        self.process = None
+        self.returncode = None
+        self.cancelled = False
+        self.timed_out = False
+        self.error = None
+        self.scheduler = None
+        self.done = threading.Event()
+
+    def cancel(self):
+        self.cancelled = True
+        if self.scheduler: self.scheduler.cancel(self)
+
+    def wait(self, timeout=None):
+        """Блокирует до завершения; код возврата или None (отменен/не запустился)"""
+        self.done.wait(timeout)
+        return self.returncode
+
+    def stderr_line(self, line):
+        self.stderr_tail.append(line.decode('utf-8', errors='ignore').rstrip())
+        if self.on_stderr: self.on_stderr(line)
+
+    def error_text(self):
+        return "\n".join(self.stderr_tail)
+
+
+class ProcessScheduler:
+    def __init__(self, max_procs=MAX_PROCS, interactive_reserve=INTERACTIVE_RESERVE):
+        self.max_procs = max_procs
+        self.reserve = interactive_reserve
+        self.queue = []  # (приоритет, номер, задача) — только из потока цикла
+        self.running = set()
+        self.counter = itertools.count()
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._serve, name="process-scheduler", daemon=True)
+        self.thread.start()
+
+    def _serve(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    # --- Интерфейс для обычных потоков ---
+
+    def submit(self, cmd, priority=BATCH, timeout=None, stdin_data=None, on_stdout=None, on_stderr=None):
+        job = ProcessJob(cmd, priority, timeout, stdin_data, on_stdout, on_stderr)
+        job.scheduler = self
+        self.loop.call_soon_threadsafe(self._enqueue, job)
+        return job
+
+    def run(self, cmd, priority=PROBE, timeout=None, stdin_data=None):
+        """Аналог subprocess.run(capture_output=True): ждет и возвращает задачу (returncode, stdout)"""
+        if threading.current_thread() is self.thread:
+            raise RuntimeError("Нельзя ждать процесс из потока планировщика")
+        job = self.submit(cmd, priority, timeout, stdin_data)
+        job.wait()
+        return job
+
+    def cancel(self, job):
+        self.loop.call_soon_threadsafe(self._cancel, job)
+
+    def shutdown(self):
+        def stop():
+            for job in list(self.running): self._kill(job)
+            for _, _, job in self.queue: self._finish(job)
+            self.queue.clear()
+            self.loop.stop()
+        self.loop.call_soon_threadsafe(stop)
+        self.thread.join(timeout=5)
+
+    # --- Внутри цикла событий ---
+
+    def _limit(self, priority):
+        if priority < BATCH: return self.max_procs
+        return max(1, self.max_procs - self.reserve)
+
+    def _enqueue(self, job):
+        if job.cancelled:
+            self._finish(job)
+            return
+        heapq.heappush(self.queue, (job.priority, next(self.counter), job))
+        self._dispatch()
+
+    def _dispatch(self):
+        # Очередь упорядочена по приоритету: если первый не влез в лимит, остальные тоже не влезут
+        while self.queue:
+            priority, _, job = self.queue[0]
+            if len(self.running) >= self._limit(priority): break
+            heapq.heappop(self.queue)
+            self.running.add(job)
+            self.loop.create_task(self._run(job))
+
+    def _cancel(self, job):
+        if job in self.running:
+            self._kill(job)
+        elif not job.done.is_set():
+            self.queue = [item for item in self.queue if item[2] is not job]
+            heapq.heapify(self.queue)
+            self._finish(job)
+
+    def _kill(self, job):
+        if job.process and job.process.returncode is None:
+            try:
+                job.process.kill()
+            except ProcessLookupError:
+                pass
+
+    def _finish(self, job):
+        job.done.set()
+
+    async def _run(self, job):
+        try:
+            stdin = subprocess.PIPE if job.stdin_data is not None else subprocess.DEVNULL
+            try:
+                job.process = await asyncio.create_subprocess_exec(
+                    *job.cmd, stdin=stdin, stdout=subprocess.PIPE, stderr=subprocess.PIPE, startupinfo=startupinfo())
+            except OSError as e:
+                job.error = str(e)
+                job.stderr_tail.append(str(e))
+                return
+            # cancel() мог прийти, пока процесс запускался
+            if job.cancelled: self._kill(job)
+
+            tasks = [self._read_stdout(job), self._read_lines(job.process.stderr, job.stderr_line)]
+            if job.stdin_data is not None: tasks.append(self._write_stdin(job))
+            try:
+                await asyncio.wait_for(asyncio.gather(*tasks), job.timeout)
+            except asyncio.TimeoutError:
+                job.timed_out = True
+                job.stderr_tail.append(f"Превышено время ожидания ({job.timeout} с)")
+                self._kill(job)
+            job.returncode = await job.process.wait()
+        finally:
+            self.running.discard(job)
+            self._finish(job)
+            self._dispatch()
+
+    async def _read_stdout(self, job):
+        if job.on_stdout is None:
+            job.stdout = await job.process.stdout.read()
+        else:
+            await self._read_lines(job.process.stdout, job.on_stdout)
+
+    async def _read_lines(self, stream, on_line):
+        while True:
+            try:
+                line = await stream.readline()
+            except ValueError:
+                line = await stream.read(CHUNK)
+            if not line: break
+            try:
+                on_line(line)
+            except Exception:
+                pass  # ошибка обработчика не должна останавливать чтение (иначе ffmpeg встанет на полной трубе)
+
+    async def _write_stdin(self, job):
+        try:
+            job.process.stdin.write(job.stdin_data)
+            await job.process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError, OSError):
+            pass
+        finally:
+            try:
+                job.process.stdin.close()
+            except OSError:
+                pass
+
+
+def get_scheduler():
+    """Один планировщик на процесс, создается при первом обращении"""
+    global _scheduler
+    with _lock:
+        if _scheduler is None: _scheduler = ProcessScheduler()
+        return _scheduler
+
+
+def run(cmd, priority=PROBE, timeout=None, stdin_data=None):
+    return get_scheduler().run(cmd, priority, timeout, stdin_data)
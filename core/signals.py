@@ -0,0 +1,60 @@
+"""
+Сигналы без Qt: тот же интерфейс connect/emit, что у pyqtSignal.
+Логика обработки живет в обычных классах и не тянет PyQt6 — ее можно
+запускать из CLI, пула процессов или тестов; QThread-воркеры только
+пробрасывают сигналы в интерфейс.
+"""
+import threading
+
+
+class BoundSignal:
+    def __init__(self):
+        self.slots = []
+        self.lock = threading.Lock()
+
+    def connect(self, slot):
+        with self.lock:
+            self.slots.append(slot)
+
+    def disconnect(self, slot=None):
+        with self.lock:
+            if slot is None: self.slots.clear()
+            elif slot in self.slots: self.slots.remove(slot)
+
+    def emit(self, *args):
+        with self.lock:
+            slots = list(self.slots)
+        for slot in slots:
+            slot(*args)
+
+
+class Signal:
+    """Объявляется на классе как pyqtSignal, у каждого экземпляра — свой список слотов"""
+
+    def __init__(self, *types):
+        self.types = types
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, owner=None):
+        if obj is None: return self
+        bound = obj.__dict__.get(self.name)
+        if bound is None:
+            bound = obj.__dict__.setdefault(self.name, BoundSignal())
+        return bound
+
+
+def signal_names(obj):
+    names = []
+    for cls in type(obj).__mro__:
+        for name, attr in vars(cls).items():
+            if isinstance(attr, Signal) and name not in names: names.append(name)
+    return names
+
+
+def connect_all(job, handler):
+    """Все сигналы задачи в один обработчик: handler(имя_сигнала, *аргументы)"""
+    for name in signal_names(job):
+        getattr(job, name).connect(lambda *args, _name=name: handler(_name, *args))
@@ -0,0 +1,97 @@
+"""
+Поиск тишины по огибающей громкости (NumPy, без запуска ffmpeg)
+и перевод пауз в отрезки, которые нужно оставить.
+Семантика как у silencedetect: пауза — участок тише db длиной от min_dur.
+
+Вырезание пауз в ffmpeg — select/aselect по выражению над списком отрезков,
+а не пара trim/atrim на каждый отрезок: граф из четырех фильтров при любом
+числе отрезков. Выражение — двоичное дерево if() по началам отрезков,
+на кадр вычисляется O(log n) сравнений. Время на выходе считается от часов
+исходника (минус сумма пауз до кадра), поэтому звук не уплывает от видео
+даже на тысячах склеек.
+"""
+
+
+def detect_silences(envelope_db, window, db, min_dur, start=0.0, end=None):
+    """
+    Паузы на отрезке [start, end) по готовой огибающей (dBFS на окно window сек).
+    Один проход по массиву, поэтому много запросов к одной огибающей — миллисекунды.
+    :return: (starts, ends) относительно start
+    """
+    import numpy as np
+    a = max(0, int(round(start / window)))
+    b = len(envelope_db) if end is None else min(len(envelope_db), int(round(end / window)))
+    if b <= a: return [], []
+    quiet = np.concatenate(([False], envelope_db[a:b] < db, [False]))
+    edges = np.diff(quiet.astype(np.int8))
+    run_starts = np.flatnonzero(edges == 1)
+    run_ends = np.flatnonzero(edges == -1)
+    long_enough = (run_ends - run_starts) * window >= min_dur
+    return (run_starts[long_enough] * window).tolist(), (run_ends[long_enough] * window).tolist()
+
+
+def silence_intervals(starts, ends, duration):
+    """Паузы парами (начало, конец); незакрытая пауза длится до конца файла"""
+    return [(max(0.0, st), ends[i] if i < len(ends) else duration) for i, st in enumerate(starts)]
+
+
+def keep_ranges(starts, ends, duration):
+    """
+    Отрезки между паузами, которые нужно оставить.
+    :return: список (начало, конец) или None, если пауз нет
+    """
+    if not starts: return None
+    keep = []
+    curr = 0.0
+    for i in range(len(starts)):
+        if starts[i] > curr: keep.append((curr, starts[i]))
+        curr = ends[i] if i < len(ends) else duration
+    if curr < duration: keep.append((curr, duration))
+    return keep
+
+
+# Кадр звука при выборе: 256 сэмплов (~5 мс) — столько максимум теряется на границе отрезка
+CUT_AUDIO_FRAME = 256
+# Расхождение звука с метками времени, после которого aresample добивает тишиной/обрезает
+CUT_AUDIO_SYNC = 0.01
+
+
+def _tree(starts, leaves, var, lo, hi):
+    if hi - lo == 1: return leaves[lo]
+    mid = (lo + hi) // 2
+    return (f"if(lt({var},{starts[mid]:.3f}),{_tree(starts, leaves, var, lo, mid)},"
+            f"{_tree(starts, leaves, var, mid, hi)})")
+
+
+def select_expr(keep, var='t'):
+    """Выражение: 1, если время var внутри одного из отрезков keep [начало, конец)"""
+    starts = [st for st, _ in keep]
+    leaves = [f"gte({var},{st:.3f})*lt({var},{en:.3f})" for st, en in keep]
+    return _tree(starts, leaves, var, 0, len(keep))
+
+
+def offset_expr(keep, var='T'):
+    """
+    Выражение: сколько секунд пауз вырезано к времени var. Время внутри паузы
+    стягивается в конец предыдущего отрезка — иначе конец потока (он тоже
+    проходит через setpts) оказался бы позже последнего кадра.
+    """
+    starts, leaves, kept = [], [], 0.0
+    for st, en in keep:
+        starts.append(st)
+        kept += en - st
+        leaves.append(f"max({st - (kept - (en - st)):.3f},{var}-{kept:.3f})")
+    return _tree(starts, leaves, var, 0, len(keep))
+
+
+def cut_filters(keep, audio=False, fps=None):
+    """
+    Цепочка ffmpeg, которая оставляет только отрезки keep (время на выходе без пауз).
+    :param fps: частота кадров исходника — после select ffmpeg ее не знает и ставит 25
+    """
+    if audio:
+        return [f"asetnsamples=n={CUT_AUDIO_FRAME}:p=0", f"aselect='{select_expr(keep)}'",
+                f"asetpts='PTS-({offset_expr(keep)})/TB'", f"aresample=async=1:min_hard_comp={CUT_AUDIO_SYNC}"]
+    chain = [f"select='{select_expr(keep)}'", f"setpts='PTS-({offset_expr(keep)})/TB'"]
+    if fps: chain.append(f"fps={fps}")
+    return chain
@@ -0,0 +1,93 @@
+"""
+Пакетная нарезка: один проход декодирования пишет сразу несколько клипов.
+Источник декодируется один раз, общая часть графа (например, размытый фон)
+считается один раз, затем split/trim раздают кадры по выходам.
+"""
+import os
+from core.filter_graphs import FilterGraph, stream
+
+# Бюджет памяти на один пакетный проход и оценка на один выход
+# (libx264 1080x1920: lookahead + опорные кадры + буферы фильтров)
+DEFAULT_MEMORY_BUDGET_MB = 1500
+ENCODER_MEMORY_MB = 150
+# Если между клипами больше этого разрыва — выгоднее начать новый проход,
+# чем декодировать ненужный кусок
+MAX_GAP_SEC = 60
+
+
+def max_outputs_for_budget(budget_mb=DEFAULT_MEMORY_BUDGET_MB, per_output_mb=ENCODER_MEMORY_MB):
+    return max(1, int(budget_mb // per_output_mb))
+
+
+def plan_batches(segments, max_outputs, max_gap=MAX_GAP_SEC):
+    """
+    Группирует сегменты в проходы.
+    :param segments: список (start, end) в секундах исходника
+    :return: список групп индексов сегментов, отсортированных по началу
+    """
+    order = sorted(range(len(segments)), key=lambda k: segments[k][0])
+    batches = []
+    cur, cur_end = [], None
+    for k in order:
+        st, en = segments[k]
+        if cur and (len(cur) >= max_outputs or st - cur_end > max_gap):
+            batches.append(cur)
+            cur, cur_end = [], None
+        cur.append(k)
+        cur_end = en if cur_end is None else max(cur_end, en)
+    if cur: batches.append(cur)
+    return batches
+
+
+def title_inputs(images, tmp_dir):
+    """
+    Входы ffmpeg для картинок заголовков (PIL RGBA).
+    Первая идет сырым RGBA через stdin без записи на диск, остальные —
+    PNG в уникальной папке задания (stdin у процесса один).
+    :return: (аргументы ffmpeg, байты для stdin или None)
+    """
+    args, data = [], None
+    for k, img in enumerate(images):
+        if data is None:
+            args += ["-f", "rawvideo", "-pix_fmt", "rgba", "-s", f"{img.width}x{img.height}", "-i", "pipe:0"]
+            data = img.tobytes("raw", "RGBA")
+        else:
+            png = os.path.join(tmp_dir, f"title_{k}.png")
+            img.save(png, "PNG", compress_level=1)
+            args += ["-i", png]
+    return args, data
+
+
+def build_batch_graph(ranges, base_graph=None, overlays=None, has_audio=True):
+    """
+    Строит filter_complex на несколько выходов.
+    :param ranges: [(start, end)] относительно начала входа 0
+    :param base_graph: общая часть графа — функция (граф, метка входа) -> метка результата (или None)
+    :param overlays: для каждого выхода (индекс_входа, x, y) или None
+    :return: (filter_complex, [(видео_метка, аудио_метка)])
+    """
+    n = len(ranges)
+    overlays = overlays or [None] * n
+    g = FilterGraph()
+
+    src = base_graph(g, stream(0)) if base_graph else stream(0)
+    branches = g.split(src, [f"b{k}" for k in range(n)]) if n > 1 else [src]
+    if has_audio:
+        a_branches = g.split(stream(0, 'a'), [f"ab{k}" for k in range(n)]) if n > 1 else [stream(0, 'a')]
+
+    outputs = []
+    for k, (st, en) in enumerate(ranges):
+        trim = [f"trim=start={st:.3f}:end={en:.3f}", "setpts=PTS-STARTPTS"]
+        if overlays[k]:
+            idx, x, y = overlays[k]
+            v = g.chain(branches[k], trim, f"t{k}")
+            v = g.node([v, stream(idx)], f"overlay={x}:{y}", [f"v{k}"])[0]
+        else:
+            v = g.chain(branches[k], trim, f"v{k}")
+        a = None
+        if has_audio:
+            a = g.chain(a_branches[k], [f"atrim=start={st:.3f}:end={en:.3f}", "asetpts=PTS-STARTPTS"], f"a{k}")
+        outputs.append((v, a))
+
+    fc = g.render(*[p for pair in outputs for p in pair])
+    return fc, [(v.map_arg, a.map_arg if a else None) for v, a in outputs]
@@ -0,0 +1,207 @@
+import os
+import re
+import textwrap
+import shutil
+import tempfile
+from core.signals import Signal
+from core.ffmpeg_runner import FFmpegRunner, format_eta
+from core.media_probe import probe_media
+from core import encoders, preview_cache
+from core.slice_batch import (DEFAULT_MEMORY_BUDGET_MB, max_outputs_for_budget, plan_batches,
+                              build_batch_graph, title_inputs)
+from utils.text_generator import TextGenerator
+
+# Настройки по умолчанию — как на вкладке нарезки (для CLI и скриптов)
+DEFAULT_SETTINGS = {
+    'font': "", 'color': "#FFD700", 'size': 75, 'caps': True,
+    'y': 100, 'h': 200, 'static_text': "",
+}
+# Отметка кадра превью, сек
+PREVIEW_TIME = 10
+
+
+class Slicer:
+    """Нарезка по TXT-разметке без Qt; в интерфейсе — SlicerWorker"""
+    log_signal = Signal(str)
+    progress_signal = Signal(int)
+    finished_signal = Signal()
+    result_signal = Signal(str)
+    status_signal = Signal(str)
+
+    def __init__(self, settings, preview=False):
+        self.s = settings
+        self.preview = preview
+        self.is_running = True
+        self.current_process = None
+
+        self.font = self.s.get('font', '') or "arialbd.ttf"
+        self.text_gen = TextGenerator()
+        # Кодировщик по калибровке машины ('auto' — самый быстрый с нужным качеством)
+        self.codec = encoders.resolve(self.s.get('codec', 'auto'))[0]
+        self.video_args = encoders.encoder_args(self.codec, crf=23)
+
+    def parse_time(self, time_str):
+        parts = time_str.strip().split(':')
+        try:
+            if len(parts) == 4:
+                h, m, s, f = map(int, parts); return h * 3600 + m * 60 + s
+            elif len(parts) == 3:
+                h, m, s = map(int, parts); return h * 3600 + m * 60 + s
+        except:
+            pass
+        return 0
+
+    def prepare_text(self, text):
+        if self.s['caps']: text = text.upper()
+        text = text.replace(":", "\:").replace("'", "").replace("%", "\\%")
+        return textwrap.fill(text, width=20)
+
+    def get_drawtext_filter(self, text):
+        font = self.s['font']
+        if not font or not os.path.exists(font):
+            font = "C\:/Windows/Fonts/arialbd.ttf"
+        else:
+            font = font.replace("\\", "/").replace(":", "\\:")
+
+        col = self.s['color'].replace("#", "0x")
+        size = self.s['size']
+        y_top = self.s['y']
+        h_zone = self.s['h']
+
+        return (f"drawtext=fontfile='{font}':text='{text}':"
+                f"fontcolor={col}:fontsize={size}:"
+                f"x=(w-text_w)/2:y={y_top}+({h_zone}-text_h)/2:"
+                f"borderw=3:bordercolor=black:shadowx=2:shadowy=2")
+
+    def run(self):
+        # --- ПРЕВЬЮ ---
+        if self.preview:
+            try:
+                # Один файл превью на все клики (как temp_preview.jpg уникализации), кадр — из кэша в памяти
+                out_preview = os.path.abspath("slice_preview.jpg")
+
+                txt = self.s['static_text'] if self.s['static_text'] else "ТЕСТОВЫЙ ЗАГОЛОВОК"
+
+                # 1. Кадр из кэша превью (ffmpeg — один раз на видео)
+                info = probe_media(self.s['video'])
+                ts = preview_cache.seek_time(info['duration'] if info else None, PREVIEW_TIME)
+                frame = preview_cache.grab_frame(self.s['video'], ts).copy()
+
+                # 2. Картинка текста в памяти поверх кадра
+                img, x, y = self.render_header(txt)
+                frame.paste(img, (x, y), img)
+                frame.save(out_preview, quality=90)
+                self.result_signal.emit(out_preview)
+
+            except Exception as e:
+                self.log_signal.emit(f"❌ Ошибка превью: {e}")
+
+            self.finished_signal.emit()
+            return
+
+        # --- НАРЕЗКА (ОСНОВНОЙ ПРОЦЕСС) ---
+        os.makedirs(self.s['out'], exist_ok=True)
+        self.codec = encoders.ensure_calibrated(self.s.get('codec', 'auto'), self.log_signal.emit)[0]
+        self.video_args = encoders.encoder_args(self.codec, crf=23)
+        segments = []
+        try:
+            with open(self.s['txt'], 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+            for line in lines:
+                match = re.match(r'([\d:]+)-([\d:]+)\s*\|\s*(.+)', line.strip())
+                if match:
+                    start, end, txt = match.groups()
+                    s_sec = self.parse_time(start);
+                    e_sec = self.parse_time(end)
+                    if e_sec > s_sec: segments.append((s_sec, e_sec, txt.strip()))
+        except Exception as e:
+            self.log_signal.emit(f"Ошибка TXT: {e}"); self.finished_signal.emit(); return
+
+        total = len(segments)
+        self.log_signal.emit(f"Найдено сегментов: {total}")
+
+        # Заголовки пакета, кроме первого (он идет через stdin), — в отдельной папке задания
+        tmp_dir = tempfile.mkdtemp(prefix="slicer_")
+        try:
+            max_out = max_outputs_for_budget(self.s.get('memory_budget_mb', DEFAULT_MEMORY_BUDGET_MB))
+            max_out = min(max_out, encoders.max_sessions(self.codec))
+            if self.s.get('batch_slicing', True) and max_out > 1 and total > 1:
+                batches = plan_batches([(st, en) for st, en, _ in segments], max_out)
+                self.log_signal.emit(f"⚡ Пакетная нарезка: {len(batches)} проход(ов) декодирования")
+                done = 0
+                for batch in batches:
+                    if not self.is_running: break
+                    self.slice_batch(segments, batch, tmp_dir, done, total)
+                    done += len(batch)
+                    self.progress_signal.emit(int((done / total) * 100))
+            else:
+                for i in range(total):
+                    if not self.is_running: break
+                    self.slice_batch(segments, [i], tmp_dir, i, total)
+                    self.progress_signal.emit(int(((i + 1) / total) * 100))
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        self.finished_signal.emit()
+
+    def render_header(self, text):
+        """Заголовок в памяти, обрезанный по тексту: (RGBA картинка, x, y)"""
+        return self.text_gen.render_header(
+            text,
+            font_source=self.font,
+            max_font_size=self.s['size'],
+            text_color=self.s['color'],
+            y_top_limit=self.s['y'],
+            y_bottom_limit=self.s['y'] + self.s['h']
+        )
+
+    def slice_batch(self, segments, batch, tmp_dir, done, total):
+        """Один проход ffmpeg: декодирует исходник один раз и пишет все клипы пакета"""
+        b_start = min(segments[k][0] for k in batch)
+        b_end = max(segments[k][1] for k in batch)
+
+        cmd = ["ffmpeg", "-y", "-ss", str(b_start), "-t", str(b_end - b_start), "-i", self.s['video']]
+        ranges, overlays, outputs, titles = [], [], [], []
+        for n, k in enumerate(batch):
+            start, end, raw_text = segments[k]
+            safe_name = re.sub(r'[\\/*?:"<>|]', "", raw_text)[:50]
+            outputs.append(os.path.join(self.s['out'], f"{k + 1:02d}_{safe_name}.mp4"))
+            self.log_signal.emit(f"✂️ [{k + 1}/{total}] {safe_name}")
+
+            # Текст: либо общий из настроек, либо из файла
+            header_text = self.s['static_text'] if self.s['static_text'] else raw_text
+            img, x, y = self.render_header(header_text)
+            titles.append(img)
+            ranges.append((start - b_start, end - b_start))
+            overlays.append((n + 1, x, y))
+
+        title_args, title_data = title_inputs(titles, tmp_dir)
+        cmd += title_args
+
+        info = probe_media(self.s['video'])
+        has_audio = bool(info and info['has_audio'])
+        fc, labels = build_batch_graph(ranges, overlays=overlays, has_audio=has_audio)
+        cmd += ["-filter_complex", fc]
+        for (v_label, a_label), out_path in zip(labels, outputs):
+            cmd += ["-map", v_label]
+            if a_label: cmd += ["-map", a_label]
+            cmd += [*self.video_args, "-c:a", "aac", out_path]
+
+        n = len(batch)
+
+        def on_progress(fraction, speed, eta):
+            self.progress_signal.emit(int(((done + (fraction or 0) * n) / total) * 100))
+            if speed: self.status_signal.emit(f"[{done + 1}-{done + n}/{total}] {speed:.1f}x • ETA {format_eta(eta)}")
+
+        self.current_process = FFmpegRunner(cmd, duration=b_end - b_start, on_progress=on_progress,
+                                            stdin_data=title_data)
+        if not self.is_running: return
+        self.current_process.run()
+
+        if self.current_process.returncode != 0 and self.is_running:
+            self.log_signal.emit(f"⚠️ Ошибка: {self.current_process.error_text()}")
+        self.current_process = None
+
+    def stop(self):
+        self.is_running = False
+        if self.current_process: self.current_process.kill()
\ No newline at end of file
@@ -0,0 +1,179 @@
+"""
+Нарезка без перекодирования. Если исходник уже в целевом кадре (9:16 1080x1920)
+и на клип ничего не накладывается, видео между ключевыми кадрами копируется
+как есть (-c copy), а перекодируются только неполные GOP на границах клипа.
+Куски пишутся в MPEG-TS (параметры кодека в потоке) и склеиваются
+concat-демуксером; звук берется из исходника по точным границам.
+
+В mp4 после склейки один avcC/hvcC — от первого куска, поэтому граничные
+куски кодируются с профилем, уровнем и числом опорных кадров исходника,
+а после кодирования их параметры сверяются с исходником: если не совпали,
+клип уходит в полный рендер.
+"""
+import os
+import json
+import threading
+from collections import OrderedDict
+from core import encoders, process_scheduler
+from core.media_probe import file_key
+
+TARGET_SIZE = (1080, 1920)
+# Кодировщик для граничных кусков — того же формата, что исходник
+SMART_ENCODERS = {'h264': 'libx264', 'hevc': 'libx265'}
+BOUNDARY_CRF = 18
+BOUNDARY_PRESET = 'veryfast'
+# Сдвиг при переходе к ключевому кадру: округление времени не должно уводить на предыдущий
+SEEK_EPS = 0.001
+KEYFRAME_CACHE_SIZE = 16
+# Профиль ffprobe -> профиль кодировщика (остальные профили не копируем)
+PROFILES = {
+    'h264': {'Constrained Baseline': 'baseline', 'Baseline': 'baseline', 'Main': 'main', 'High': 'high'},
+    'hevc': {'Main': 'main'},
+}
+# Поля потока, которые должны совпасть у всех кусков
+STREAM_FIELDS = ('codec_name', 'profile', 'level', 'pix_fmt', 'width', 'height')
+
+_lock = threading.Lock()
+_keyframes = OrderedDict()  # ключ файла -> [секунды ключевых кадров]
+
+
+def can_copy(info, settings, size=TARGET_SIZE):
+    """Клип можно не перекодировать: без текста и тишины, исходник уже нужного размера и формата"""
+    if not info or not info.get('has_video'): return False
+    if not settings.get('no_text_render') or settings.get('silence_cut'): return False
+    if (info['width'], info['height']) != tuple(size): return False
+    codec = info.get('video_codec')
+    if codec not in SMART_ENCODERS or info.get('pix_fmt') not in (None, 'yuv420p', 'yuvj420p'): return False
+    return SMART_ENCODERS[codec] in encoders.list_encoders()
+
+
+def parse_keyframes(text):
+    """CSV ffprobe (pts_time,flags) -> отсортированные времена пакетов с флагом K"""
+    times = set()
+    for line in text.splitlines():
+        parts = line.strip().split(',')
+        if len(parts) < 2 or 'K' not in parts[1]: continue
+        try:
+            times.add(float(parts[0]))
+        except ValueError:
+            pass
+    return sorted(times)
+
+
+def keyframes(path):
+    """Ключевые кадры видео (только чтение пакетов, без декодирования), с кэшем на файл"""
+    key = file_key(path)
+    with _lock:
+        if key in _keyframes:
+            _keyframes.move_to_end(key)
+            return _keyframes[key]
+    cmd = ["ffprobe", "-v", "error", "-select_streams", "v:0", "-show_entries", "packet=pts_time,flags",
+           "-of", "csv=p=0", path]
+    res = process_scheduler.run(cmd, process_scheduler.PROBE)
+    times = parse_keyframes(res.stdout.decode('utf-8', errors='ignore')) if res.returncode == 0 else []
+    with _lock:
+        _keyframes[key] = times
+        while len(_keyframes) > KEYFRAME_CACHE_SIZE: _keyframes.popitem(last=False)
+    return times
+
+
+def plan(start, end, keys, min_piece=0.0):
+    """
+    Куски клипа [start, end): ('encode', s, e) — граница до/после ключевого кадра,
+    ('copy', k1, k2) — середина между ключевыми кадрами.
+    Граничный кусок короче min_piece (меньше кадра) пропускается.
+    """
+    inside = [k for k in keys if start <= k <= end]
+    if len(inside) < 2: return [('encode', start, end)]
+    k1, k2 = inside[0], inside[-1]
+    pieces = []
+    if k1 - start > min_piece: pieces.append(('encode', start, k1))
+    pieces.append(('copy', k1, k2))
+    if end - k2 > min_piece: pieces.append(('encode', k2, end))
+    return pieces
+
+
+def stream_params(path):
+    """Параметры первого видеопотока (профиль, уровень, опорные кадры) или None"""
+    cmd = ["ffprobe", "-v", "error", "-select_streams", "v:0", "-show_entries",
+           "stream=" + ",".join(STREAM_FIELDS + ('refs',)), "-of", "json", path]
+    res = process_scheduler.run(cmd, process_scheduler.PROBE)
+    if res.returncode != 0: return None
+    try:
+        streams = json.loads(res.stdout.decode('utf-8', errors='ignore')).get('streams') or []
+    except ValueError:
+        return None
+    return streams[0] if streams else None
+
+
+def _level(params):
+    """Уровень для кодировщика: h264 42 -> 4.2, hevc 123 (уровень*30) -> 4.1"""
+    level = int(params.get('level') or 0)
+    if level <= 0: return None
+    if params['codec_name'] == 'hevc': level = round(level / 3)
+    return f"{level // 10}.{level % 10}"
+
+
+def encodable(params):
+    """Граничные куски можно закодировать с теми же профилем и уровнем"""
+    if not params: return False
+    profile = PROFILES.get(params.get('codec_name'), {}).get(params.get('profile'))
+    return profile is not None and _level(params) is not None
+
+
+def compatible(src, piece):
+    """Закодированный кусок совпадает с исходником по параметрам потока"""
+    if not src or not piece: return False
+    for field in STREAM_FIELDS:
+        a, b = src.get(field), piece.get(field)
+        if field == 'profile':
+            table = PROFILES.get(src.get('codec_name'), {})
+            a, b = table.get(a), table.get(b)
+        if a != b: return False
+    return True
+
+
+def boundary_args(info, params):
+    """Кодировщик граничных кусков с профилем/уровнем/опорными кадрами исходника (params из stream_params)"""
+    codec = SMART_ENCODERS[info['video_codec']]
+    profile = PROFILES[params['codec_name']][params['profile']]
+    args = ["-c:v", codec, "-preset", BOUNDARY_PRESET, "-crf", str(BOUNDARY_CRF), "-profile:v", profile,
+            "-pix_fmt", params.get('pix_fmt') or info.get('pix_fmt') or 'yuv420p']
+    refs = int(params.get('refs') or 0)
+    if codec == 'libx265':
+        x265 = [f"level-idc={_level(params)}", "high-tier=0"]
+        if refs: x265.append(f"ref={min(refs, 16)}")
+        return args + ["-x265-params", ":".join(x265)]
+    args += ["-level:v", _level(params)]
+    if refs: args += ["-refs", str(refs)]
+    return args
+
+
+def piece_cmd(src, kind, s, e, dst, info, params=None):
+    """Команда ffmpeg для одного куска (только видео, MPEG-TS); params нужны для кодируемых кусков"""
+    if kind == 'copy':
+        # От ключевого кадра k1 до кадра перед k2
+        return ["ffmpeg", "-y", "-ss", f"{s + SEEK_EPS:.6f}", "-i", src, "-t", f"{e - s - SEEK_EPS:.6f}",
+                "-map", "0:v:0", "-an", "-c:v", "copy", "-avoid_negative_ts", "make_zero", "-f", "mpegts", dst]
+    return ["ffmpeg", "-y", "-ss", f"{s:.6f}", "-i", src, "-t", f"{e - s:.6f}", "-map", "0:v:0", "-an",
+            *boundary_args(info, params), "-f", "mpegts", dst]
+
+
+def write_concat_list(paths, list_path):
+    with open(list_path, 'w', encoding='utf-8') as f:
+        for p in paths:
+            f.write("file '" + os.path.abspath(p).replace("'", "'\\''") + "'\n")
+    return list_path
+
+
+def concat_cmd(list_path, src, start, end, dst, info):
+    """Склейка кусков видео + звук исходника по точным границам клипа"""
+    cmd = ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", list_path]
+    if info.get('has_audio'):
+        cmd += ["-ss", f"{start:.6f}", "-t", f"{end - start:.6f}", "-i", src]
+    cmd += ["-map", "0:v:0"]
+    if info.get('has_audio'): cmd += ["-map", "1:a:0", "-c:a", "aac"]
+    cmd += ["-c:v", "copy"]
+    if info['video_codec'] == 'hevc': cmd += ["-tag:v", "hvc1"]
+    cmd += ["-t", f"{end - start:.6f}", "-movflags", "+faststart", dst]
+    return cmd
@@ -0,0 +1,81 @@
+"""
+Глобальный кэш транскрипций, адресуемый содержимым.
+Ключ: размер + хэш нескольких кусков файла + модель + язык + движок,
+поэтому кэш не зависит ни от пути к видео, ни от папки вывода.
+"""
+import os
+import json
+import hashlib
+from utils.paths import get_cache_dir
+
+# Объем кусков для частичного хэша (начало, середина, конец)
+CHUNK_BYTES = 4 * 1024 * 1024
+# Предел размера кэша на диске; старые записи (по времени обращения) удаляются
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+
+
+def content_hash(path):
+    """Быстрый хэш содержимого: размер + три куска по CHUNK_BYTES"""
+    size = os.path.getsize(path)
+    h = hashlib.sha1(str(size).encode())
+    with open(path, 'rb') as f:
+        for offset in sorted({0, max(0, size // 2 - CHUNK_BYTES // 2), max(0, size - CHUNK_BYTES)}):
+            f.seek(offset)
+            h.update(f.read(CHUNK_BYTES))
+    return h.hexdigest()
+
+
+def cache_key(path, model_name, language=None, backend='openai'):
+    raw = f"{content_hash(path)}|{model_name}|{language or 'auto'}|{backend}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _entry_path(key):
+    return os.path.join(get_cache_dir("transcripts"), f"{key}.json")
+
+
+def load(key):
+    """Сегменты из кэша или None"""
+    path = _entry_path(key)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            segments = json.load(f)
+        os.utime(path)  # отметка для LRU-вытеснения
+        return segments
+    except (OSError, ValueError):
+        return None
+
+
+def save(key, segments, max_bytes=MAX_CACHE_BYTES):
+    path = _entry_path(key)
+    tmp = path + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(segments, f, ensure_ascii=False)
+    os.replace(tmp, path)
+    evict(max_bytes)
+
+
+def invalidate(key):
+    try:
+        os.remove(_entry_path(key))
+        return True
+    except OSError:
+        return False
+
+
+def evict(max_bytes=MAX_CACHE_BYTES):
+    """Удаляет самые давние записи, пока кэш больше max_bytes"""
+    folder = get_cache_dir("transcripts")
+    entries = []
+    for name in os.listdir(folder):
+        if not name.endswith(".json"): continue
+        st = os.stat(os.path.join(folder, name))
+        entries.append((st.st_mtime, st.st_size, name))
+    total = sum(size for _, size, _ in entries)
+    for _, size, name in sorted(entries):
+        if total <= max_bytes: break
+        try:
+            os.remove(os.path.join(folder, name))
+            total -= size
+        except OSError:
+            pass
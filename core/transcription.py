@@ -0,0 +1,276 @@
+"""
+Транскрибация: сменные движки (openai-whisper, faster-whisper) и реестр
+загруженных моделей. Модели живут в процессе между анализами и вытесняются
+по LRU, когда суммарный объем превышает бюджет памяти.
+"""
+import gc
+import importlib.util
+import os
+import subprocess
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from core.ffmpeg_runner import startupinfo
+
+# Примерный объем модели openai-whisper (fp32) в памяти, МБ
+MODEL_MEMORY_MB = {
+    'tiny': 400, 'base': 500, 'small': 1000, 'medium': 2600,
+    'large': 5200, 'large-v2': 5200, 'large-v3': 5200, 'turbo': 3000,
+}
+DEFAULT_MEMORY_BUDGET_MB = 6000
+DEFAULT_BACKEND = 'openai'
+# Целевая длина куска при параллельной транскрибации, сек
+CHUNK_TARGET_SEC = 300
+
+_lock = threading.Lock()
+_models = OrderedDict()  # (движок, модель, устройство, опции) -> (модель, МБ)
+_loading = {}  # ключ -> МБ моделей, которые сейчас загружаются (уже в бюджете)
+_key_locks = {}
+_device = None
+
+
+def detect_device():
+    """cuda, если есть видеокарта NVIDIA (проверка один раз за сеанс)"""
+    global _device
+    if _device is None:
+        try:
+            ok = subprocess.run(["nvidia-smi"], capture_output=True, startupinfo=startupinfo()).returncode == 0
+        except OSError:
+            ok = False
+        _device = "cuda" if ok else "cpu"
+    return _device
+
+
+class TranscriptionBackend:
+    """
+    Интерфейс движка транскрибации.
+    Движок загружает модель и возвращает сегменты в схеме whisper_raw.json:
+    {'id', 'start', 'end', 'text'}.
+    """
+    name = ''
+    module = ''
+
+    def __init__(self, **options):
+        self.options = options
+
+    def available(self):
+        return importlib.util.find_spec(self.module) is not None
+
+    def load_options(self, device):
+        """Опции, от которых зависит загруженная модель (часть ключа реестра)"""
+        return ()
+
+    def memory_mb(self, model_name):
+        return MODEL_MEMORY_MB.get(model_name, 3000)
+
+    def load(self, model_name, device):
+        raise NotImplementedError
+
+    def run(self, model, audio, language):
+        """Сырые сегменты: итерируемое (start, end, text)"""
+        raise NotImplementedError
+
+    def transcribe(self, audio, model_name, language=None, device=None, on_log=None):
+        """
+        :param audio: путь к файлу или float32 массив 16 кГц моно
+        """
+        device = device or detect_device()
+        model = get_model(self, model_name, device, on_log=on_log)
+        return [{'id': i, 'start': st, 'end': en, 'text': text.strip()}
+                for i, (st, en, text) in enumerate(self.run(model, audio, language))]
+
+
+class OpenAIWhisperBackend(TranscriptionBackend):
+    name = 'openai'
+    module = 'whisper'
+
+    def load(self, model_name, device):
+        import whisper
+        return whisper.load_model(model_name, device=device)
+
+    def run(self, model, audio, language):
+        result = model.transcribe(audio, fp16=False, verbose=False, language=language)
+        return [(seg['start'], seg['end'], seg['text']) for seg in result.get('segments', [])]
+
+
+class FasterWhisperBackend(TranscriptionBackend):
+    """
+    CTranslate2: int8 на CPU, VAD-фильтр тишины, настраиваемые beam и потоки.
+    Опции: beam_size (5), cpu_threads (0 = все ядра), vad_filter (True), compute_type.
+    """
+    name = 'faster'
+    module = 'faster_whisper'
+
+    def compute_type(self, device):
+        return self.options.get('compute_type') or ("int8" if device == "cpu" else "int8_float16")
+
+    def load_options(self, device):
+        return (self.compute_type(device), self.options.get('cpu_threads') or 0)
+
+    def memory_mb(self, model_name):
+        # int8 примерно втрое компактнее fp32
+        return MODEL_MEMORY_MB.get(model_name, 3000) // 3
+
+    def load(self, model_name, device):
+        from faster_whisper import WhisperModel
+        compute_type, threads = self.load_options(device)
+        return WhisperModel(model_name, device=device, compute_type=compute_type,
+                            cpu_threads=threads or (os.cpu_count() or 4))
+
+    def run(self, model, audio, language):
+        segments, _ = model.transcribe(audio, language=language,
+                                       beam_size=self.options.get('beam_size') or 5,
+                                       vad_filter=self.options.get('vad_filter', True))
+        return [(seg.start, seg.end, seg.text) for seg in segments]
+
+
+BACKENDS = {b.name: b for b in (OpenAIWhisperBackend, FasterWhisperBackend)}
+
+
+def get_backend(name=None, **options):
+    return BACKENDS.get(name or DEFAULT_BACKEND, OpenAIWhisperBackend)(**options)
+
+
+def _evict(key):
+    _models.pop(key, None)
+    gc.collect()
+    if key[2] == "cuda":
+        try:
+            import torch
+            torch.cuda.empty_cache()
+        except Exception:
+            pass
+
+
+def get_model(backend, name, device, budget_mb=DEFAULT_MEMORY_BUDGET_MB, on_log=None):
+    """
+    Возвращает модель из реестра или загружает ее (один раз за сеанс).
+    Перед загрузкой вытесняет давно не использованные модели сверх бюджета.
+    """
+    key = (backend.name, name, device, backend.load_options(device))
+    with _lock:
+        if key in _models:
+            _models.move_to_end(key)
+            return _models[key][0]
+        key_lock = _key_locks.setdefault(key, threading.Lock())
+
+    # Одну и ту же модель грузит один поток; другие модели (10-30 с) грузятся параллельно
+    with key_lock:
+        with _lock:
+            if key in _models:
+                _models.move_to_end(key)
+                return _models[key][0]
+            need = backend.memory_mb(name)
+            while _models and sum(mb for _, mb in _models.values()) + sum(_loading.values()) + need > budget_mb:
+                old = next(iter(_models))
+                if on_log: on_log(f"♻️ Выгружаю модель {old[1]} ({old[0]}, {old[2]})")
+                _evict(old)
+            _loading[key] = need
+
+        if on_log: on_log(f"📦 Загрузка модели {name} ({backend.name}) на {device.upper()}...")
+        try:
+            model = backend.load(name, device)
+        finally:
+            with _lock:
+                _loading.pop(key, None)
+        with _lock:
+            _models[key] = (model, need)
+        return model
+
+
+def loaded_models():
+    with _lock:
+        return list(_models)
+
+
+def unload_all():
+    with _lock:
+        for key in list(_models):
+            _evict(key)
+
+
+# ==========================================
+# ПАРАЛЛЕЛЬНАЯ ТРАНСКРИБАЦИЯ ПО КУСКАМ
+# ==========================================
+def plan_chunks(silences, duration, target=CHUNK_TARGET_SEC):
+    """
+    Делит [0, duration] на куски около target сек, разрезая посередине пауз.
+    Если подходящей паузы нет, режет ровно по target.
+    :param silences: список пауз (начало, конец)
+    """
+    mids = [(st + en) / 2 for st, en in silences]
+    chunks = []
+    pos = 0.0
+    while duration - pos > target * 1.5:
+        want = pos + target
+        cands = [m for m in mids if pos + target / 2 <= m <= pos + target * 1.5]
+        cut = min(cands, key=lambda m: abs(m - want)) if cands else want
+        chunks.append((pos, cut))
+        pos = cut
+    chunks.append((pos, duration))
+    return chunks
+
+
+def stitch_chunks(results):
+    """Склеивает сегменты кусков (время уже глобальное) и заново нумерует id"""
+    flat = sorted((seg for part in results for seg in part), key=lambda seg: seg[0])
+    return [{'id': i, 'start': st, 'end': en, 'text': text.strip()} for i, (st, en, text) in enumerate(flat)]
+
+
+def _transcribe_chunk(backend_name, options, model_name, device, wav_path, start, end, language):
+    """Один кусок WAV; в процессе пула модель загружается один раз на процесс"""
+    from core.audio_track import read_wav
+    if backend_name == 'openai' and options.get('cpu_threads'):
+        import torch
+        torch.set_num_threads(options['cpu_threads'])
+    backend = get_backend(backend_name, **options)
+    model = get_model(backend, model_name, device)
+    audio = read_wav(wav_path, start, end)
+    return [(st + start, en + start, text) for st, en, text in backend.run(model, audio, language)]
+
+
+def default_chunk_workers(backend, model_name, budget_mb=DEFAULT_MEMORY_BUDGET_MB):
+    """Процессов в пуле: по ядрам (4 на процесс) и по памяти на копии модели"""
+    cpus = os.cpu_count() or 4
+    return max(1, min(cpus // 4, budget_mb // backend.memory_mb(model_name)))
+
+
+def transcribe_chunked(track, model_name, language=None, backend_name=None, options=None, device=None,
+                       workers=0, on_log=None, should_stop=None):
+    """
+    Длинное видео: дорожка (AudioTrack, 16 кГц PCM) режется по паузам,
+    куски транскрибируются в пуле процессов и склеиваются с глобальным временем.
+    """
+    from core.silence import silence_intervals
+    log = on_log or (lambda msg: None)
+    options = dict(options or {})
+    backend = get_backend(backend_name, **options)
+    device = device or detect_device()
+
+    wav = track.path
+    starts, ends = track.silences(-35, 0.3)
+    chunks = plan_chunks(silence_intervals(starts, ends, track.duration), track.duration)
+
+    # На одной видеокарте параллельные копии модели не ускоряют
+    workers = 1 if device == "cuda" else (workers or default_chunk_workers(backend, model_name))
+    workers = min(workers, len(chunks))
+    log(f"🧩 Кусков: {len(chunks)}, процессов: {workers}")
+
+    results = [None] * len(chunks)
+    if workers == 1:
+        for k, (st, en) in enumerate(chunks):
+            if should_stop and should_stop(): return []
+            results[k] = _transcribe_chunk(backend.name, options, model_name, device, wav, st, en, language)
+            log(f"   ✔ Кусок {k + 1}/{len(chunks)}")
+    else:
+        options['cpu_threads'] = max(1, (os.cpu_count() or 4) // workers)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_transcribe_chunk, backend.name, options, model_name, device, wav,
+                                   st, en, language): k for k, (st, en) in enumerate(chunks)}
+            for n, fut in enumerate(as_completed(futures)):
+                if should_stop and should_stop():
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    return []
+                results[futures[fut]] = fut.result()
+                log(f"   ✔ Кусок {futures[fut] + 1}/{len(chunks)} ({n + 1} готово)")
+    return stitch_chunks(results)
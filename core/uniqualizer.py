@@ -0,0 +1,355 @@
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from core.signals import Signal
+from core.ffmpeg_runner import FFmpegRunner, format_eta
+from core.media_probe import probe_media
+from core.silence import cut_filters, keep_ranges
+from core.audio_track import get_audio_track
+from core import encoders, preview_cache
+from core.filter_graphs import (FilterGraph, stream, blurred_background, letterbox, DEFAULT_BLUR_MODE,
+                                GRAPH_ARG_LIMIT)
+from core.job_manifest import JobManifest, settings_hash, DONE, FAILED, RUNNING, STOPPED
+from utils.generators import generate_unique_filename, get_random_device_metadata
+
+# Настройки по умолчанию — как на вкладке уникализации (для CLI и скриптов)
+DEFAULT_SETTINGS = {
+    'zoom': {'is_static': True, 'val': 100, 'min': 100, 'max': 120},
+    'speed': {'is_static': False, 'val': 100, 'min': 95, 'max': 105},
+    'quality': {'is_static': False, 'val': 85, 'min': 75, 'max': 95},
+    'silence_cut': False, 'silence_db': -30, 'silence_dur': 0.5,
+    'mirror': False, 'trim': True, 'meta': True, 'rename': True,
+    'filter': "Нет фильтра", 'blur': True, 'blur_mode': 'fast', 'mute': False,
+    'vol_orig': 1.0, 'music': "", 'vol_mus': 0.3,
+    'eq': True, 'codec': 'auto', 'workers': 0, 'fmt': 'orig',
+    'vignette': False, 'rotate': False, 'fps_change': False,
+    'echo': False, 'pitch': False,
+    'sys_ar': True, 'sys_br': True, 'sys_ghost': False,
+}
+
+# Отметка кадра превью, сек
+PREVIEW_TIME = 2
+
+
+class Uniqualizer:
+    """Пакетная уникализация (без Qt; в интерфейсе ее запускает ProcessingWorker)"""
+    progress_signal = Signal(int)
+    log_signal = Signal(str)
+    status_signal = Signal(str)
+    finished_signal = Signal()
+
+    def __init__(self, file_list, settings):
+        self.file_list = file_list
+        self.settings = settings
+        self.is_running = True
+        # Все живые процессы ffmpeg (файлы кодируются параллельно)
+        self.processes = set()
+        self.lock = threading.Lock()
+        # Доля готовности каждого файла для общего прогресса
+        self.file_progress = {}
+        self.last_pct = -1
+        # Кодировщик и пресет по калибровке ('auto' — самый быстрый с нужным качеством)
+        self.codec, self.preset = encoders.resolve(settings.get('codec', 'auto'))
+
+    def stop(self):
+        self.is_running = False
+        with self.lock:
+            procs = list(self.processes)
+        for p in procs:
+            try:
+                p.kill()
+            except:
+                pass
+
+    def get_workers_count(self):
+        """Число параллельных ffmpeg: из настроек или авто по числу ядер"""
+        n = self.settings.get('workers', 0)
+        if not n or n < 1:
+            # libx264 -preset ultrafast грузит лишь несколько ядер
+            n = max(1, min(8, (os.cpu_count() or 4) // 4))
+        # Бытовые видеокарты держат ограниченное число сессий кодирования
+        return min(n, encoders.max_sessions(self.codec))
+
+    def check_has_audio(self, path):
+        info = probe_media(path)
+        return bool(info and info['has_audio'])
+
+    def get_quality_params(self, codec):
+        q_data = self.settings['quality']
+        if q_data['is_static']:
+            pct = q_data['val']
+        else:
+            pct = random.randint(q_data['min'], q_data['max'])
+        pct = max(1, min(100, pct))
+        crf = int(51 - (pct * 0.33))
+        return encoders.quality_args(codec, crf)
+
+    def get_filter(self, name):
+        chain = []
+        if "Случайный" in name: name = random.choice(
+            ["Черно-белое", "Сепия", "Размытие: Легкое", "VHS", "Повышенный контраст"])
+        if "Яркость" in name:
+            chain.append(f"eq=contrast={random.uniform(0.9, 1.1):.2f}:brightness={random.uniform(-0.05, 0.05):.2f}")
+        elif "Черно-белое" in name:
+            chain.append("hue=s=0")
+        elif "Сепия" in name:
+            chain.append("colorchannelmixer=.393:.769:.189:0:.349:.686:.168:0:.272:.534:.131")
+        elif "Размытие: Легкое" in name:
+            chain.append("boxblur=2:1")
+        elif "Размытие: Сильное" in name:
+            chain.append("boxblur=10:5")
+        elif "VHS" in name:
+            chain.append("noise=alls=20:allf=t+u,eq=saturation=1.4,chromashift=cbh=3:crh=-3")
+        elif "Повышенный" in name:
+            chain.append("eq=contrast=1.3")
+        elif "Пониженный" in name:
+            chain.append("eq=contrast=0.7")
+        elif "Теплый" in name:
+            chain.append("eq=gamma_r=1.1:gamma_b=0.9")
+        elif "Холодный" in name:
+            chain.append("eq=gamma_r=0.9:gamma_b=1.1")
+
+        # Новые эффекты
+        s = self.settings
+        if s.get('vignette'): chain.append("vignette=PI/4")
+        if s.get('rotate'): chain.append(
+            f"scale=iw*1.05:-1,rotate={random.uniform(0.5, 1.5) * random.choice([-1, 1])}*PI/180")
+        if s.get('fps_change'): chain.append(f"fps={random.choice([24, 25, 30])}")
+        return chain
+
+    def detect_silence(self, path, db, dur):
+        self.log_signal.emit(f"🔍 Ищу тишину ({db}dB)...")
+        try:
+            info = probe_media(path)
+            if not info or not info['duration']: return None
+            duration = info['duration']
+            # Дорожка извлекается один раз (и кэшируется), дальше — NumPy по огибающей
+            track = get_audio_track(path)
+            end = min(duration, track.duration)
+            starts, ends = track.silences(db, dur, 0.0, end)
+            keep = keep_ranges(starts, ends, end)
+            if not keep: return None
+            self.log_signal.emit(f"✂️ Найдено {len(starts)} пауз.")
+            return keep
+        except:
+            return None
+
+    def run(self):
+        total = len(self.file_list)
+        os.makedirs(self.settings['out_dir'], exist_ok=True)
+        self.codec, self.preset = encoders.ensure_calibrated(self.settings.get('codec', 'auto'), self.log_signal.emit)
+        # Журнал в папке результата: готовые файлы пропускаем, упавшие повторяем
+        self.manifest = JobManifest(self.settings['out_dir'])
+        self.shash = settings_hash(self.settings)
+        workers = min(self.get_workers_count(), max(1, total))
+        if workers > 1: self.log_signal.emit(f"⚙️ Параллельно: {workers} файла(ов)")
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for i, path in enumerate(self.file_list):
+                pool.submit(self.process_one, i, path, total)
+        self.finished_signal.emit()
+
+    def process_one(self, i, path, total):
+        if not self.is_running: return
+        name = os.path.basename(path)
+        if self.manifest.is_done(path, self.shash):
+            self.log_signal.emit(f"⏭ Уже готово: {name}")
+            self.report_progress(i, None, 1.0, None, None)
+            return
+        prev = self.manifest.last(path)
+        if prev and prev['status'] in (FAILED, STOPPED, RUNNING):
+            self.log_signal.emit(f"🔁 Повтор: {name} (прошлый раз: {prev['status']})")
+
+        label = f"Обработка [{i + 1}/{total}]: {name}"
+        self.manifest.record(path, self.shash, RUNNING)
+        t0 = time.time()
+        try:
+            self.status_signal.emit(label)
+            out = self.process(path, on_progress=lambda f, sp, eta: self.report_progress(i, label, f, sp, eta))
+            if self.is_running and out:
+                self.manifest.record(path, self.shash, DONE, output=out, duration=time.time() - t0)
+                self.log_signal.emit(f"✅ Готово: {name}")
+            else:
+                self.manifest.record(path, self.shash, STOPPED, duration=time.time() - t0)
+        except Exception as e:
+            self.manifest.record(path, self.shash, FAILED, duration=time.time() - t0, error=str(e)[-2000:])
+            self.log_signal.emit(f"❌ ОШИБКА: {e}")
+        self.report_progress(i, None, 1.0, None, None)
+
+    def report_progress(self, i, label, fraction, speed, eta):
+        """Сводит прогресс параллельных файлов в один процент + статус со скоростью"""
+        if fraction is None: fraction = 0.0
+        with self.lock:
+            self.file_progress[i] = fraction
+            pct = int(sum(self.file_progress.values()) / len(self.file_list) * 100)
+            changed = pct != self.last_pct
+            self.last_pct = pct
+        if changed: self.progress_signal.emit(pct)
+        if label and speed:
+            self.status_signal.emit(f"{label} • {int(fraction * 100)}% • {speed:.1f}x • ETA {format_eta(eta)}")
+
+    def build_graph(self, segments, has_audio, fps=None):
+        """
+        Граф одного файла: вырезание тишины/обрезка начала, видеоэффекты, формат, звук.
+        :return: (граф, видео_метка, аудио_метка или None, множитель скорости)
+        """
+        s = self.settings
+        g = FilterGraph()
+        # TRIM
+        if segments:
+            cv = g.chain(stream(0), cut_filters(segments, fps=fps), "v_base")
+            ca = g.chain(stream(0, 'a'), cut_filters(segments, audio=True), "a_base")
+        elif s['trim']:
+            cv = g.chain(stream(0), ["trim=start=0.2", "setpts=PTS-STARTPTS"], "v_base")
+            ca = g.chain(stream(0, 'a'), ["atrim=start=0.2", "asetpts=PTS-STARTPTS"], "a_base") if has_audio else None
+        else:
+            cv, ca = stream(0), stream(0, 'a') if has_audio else None
+
+        # VIDEO FX
+        vf = self.get_filter(s['filter'])
+        if s['mirror']: vf.append("hflip")
+        z = s['zoom'];
+        zv = z['val'] if z['is_static'] else random.randint(z['min'], z['max']);
+        zf = zv / 100.0
+        if zf != 1.0: vf.append(
+            f"scale=iw*{zf}:-2,crop=iw:ih" if zf > 1 else f"scale=iw*{zf}:-2,pad=iw:ih:(ow-iw)/2:(oh-ih)/2")
+        sp = s['speed'];
+        spv = sp['val'] if sp['is_static'] else random.randint(sp['min'], sp['max']);
+        spf = spv / 100.0
+        if spf != 1.0: vf.append(f"setpts={1 / spf}*PTS")
+        cv = g.chain(cv, vf, "v_fx")
+
+        # FORMAT
+        if s['fmt'] == 'reels':
+            if s['blur']:
+                cv = blurred_background(g, cv, 10, 5, s.get('blur_mode', DEFAULT_BLUR_MODE))
+            else:
+                cv = letterbox(g, cv)
+
+        # AUDIO FX
+        af = []
+        if spf != 1.0:
+            tmp = spf
+            while tmp > 2.0: af.append("atempo=2.0"); tmp /= 2.0
+            while tmp < 0.5: af.append("atempo=0.5"); tmp /= 0.5
+            if abs(tmp - 1.0) > 0.01: af.append(f"atempo={tmp}")
+        if s.get('echo') and ca: af.append("aecho=0.8:0.9:60:0.3")
+        if s.get('pitch') and ca: pf = random.uniform(0.95, 1.05); af.append(f"asetrate=44100*{pf},atempo={1 / pf}")
+
+        if ca:
+            vol0 = 0 if s['mute'] else s['vol_orig']
+            ca = g.chain(ca, af + [f"volume={vol0}"], "a_proc")
+
+        if s['music']:
+            mus = g.chain(stream(1, 'a'), [f"volume={s['vol_mus']}"], "a_mus")
+            ca = g.node([ca, mus], "amix=inputs=2:duration=first", ["a_fin"])[0] if ca else mus
+
+        if s['eq'] and ca:
+            g1 = random.uniform(-5, 5);
+            g2 = random.uniform(-5, 5)
+            ca = g.chain(ca, [f"lowshelf=g={g1}:f=100", f"highshelf=g={g2}:f=10000"], "a_eq")
+
+        return g, cv, ca, spf
+
+    def process(self, f_in, on_progress=None):
+        s = self.settings
+        info = probe_media(f_in)
+        has_audio = bool(info and info['has_audio'])
+
+        segments = []
+        if s['silence_cut'] and has_audio:
+            segments = self.detect_silence(f_in, s['silence_db'], s['silence_dur'])
+
+        if not self.is_running: return
+
+        cmd = ["ffmpeg", "-y", "-i", f_in]
+        if s['music']: cmd.extend(["-stream_loop", "-1", "-i", s['music']])
+
+        # --- СИСТЕМНАЯ АУДИО УНИКАЛИЗАЦИЯ (ЧАСТЬ 1: GHOST TRACK) ---
+        if s.get('sys_ghost'):
+            # Генерируем бесконечную тишину как вход №2 (или №1 если нет музыки)
+            # anullsrc создает тихий аудио поток
+            cmd.extend(["-f", "lavfi", "-i", "anullsrc=channel_layout=stereo:sample_rate=44100"])
+
+        g, cv, ca, spf = self.build_graph(segments, has_audio, info['fps'] if info else None)
+        # Граф с тысячами склеек не влезет в командную строку — тогда он пишется в файл
+        script, runner = None, None
+        try:
+            if len(g.render(cv, ca)) > GRAPH_ARG_LIMIT:
+                fd, script = tempfile.mkstemp(prefix="graph_", suffix=".txt")
+                os.close(fd)
+            cmd.extend(g.args(cv, ca, script=script))
+
+            # --- СИСТЕМНАЯ АУДИО УНИКАЛИЗАЦИЯ (ЧАСТЬ 2: ПАРАМЕТРЫ) ---
+            # Ghost Track
+            if s.get('sys_ghost'):
+                # Мапим последний добавленный вход (anullsrc) как вторую аудиодорожку
+                ghost_idx = 2 if s['music'] else 1
+                cmd.extend(["-map", f"{ghost_idx}:a"])
+
+            # Sample Rate (AR)
+            if s.get('sys_ar'):
+                new_ar = random.choice([44100, 48000])
+                cmd.extend(["-ar", str(new_ar)])
+
+            # Bitrate (AB)
+            if s.get('sys_br'):
+                new_br = random.randint(120, 140)
+                cmd.extend(["-b:a", f"{new_br}k"])
+
+            # Meta & Codec
+            if s['meta']: dev = get_random_device_metadata(); cmd.extend(["-metadata", f"model={dev['model']}"])
+            cmd.extend(["-c:v", self.codec] + encoders.preset_args(self.codec, self.preset))
+            cmd.extend(self.get_quality_params(self.codec))
+            name = os.path.basename(f_in)
+            if s['rename']: name = generate_unique_filename(name, "date_random")
+            f_out = os.path.join(s['out_dir'], name)
+            cmd.extend(["-c:a", "aac", f_out])
+
+            # Длительность результата — для процента и ETA
+            out_dur = info['duration'] if info else 0
+            if segments: out_dur = sum(en - st for st, en in segments)
+            elif s['trim']: out_dur = max(0.0, out_dur - 0.2)
+            out_dur /= spf
+
+            runner = FFmpegRunner(cmd, duration=out_dur, on_progress=on_progress)
+            with self.lock:
+                self.processes.add(runner)
+            # stop() мог прийти между проверкой is_running и запуском
+            if not self.is_running: runner.kill()
+            runner.run()
+        finally:
+            if runner is not None:
+                with self.lock:
+                    self.processes.discard(runner)
+            if script: os.remove(script)
+
+        if runner.returncode != 0 and self.is_running: raise Exception(
+            f"FFmpeg Error: {runner.error_text()}")
+        return f_out if runner.returncode == 0 else None
+
+
+class PreviewRenderer(Uniqualizer):
+    result_signal = Signal(str);
+    error_signal = Signal(str)
+
+    def __init__(self, path, settings):
+        super().__init__([], settings); self.path = path
+
+    def run(self):
+        try:
+            out = os.path.abspath("temp_preview.jpg")
+            s = self.settings
+            info = probe_media(self.path)
+            ts = preview_cache.seek_time(info['duration'] if info else None, PREVIEW_TIME)
+            # Кадр декодируется один раз на файл и отметку, фильтры и формат — в памяти
+            img = preview_cache.render(self.path, ts, self.get_filter(s['filter']),
+                                       reels=s['fmt'] == 'reels', blur=s['blur'])
+            img.save(out, quality=90)
+            self.result_signal.emit(out)
+        except Exception as e:
+            self.error_signal.emit(str(e))
\ No newline at end of file
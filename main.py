@@ -2,26 +2,33 @@ import sys
 import os
 import traceback
 from PyQt6.QtWidgets import QApplication
+from splash_screen import SplashScreen
 
 # Настройка путей
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
-try:
-    from ui.main_window import MainWindow
-except ImportError as e:
-    print(f"!!! ОШИБКА ИМПОРТА !!!\n{e}")
-    traceback.print_exc()
-    sys.exit(1)
-
 def main():
     app = QApplication(sys.argv)
     app.setStyle("Fusion")
 
-    # Сразу запускаем главное окно без ожиданий
+    # Заставка видна, пока грузится интерфейс (Whisper/torch/Gemini не грузятся до анализа)
+    splash = SplashScreen()
+    splash.show()
+    splash.set_status("Загрузка интерфейса...")
+
+    try:
+        from ui.main_window import MainWindow
+    except ImportError as e:
+        print(f"!!! ОШИБКА ИМПОРТА !!!\n{e}")
+        traceback.print_exc()
+        sys.exit(1)
+
+    splash.set_status("Создание окна...")
     window = MainWindow()
     window.show()
+    splash.close()
 
     sys.exit(app.exec())
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Тест консольного запуска: без тяжелых импортов и разбор настроек
+"""
+import os
+import subprocess
+import sys
+
+import cli
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_no_heavy_imports():
+    code = ("import sys, cli; cli.build_parser(); import core.uniqualizer; "
+            "print(','.join(m for m in ('PyQt6', 'whisper', 'torch', 'google.generativeai') if m in sys.modules))")
+    res = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    assert res.returncode == 0, res.stderr
+    assert res.stdout.strip() == ""
+
+
+def test_settings_layers(tmp_path):
+    cfg = tmp_path / "cfg.json"
+    cfg.write_text('{"mirror": true, "filter": "Сепия"}', encoding='utf-8')
+    args = cli.build_parser().parse_args(["uniq", "a.mp4", "--out", "o", "--config", str(cfg),
+                                          "--set", "workers=2", "--set", "filter=VHS Шум"])
+    s = cli.load_settings({'mirror': False, 'workers': 0, 'zoom': {'val': 100}}, args)
+    assert s == {'mirror': True, 'workers': 2, 'zoom': {'val': 100}, 'filter': "VHS Шум"}
+
+
+def test_expand_videos(tmp_path):
+    for n in ("b.mp4", "a.MOV", "notes.txt"):
+        (tmp_path / n).write_bytes(b"")
+    assert [os.path.basename(p) for p in cli.expand_videos([str(tmp_path)])] == ["a.MOV", "b.mp4"]
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Тест разбора ffmpeg -encoders, SSIM и выбора кодировщика по калибровке
+"""
+from core import encoders
+
+ENCODERS_OUT = """Encoders:
+ V..... = Video
+ ------
+ V....D libx264              libx264 H.264 / AVC / MPEG-4 AVC (codec h264)
+ V....D h264_nvenc           NVIDIA NVENC H.264 encoder (codec h264)
+ A....D aac                  AAC (Advanced Audio Coding)
+"""
+
+
+def test_parse_encoders_and_ssim():
+    assert encoders.parse_encoders(ENCODERS_OUT) == {'libx264', 'h264_nvenc'}
+    assert encoders.parse_ssim("[Parsed_ssim_0 @ 0x1] SSIM Y:0.99 U:0.98 V:0.98 All:0.987654 (19.1)") == 0.987654
+    assert encoders.parse_ssim("") is None
+
+
+def test_pick_fastest_with_quality(monkeypatch):
+    results = [
+        {'codec': 'libx264', 'preset': 'ultrafast', 'fps': 300.0, 'ssim': 0.90},
+        {'codec': 'libx264', 'preset': 'veryfast', 'fps': 200.0, 'ssim': 0.97},
+        {'codec': 'libx264', 'preset': 'fast', 'fps': 120.0, 'ssim': 0.98},
+        {'codec': 'libx265', 'preset': 'ultrafast', 'fps': 90.0, 'ssim': 0.97},
+    ]
+    assert encoders.pick(results)['preset'] == 'veryfast'
+    assert encoders.pick(results, codec='libx265')['preset'] == 'ultrafast'
+    monkeypatch.setattr(encoders, '_calibration', {'key': '', 'results': results, 'best': encoders.pick(results)})
+    assert encoders.resolve('auto') == ('libx264', 'veryfast')
+    assert encoders.encoder_args('h264_nvenc', crf=23)[:4] == ["-c:v", "h264_nvenc", "-preset", "p4"]
+    assert encoders.working_codecs() == ['libx264', 'libx265']
+
+
+def test_calibration_only_for_auto(monkeypatch):
+    calls = []
+    monkeypatch.setattr(encoders, '_calibration', None)
+    monkeypatch.setattr(encoders, 'load_calibration', lambda: None)
+    monkeypatch.setattr(encoders, 'calibrate', lambda force=False, on_log=None: calls.append(force))
+    # Явный кодировщик — без тестовых прогонов
+    assert encoders.ensure_calibrated('libx265') == ('libx265', 'ultrafast')
+    # Без калибровки x264 остается на прежнем ultrafast
+    assert encoders.resolve('libx264') == ('libx264', 'ultrafast')
+    assert calls == []
+    assert encoders.ensure_calibrated('auto') == ('libx264', 'ultrafast')
+    assert calls == [False]
+
+
+def test_calibration_failure_falls_back(monkeypatch):
+    def broken(args, *a, **kw):
+        raise FileNotFoundError("ffmpeg")
+
+    monkeypatch.setattr(encoders, '_calibration', None)
+    monkeypatch.setattr(encoders, 'load_calibration', lambda: None)
+    monkeypatch.setattr(encoders.process_scheduler, 'run', broken)
+    log = []
+    assert encoders.ensure_calibrated('auto', log.append) == ('libx264', 'ultrafast')
+    assert log[0].startswith("⚠️ Калибровка кодировщиков не удалась")
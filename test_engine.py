@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Тест движка задач: шина событий, исполнители потоков/процессов/asyncio, отмена
+"""
+import asyncio
+import threading
+
+from core.engine import Job, EventBus, ThreadExecutor, ProcessExecutor, AsyncioExecutor, register_kind
+from core.signals import Signal
+
+
+class EchoJob:
+    """Обработчик для теста: пишет лог, прогресс и ждет остановки, если попросили"""
+    log_signal = Signal(str)
+    progress_signal = Signal(int)
+    finished_signal = Signal()
+
+    def __init__(self, text, wait=False):
+        self.text = text
+        self.wait = wait
+        self.stopped = threading.Event()
+
+    def run(self):
+        self.log_signal.emit(self.text)
+        if self.wait: self.stopped.wait(10)
+        self.progress_signal.emit(100)
+        self.finished_signal.emit()
+
+    def stop(self):
+        self.stopped.set()
+
+
+register_kind('echo', __name__, 'EchoJob')
+
+
+def collect(bus):
+    events = []
+    bus.subscribe(events.append)
+    return events
+
+
+def test_thread_executor_and_bus_filter():
+    bus = EventBus()
+    events = collect(bus)
+    logs = []
+    bus.subscribe(lambda e: logs.append(e.value), kind='log')
+    ex = ThreadExecutor(bus, max_workers=2)
+    job = Job('echo', "привет")
+    ex.submit(job).result(timeout=10)
+    ex.shutdown()
+    assert [(e.job_id, e.kind, e.value) for e in events] == [
+        (job.id, 'log', "привет"), (job.id, 'progress', 100), (job.id, 'finished', None)]
+    assert logs == ["привет"]
+
+
+def test_cancel_running_job():
+    bus = EventBus()
+    started = threading.Event()
+    bus.subscribe(lambda e: started.set(), kind='log')
+    ex = ThreadExecutor(bus)
+    job = Job('echo', "жду", wait=True)
+    fut = ex.submit(job)
+    assert started.wait(10)
+    ex.cancel(job.id)
+    fut.result(timeout=10)
+    ex.shutdown()
+
+
+def test_process_and_asyncio_executors():
+    bus = EventBus()
+    events = collect(bus)
+    ex = ProcessExecutor(bus, max_workers=1)
+    job = Job('echo', "из процесса")
+    ex.submit(job).result(timeout=60)
+    ex.shutdown()
+    assert (job.id, 'log', "из процесса") in [tuple(e) for e in events]
+
+    ex = AsyncioExecutor(bus)
+    job = Job('echo', "из asyncio")
+    asyncio.run(ex.run(job))
+    ex.shutdown()
+    assert (job.id, 'log', "из asyncio") in [tuple(e) for e in events]
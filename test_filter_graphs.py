@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Тест построения filter_complex: метки, упрощение цепочек, эталонные графы вкладок
+"""
+import copy
+import math
+
+import pytest
+
+from core.filter_graphs import (BLUR_MODES, FilterGraph, stream, box_sigma, blurred_background, simplify,
+                                split_filters)
+
+BG_CLASSIC = ("split=2[bg][fg];[bg]scale=iw/4:-1,scale=1080:1920:force_original_aspect_ratio=increase,crop=1080:1920,"
+              "boxblur={r}[bg_blur];[fg]scale=1080:1920:force_original_aspect_ratio=decrease[fg_scaled];"
+              "[bg_blur][fg_scaled]overlay=(W-w)/2:(H-h)/2[v_bg]")
+
+
+def test_box_sigma():
+    # Один проход окна 3 (radius=1): дисперсия (9-1)/12
+    assert math.isclose(box_sigma(1, 1), math.sqrt(8 / 12))
+    assert box_sigma(20, 10) > box_sigma(10, 5)
+
+
+def test_blur_modes():
+    for mode in BLUR_MODES:
+        g = FilterGraph()
+        out = blurred_background(g, stream(0), 20, 10, mode)
+        fc = g.render(out)
+        assert fc.startswith("[0:v]split=2[bg][fg];") and fc.endswith("overlay=(W-w)/2:(H-h)/2[v_bg]")
+    g = FilterGraph()
+    fast = g.render(blurred_background(g, stream(0), 20, 10, 'fast'))
+    assert "crop=180:320,gblur=sigma=6.24:steps=2,scale=1080:1920[bg_blur]" in fast
+    g = FilterGraph()
+    # classic — тот же граф, что был до сборщика, вместе с уменьшением iw/4 перед размытием
+    assert g.render(blurred_background(g, stream(0), 20, 10, 'classic')) == "[0:v]" + BG_CLASSIC.format(r="20:10")
+
+
+def test_split_filters():
+    assert split_filters("noise=alls=20,eq=saturation=1.4") == ["noise=alls=20", "eq=saturation=1.4"]
+    assert split_filters("select='between(t,1,2)',setpts=N/FR/TB") == ["select='between(t,1,2)'", "setpts=N/FR/TB"]
+
+
+def test_simplify():
+    assert simplify(["copy", "volume=1.0", "anull", "setpts=1.0*PTS", "atempo=1"]) == []
+    assert simplify(["volume=0", "setpts=PTS-STARTPTS"]) == ["volume=0", "setpts=PTS-STARTPTS"]
+    # Первый scale лишний, только если он не меньше второго; уменьшение перед увеличением теряет детали
+    assert simplify(["scale=1920:1080", "scale=1280:720"]) == ["scale=1280:720"]
+    assert simplify(["scale=640:360", "scale=720:1280"]) == ["scale=640:360", "scale=720:1280"]
+    assert simplify(["scale=iw/2:-2", "scale=720:1280:force_original_aspect_ratio=decrease"]) == \
+        ["scale=iw/2:-2", "scale=720:1280:force_original_aspect_ratio=decrease"]
+    assert simplify(["scale=iw/4:-1", "scale=1080:1920:force_original_aspect_ratio=increase"]) == \
+        ["scale=iw/4:-1", "scale=1080:1920:force_original_aspect_ratio=increase"]
+    assert simplify(["scale=640:360", "scale=720:1280:force_original_aspect_ratio=decrease"]) == \
+        ["scale=640:360", "scale=720:1280:force_original_aspect_ratio=decrease"]
+    assert simplify(["scale=iw*1.05:-1", "scale=iw/2:-2"]) == ["scale=iw*1.05:-1", "scale=iw/2:-2"]
+
+
+def test_graph_labels():
+    g = FilterGraph()
+    v = g.chain(stream(0), ["trim=start=1", "setpts=PTS-STARTPTS"], "v_base")
+    v = g.chain(v, ["copy", "hflip"], "v_fx")
+    a = g.chain(stream(0, 'a'), ["volume=1"], "a_proc")
+    # Линейные цепочки сливаются, пустой фильтр звука не попадает в граф
+    assert g.args(v, a) == ["-filter_complex", "[0:v]trim=start=1,setpts=PTS-STARTPTS,hflip[v_fx]",
+                            "-map", "[v_fx]", "-map", "0:a"]
+    assert FilterGraph().args(stream(0)) == ["-map", "0:v"]
+
+    # Выход фильтра подключается только один раз (для нескольких — split)
+    g.chain(v, ["vflip"])
+    with pytest.raises(ValueError):
+        g.chain(v, ["vflip"])
+
+    g = FilterGraph()
+    b0, b1 = g.split(stream(0), ["b", "b"])
+    assert (b0.name, b1.name) == ("b", "b_2")
+    g.chain(b0, ["hflip"], "x")
+    with pytest.raises(ValueError):
+        g.render(b0)  # [b_2] и [x] висят
+
+
+def test_uniqualizer_graph():
+    from core.uniqualizer import Uniqualizer, DEFAULT_SETTINGS
+    s = copy.deepcopy(DEFAULT_SETTINGS)
+    s.update(eq=False, fmt='reels', blur_mode='classic', mirror=True,
+             speed={'is_static': True, 'val': 125, 'min': 95, 'max': 105})
+    g, v, a, spf = Uniqualizer([], s).build_graph([(0, 1.5), (2, 4)], True, 30)
+    assert spf == 1.25
+    sel = "if(lt(t,2.000),gte(t,0.000)*lt(t,1.500),gte(t,2.000)*lt(t,4.000))"
+    pts = "PTS-(if(lt(T,2.000),max(0.000,T-1.500),max(0.500,T-3.500)))/TB"
+    # Вырезание тишины — четыре фильтра на поток при любом числе отрезков
+    fc = g.render(v, a)
+    assert fc.startswith(f"[0:v]select='{sel}',setpts='{pts}',fps=30,hflip,setpts=0.8*PTS,split=2[bg][fg];")
+    assert (f"[0:a]asetnsamples=n=256:p=0,aselect='{sel}',asetpts='{pts}',"
+            f"aresample=async=1:min_hard_comp=0.01,atempo=1.25[a_proc]") in fc
+    assert "trim" not in fc and "concat" not in fc
+
+    s.update(trim=False, fmt='orig', mirror=False, speed={'is_static': True, 'val': 100})
+    g, v, a, _ = Uniqualizer([], s).build_graph([], True)
+    assert g.args(v, a) == ["-map", "0:v", "-map", "0:a"]
+
+
+def test_ai_slicer_graph():
+    from core.ai_slicer import AiSlicer
+    ai = object.__new__(AiSlicer)
+    ai.s = {'blur_mode': 'classic'}
+    g, v, a = ai.clip_graph(None, (10, 150))
+    assert g.args(v, a) == ["-filter_complex", "[0:v]" + BG_CLASSIC.format(r="20:10") + ";[v_bg][1:v]overlay=10:150[v_out]",
+                            "-map", "[v_out]", "-map", "0:a"]
+    g, v, a = ai.clip_graph([(0, 1), (2, 3)], None, 25)
+    assert g.render(v, a).startswith("[0:v]select='if(lt(t,2.000),gte(t,0.000)*lt(t,1.000),gte(t,2.000)*lt(t,3.000))',"
+                                     "setpts='PTS-(if(lt(T,2.000),max(0.000,T-1.000),max(1.000,T-2.000)))/TB',"
+                                     "fps=25,split=2[bg][fg];")
+
+
+def test_long_graph_goes_to_file(tmp_path, monkeypatch):
+    from core import encoders
+    from core.silence import cut_filters
+    monkeypatch.setattr(encoders, 'ffmpeg_version', lambda: 6)
+    g = FilterGraph()
+    v = g.chain(stream(0), cut_filters([(k * 1.0, k + 0.5) for k in range(2000)]))
+    script = tmp_path / "graph.txt"
+    args = g.args(v, script=str(script))
+    assert args == ["-filter_complex_script", str(script), "-map", str(v)]
+    assert script.read_text(encoding='utf-8') == g.render(v)
+    # Сборка из git без номера версии: старый ключ, пока ffmpeg его знает
+    monkeypatch.setattr(encoders, 'ffmpeg_version', lambda: None)
+    monkeypatch.setattr(encoders, '_help', "-filter_complex <graph>  create a complex filtergraph\n"
+                                            "-filter_complex_script <filename>  deprecated\n")
+    assert g.args(v, script=str(script))[0] == "-filter_complex_script"
+    monkeypatch.setattr(encoders, '_help', "-filter_complex <graph>  create a complex filtergraph\n")
+    assert g.args(v, script=str(script))[0] == "-/filter_complex"
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Тест выбора хайлайтов: разбор ответа LLM, HTTP-движок на заглушке, офлайн-эвристика
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from core.highlights import (target_quantity, parse_clips, get_backend, HttpBackend, LocalBackend,
+                             GeminiBackend)
+
+
+def make_segments(n=120, step=5.0):
+    """n фраз по step секунд; каждая десятая — с крючком и вопросом"""
+    segs = []
+    for i in range(n):
+        text = "Секрет в том, почему это работает?" if i % 10 == 3 else "обычная спокойная фраза про погоду"
+        segs.append({'id': i, 'start': i * step, 'end': i * step + step - 0.5, 'text': text})
+    return segs
+
+
+def test_target_quantity():
+    assert target_quantity(3)[1:] == (1, 1)
+    _, lo, hi = target_quantity(120)
+    assert lo <= hi and lo > target_quantity(3)[1]
+
+
+def test_parse_clips_tolerates_wrapping():
+    segs = make_segments(10)
+    text = ("Вот клипы:\n```json\n"
+            '[{"start_id": 0, "end_id": 3, "title": "Тайна"}, '
+            '{"start_id": 5, "end_id": 99, "title": "Нет такой фразы"}, '
+            '{"start_id": 6, "end_id": 6, "title": "Слишком коротко"}, '
+            '{"start_id": "7", "end_id": 9}]\n```\nГотово.')
+    assert parse_clips(text, segs) == [{'start': 0.0, 'end': 19.5, 'title': 'Тайна'}]
+
+
+def test_get_backend():
+    assert isinstance(get_backend('local'), LocalBackend)
+    assert isinstance(get_backend(), GeminiBackend)
+    assert isinstance(get_backend('нет такого'), GeminiBackend)
+    assert get_backend('http', url="http://x").options['url'] == "http://x"
+
+
+def test_local_backend_picks_windows():
+    segs = make_segments()  # 10 минут
+    settings = {'min_duration': 30, 'max_duration': 60, 'target_duration': 45, 'ai_prompt': ''}
+    clips = get_backend('local').select(segs, 600, settings)
+    _, lo, hi = target_quantity(10)
+    assert lo <= len(clips) <= hi
+    ordered = sorted(clips, key=lambda c: c['start'])
+    for a, b in zip(ordered, ordered[1:]):
+        assert a['end'] <= b['start']
+    for c in clips:
+        assert 30 <= c['end'] - c['start'] <= 60
+        assert c['title'].strip()
+    assert get_backend('local').select([], 600, settings) == []
+
+    # Дорожка не читается — та же оценка по одному тексту
+    class BrokenTrack:
+        def loudness(self, start, end):
+            raise OSError("no audio stream")
+
+    assert get_backend('local').select(segs, 600, settings, track=BrokenTrack()) == clips
+
+
+def test_http_backend_on_stub_server():
+    seen = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            seen.update(json.loads(self.rfile.read(int(self.headers['Content-Length']))))
+            answer = '[{"start_id": 1, "end_id": 4, "title": "Главное"}]'
+            body = json.dumps({'choices': [{'message': {'content': answer}}]}).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/v1/chat/completions"
+        backend = HttpBackend(url=url, model="qwen", timeout=10)
+        clips = backend.select(make_segments(10), 50, {'min_duration': 10, 'max_duration': 60})
+    finally:
+        server.shutdown()
+    assert seen['model'] == "qwen" and "TRANSCRIPT" in seen['messages'][0]['content']
+    assert clips == [{'start': 5.0, 'end': 24.5, 'title': 'Главное'}]
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Тест журнала уникализации: пропуск готовых, повтор упавших, хэш настроек
+"""
+from core.job_manifest import JobManifest, settings_hash, DONE, FAILED, RUNNING
+
+
+def test_resume_skips_done_and_retries_failed(tmp_path):
+    src_ok, src_bad = tmp_path / "a.mp4", tmp_path / "b.mp4"
+    src_ok.write_bytes(b"a")
+    src_bad.write_bytes(b"b")
+    out = tmp_path / "out"
+    out.mkdir()
+    res = out / "a_uniq.mp4"
+    res.write_bytes(b"x")
+    shash = settings_hash({'zoom': 1, 'out_dir': str(out)})
+
+    m = JobManifest(str(out))
+    m.record(str(src_ok), shash, RUNNING)
+    m.record(str(src_ok), shash, DONE, output=str(res), duration=1.5)
+    m.record(str(src_bad), shash, FAILED, error="boom")
+
+    # Новый запуск читает журнал с диска
+    m = JobManifest(str(out))
+    assert m.is_done(str(src_ok), shash)
+    assert not m.is_done(str(src_bad), shash)
+    assert not m.is_done(str(src_ok), settings_hash({'zoom': 2}))
+    assert [r['status'] for r in m.history(str(src_ok))] == [RUNNING, DONE]
+    # Результат удален — файл снова в работу
+    res.unlink()
+    assert not m.is_done(str(src_ok), shash)
+
+
+def test_settings_hash_ignores_out_dir():
+    assert settings_hash({'zoom': 1, 'out_dir': 'a', 'workers': 2}) == settings_hash({'zoom': 1, 'out_dir': 'b'})
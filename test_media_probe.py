@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Тест разбора JSON ffprobe и постоянного кэша проб (без запуска ffprobe)
+"""
+import os
+import core.media_probe as media_probe
+
+SAMPLE = {
+    'format': {'duration': '125.40', 'format_name': 'mov,mp4', 'bit_rate': '2500000'},
+    'streams': [
+        {'codec_type': 'video', 'codec_name': 'h264', 'width': 1080, 'height': 1920,
+         'avg_frame_rate': '30000/1001', 'pix_fmt': 'yuv420p'},
+        {'codec_type': 'audio', 'codec_name': 'aac', 'sample_rate': '44100', 'channels': 2,
+         'channel_layout': 'stereo'},
+    ]
+}
+
+
+def test_parse_ffprobe():
+    info = media_probe.parse_ffprobe(SAMPLE)
+    assert info['duration'] == 125.4
+    assert info['has_video'] and info['has_audio']
+    assert (info['width'], info['height']) == (1080, 1920)
+    assert info['fps'] == 29.97
+    assert info['sample_rate'] == 44100 and info['channel_layout'] == 'stereo'
+
+
+def test_parse_ffprobe_no_audio():
+    info = media_probe.parse_ffprobe({'format': {}, 'streams': [{'codec_type': 'video', 'duration': '3.0'}]})
+    assert not info['has_audio']
+    assert info['duration'] == 3.0
+
+
+def test_probe_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("VIDEOUNIQ_CACHE", str(tmp_path / "cache"))
+    monkeypatch.setattr(media_probe, "_cache", None)
+    calls = []
+    monkeypatch.setattr(media_probe, "run_ffprobe", lambda p: calls.append(p) or media_probe.parse_ffprobe(SAMPLE))
+
+    video = tmp_path / "clip.mp4"
+    video.write_bytes(b"0" * 10)
+    assert media_probe.probe_media(str(video))['duration'] == 125.4
+    assert media_probe.probe_media(str(video))['duration'] == 125.4
+    assert len(calls) == 1
+
+    # Изменили файл — ключ другой, проба повторяется, старая запись удаляется
+    video.write_bytes(b"0" * 20)
+    media_probe.probe_media(str(video))
+    assert len(calls) == 2
+    assert len(media_probe._load_cache()) == 1
+    assert os.path.exists(media_probe._cache_path())
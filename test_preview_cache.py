@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Тест кэша превью: разбор цепочки ffmpeg, один запуск ffmpeg на кадр, фильтры в памяти
+"""
+import io
+import types
+
+import pytest
+
+from core import preview_cache
+
+
+def test_parse_chain():
+    ops = preview_cache.parse_chain(["noise=alls=20:allf=t+u,eq=saturation=1.4,chromashift=cbh=3:crh=-3",
+                                     "vignette=PI/4", "fps=25"])
+    assert [name for name, _ in ops] == ['noise', 'eq', 'chromashift', 'vignette']
+    assert ops[3][1] == pytest.approx(0.785398, rel=1e-5)
+
+    mixer = preview_cache.parse_chain(["colorchannelmixer=.393:.769:.189:0:.349:.686:.168:0:.272:.534:.131"])
+    assert mixer[0][1][2] == [0.272, 0.534, 0.131]
+    assert preview_cache.parse_chain(["boxblur=10:5"]) == [('blur', (10.0, 5))]
+    # Неизвестный фильтр — превью через ffmpeg
+    assert preview_cache.parse_chain(["eq=contrast=1.3", "drawtext=text=x"]) is None
+
+
+def test_seek_time():
+    assert preview_cache.seek_time(60, 2) == 2
+    assert preview_cache.seek_time(1.0, 2) == 0.5
+    assert preview_cache.seek_time(None, 15) == 15
+
+
+def test_frame_decoded_once(tmp_path, monkeypatch):
+    Image = pytest.importorskip("PIL.Image")
+    pytest.importorskip("numpy")
+    src = tmp_path / "v.mp4"
+    src.write_bytes(b"x")
+    buf = io.BytesIO()
+    Image.new('RGB', (64, 36), (200, 100, 50)).save(buf, format='BMP')
+    calls = []
+
+    def fake_run(cmd, priority, timeout=None, stdin_data=None):
+        calls.append(cmd)
+        return types.SimpleNamespace(returncode=0, stdout=buf.getvalue(), error_text=lambda: "")
+
+    monkeypatch.setattr(preview_cache.process_scheduler, "run", fake_run)
+    preview_cache.clear()
+
+    gray = preview_cache.render(str(src), 2, ["hue=s=0"])
+    r, g, b = gray.getpixel((10, 10))
+    assert abs(r - g) <= 1 and abs(g - b) <= 1
+    reels = preview_cache.render(str(src), 2, ["eq=contrast=1.3"], reels=True, blur=True)
+    assert reels.size == preview_cache.REELS_SIZE
+    assert preview_cache.render(str(src), 2, ["hue=s=0"]) is gray
+    assert len(calls) == 1
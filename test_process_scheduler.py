@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Тест планировщика процессов: приоритеты, лимит, отмена, таймаут, потоковое чтение
+"""
+import sys
+import time
+
+from core.process_scheduler import BATCH, PREVIEW, PROBE, ProcessScheduler
+
+
+def py(code):
+    return [sys.executable, "-c", code]
+
+
+def test_priority_and_limit():
+    sched = ProcessScheduler(max_procs=1, interactive_reserve=0)
+    order = []
+    try:
+        blocker = sched.submit(py("import time; time.sleep(0.3)"), BATCH)
+        time.sleep(0.1)
+        jobs = [sched.submit(py(f"print('{name}')"), prio, on_stdout=lambda line: order.append(line.strip()))
+                for name, prio in (("batch", BATCH), ("probe", PROBE), ("preview", PREVIEW))]
+        for job in [blocker] + jobs:
+            assert job.wait(10) == 0
+        assert order == [b"preview", b"probe", b"batch"]
+    finally:
+        sched.shutdown()
+
+
+def test_interactive_reserve():
+    sched = ProcessScheduler(max_procs=2, interactive_reserve=1)
+    try:
+        slow = sched.submit(py("import time; time.sleep(5)"), BATCH)
+        queued = sched.submit(py("pass"), BATCH)
+        t0 = time.perf_counter()
+        assert sched.run(py("print('ok')"), PREVIEW).stdout.strip() == b"ok"
+        assert time.perf_counter() - t0 < 4
+        assert not queued.done.is_set()  # пакетный ждет: последний слот только для превью
+        queued.cancel()
+        assert queued.wait(5) is None
+        slow.cancel()
+        assert slow.wait(5) not in (0, None)
+    finally:
+        sched.shutdown()
+
+
+def test_timeout_and_stderr_tail():
+    sched = ProcessScheduler(max_procs=2)
+    try:
+        job = sched.run(py("import sys, time; print('boom', file=sys.stderr, flush=True); time.sleep(5)"),
+                        BATCH, timeout=0.5)
+        assert job.timed_out and job.returncode != 0
+        assert "boom" in job.error_text()
+        missing = sched.run(["no-such-binary-here"])
+        assert missing.returncode is None and missing.error
+    finally:
+        sched.shutdown()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Тест поиска тишины по огибающей, отрезков между паузами и вырезания тишины в уникализации
+"""
+import copy
+import os
+
+import pytest
+from core.silence import keep_ranges, silence_intervals, detect_silences
+
+
+def test_keep_ranges_between_pauses():
+    assert keep_ranges([], [], 10.0) is None
+    assert keep_ranges([2.0, 6.0], [3.0, 7.5], 10.0) == [(0.0, 2.0), (3.0, 6.0), (7.5, 10.0)]
+    # Незакрытая пауза — до конца файла
+    assert keep_ranges([8.0], [], 10.0) == [(0.0, 8.0)]
+    assert silence_intervals([8.0], [], 10.0) == [(8.0, 10.0)]
+
+
+def test_detect_silences_on_envelope():
+    np = pytest.importorskip("numpy")
+    # 20 мс окна: 1 с речи, 0.5 с тишины, 0.1 с тишины, речь до 3 с
+    env = np.full(150, -10.0)
+    env[50:75] = -60.0
+    env[100:105] = -60.0
+    starts, ends = detect_silences(env, 0.02, -30, 0.3)
+    assert starts == pytest.approx([1.0]) and ends == pytest.approx([1.5])
+    # Запрос по отрезку: время относительно его начала
+    starts, ends = detect_silences(env, 0.02, -30, 0.05, start=1.2, end=3.0)
+    assert starts == pytest.approx([0.0, 0.8]) and ends == pytest.approx([0.3, 0.9])
+
+
+def test_cut_expressions():
+    from core.silence import select_expr, offset_expr, cut_filters
+    keep = [(0.0, 1.0), (2.0, 3.5), (5.0, 9.0)]
+    assert select_expr(keep) == ("if(lt(t,2.000),gte(t,0.000)*lt(t,1.000),"
+                                 "if(lt(t,5.000),gte(t,2.000)*lt(t,3.500),gte(t,5.000)*lt(t,9.000)))")
+    assert offset_expr(keep) == ("if(lt(T,2.000),max(0.000,T-1.000),"
+                                 "if(lt(T,5.000),max(1.000,T-2.500),max(2.500,T-6.500)))")
+    assert cut_filters(keep, fps=30.0)[-1] == "fps=30.0"
+    assert cut_filters(keep, audio=True)[-1].startswith("aresample=async=1")
+
+
+def test_cut_expression_scales():
+    from core.silence import select_expr
+    # Дерево if(): глубина вложенности растет как log2(n), а не n
+    expr = select_expr([(k * 1.0, k + 0.5) for k in range(5000)])
+    depth, max_depth = 0, 0
+    for ch in expr:
+        if ch == '(': depth += 1
+        elif ch == ')': depth -= 1
+        max_depth = max(max_depth, depth)
+    assert max_depth < 40
+
+
+def test_uniqualizer_counts_pauses(monkeypatch):
+    import core.uniqualizer as uniq
+
+    class Track:
+        duration = 10.0
+
+        def silences(self, db, min_dur, start=0.0, end=None):
+            # Пауза в начале и в конце файла: отрезок речи один, пауз две
+            return [0.0, 8.0], [1.0, 10.0]
+
+    monkeypatch.setattr(uniq, 'probe_media', lambda path: {'duration': 10.0})
+    monkeypatch.setattr(uniq, 'get_audio_track', lambda path: Track())
+    worker = uniq.Uniqualizer([], dict(uniq.DEFAULT_SETTINGS))
+    log = []
+    worker.log_signal.connect(log.append)
+    assert worker.detect_silence("in.mp4", -30, 0.5) == [(1.0, 8.0)]
+    assert log[-1] == "✂️ Найдено 2 пауз."
+
+
+def test_uniqualizer_graph_script_cleanup(tmp_path, monkeypatch):
+    import tempfile
+    import core.uniqualizer as uniq
+    s = copy.deepcopy(uniq.DEFAULT_SETTINGS)
+    s.update(out_dir=str(tmp_path), silence_cut=True, rename=False)
+    info = {'has_audio': True, 'fps': 30.0, 'duration': 4000.0}
+    monkeypatch.setattr(uniq, 'probe_media', lambda path: info)
+    created, real_mkstemp = [], tempfile.mkstemp
+
+    def mkstemp(**kw):
+        fd, path = real_mkstemp(dir=str(tmp_path), **kw)
+        created.append(path)
+        return fd, path
+
+    monkeypatch.setattr(tempfile, 'mkstemp', mkstemp)
+
+    class Runner:
+        def __init__(self, cmd, duration=None, on_progress=None):
+            self.cmd, self.returncode = cmd, 0
+
+        def run(self):
+            pass
+
+    monkeypatch.setattr(uniq, 'FFmpegRunner', Runner)
+    worker = uniq.Uniqualizer([], s)
+    # Короткий граф — в командной строке, без временного файла
+    monkeypatch.setattr(worker, 'detect_silence', lambda *a: [(0, 1.5), (2, 4)])
+    worker.process("in.mp4")
+    assert created == []
+
+    # Длинный граф — файл удаляется, даже если команда не собралась
+    monkeypatch.setattr(worker, 'detect_silence', lambda *a: [(k * 2.0, k * 2 + 1.5) for k in range(1500)])
+    monkeypatch.setattr(uniq, 'get_random_device_metadata', lambda: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        worker.process("in.mp4")
+    assert len(created) == 1 and not os.path.exists(created[0])
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Тест планирования пакетной нарезки и графа на несколько выходов
+"""
+from core.slice_batch import plan_batches, build_batch_graph, max_outputs_for_budget, title_inputs
+
+
+def test_plan_batches_sorted_and_limited():
+    segs = [(100, 160), (0, 60), (30, 90), (40, 80)]
+    assert plan_batches(segs, 3) == [[1, 2, 3], [0]]
+
+
+def test_plan_batches_splits_on_gap():
+    segs = [(0, 60), (500, 560)]
+    assert plan_batches(segs, 10) == [[0], [1]]
+
+
+def test_budget():
+    assert max_outputs_for_budget(1500, 150) == 10
+    assert max_outputs_for_budget(100, 150) == 1
+
+
+def test_batch_graph_single_decode():
+    fc, labels = build_batch_graph([(0, 60), (30, 90)], base_graph=lambda g, src: g.chain(src, ["hflip"]),
+                                   overlays=[(1, 0, 0), (2, 0, 10)])
+    # Общая часть графа один раз, дальше split на два выхода
+    assert fc.count("hflip") == 1
+    assert "[0:v]hflip,split=2[b0][b1]" in fc
+    assert "[t1][2:v]overlay=0:10[v1]" in fc
+    assert labels == [("[v0]", "[a0]"), ("[v1]", "[a1]")]
+
+
+class FakeImage:
+    width, height = 4, 2
+
+    def tobytes(self, *args):
+        return b"\0" * 32
+
+    def save(self, path, *args, **kwargs):
+        open(path, "wb").close()
+
+
+def test_title_inputs_first_via_stdin(tmp_path):
+    args, data = title_inputs([FakeImage(), FakeImage()], str(tmp_path))
+    assert args[:8] == ["-f", "rawvideo", "-pix_fmt", "rgba", "-s", "4x2", "-i", "pipe:0"]
+    assert args[8:] == ["-i", str(tmp_path / "title_1.png")] and len(data) == 32
+    assert title_inputs([], None) == ([], None)
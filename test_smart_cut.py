@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Тест нарезки без перекодирования: выбор пути, ключевые кадры, план кусков
+"""
+from core import encoders, smart_cut
+
+INFO = {'has_video': True, 'has_audio': True, 'width': 1080, 'height': 1920, 'video_codec': 'h264',
+        'pix_fmt': 'yuv420p', 'fps': 30.0}
+
+
+def test_can_copy(monkeypatch):
+    monkeypatch.setattr(encoders, 'list_encoders', lambda: {'libx264'})
+    plain = {'no_text_render': True, 'silence_cut': False}
+    assert smart_cut.can_copy(INFO, plain)
+    assert not smart_cut.can_copy(INFO, {'no_text_render': False})
+    assert not smart_cut.can_copy(INFO, dict(plain, silence_cut=True))
+    assert not smart_cut.can_copy(dict(INFO, width=1920, height=1080), plain)
+    assert not smart_cut.can_copy(dict(INFO, video_codec='hevc'), plain)  # нет libx265
+    assert not smart_cut.can_copy(None, plain)
+
+
+def test_parse_keyframes():
+    text = "0.000000,K__\n0.033333,___\n2.002000,K__\nN/A,K__\n4.004000,K_\n"
+    assert smart_cut.parse_keyframes(text) == [0.0, 2.002, 4.004]
+
+
+def test_plan():
+    keys = [0.0, 2.0, 4.0, 6.0, 8.0]
+    assert smart_cut.plan(1.5, 7.2, keys) == [('encode', 1.5, 2.0), ('copy', 2.0, 6.0), ('encode', 6.0, 7.2)]
+    # Границы на ключевых кадрах — только копирование
+    assert smart_cut.plan(2.0, 6.0, keys) == [('copy', 2.0, 6.0)]
+    # Меньше кадра до ключевого — не перекодируем
+    assert smart_cut.plan(1.99, 6.0, keys, min_piece=1 / 60) == [('copy', 2.0, 6.0)]
+    # Клип внутри одного GOP — целиком перекодировать
+    assert smart_cut.plan(2.5, 3.5, keys) == [('encode', 2.5, 3.5)]
+
+
+PARAMS = {'codec_name': 'h264', 'profile': 'High', 'level': 42, 'pix_fmt': 'yuv420p', 'width': 1080,
+          'height': 1920, 'refs': 4}
+
+
+def test_boundary_params():
+    assert smart_cut.encodable(PARAMS)
+    assert not smart_cut.encodable(dict(PARAMS, profile='High 4:4:4 Predictive'))
+    assert not smart_cut.encodable(dict(PARAMS, level=0)) and not smart_cut.encodable(None)
+    args = smart_cut.boundary_args(INFO, PARAMS)
+    assert args[args.index("-profile:v") + 1] == "high" and args[args.index("-level:v") + 1] == "4.2"
+    assert args[args.index("-refs") + 1] == "4"
+    hevc = dict(PARAMS, codec_name='hevc', profile='Main', level=123)
+    args = smart_cut.boundary_args(dict(INFO, video_codec='hevc'), hevc)
+    assert args[args.index("-x265-params") + 1] == "level-idc=4.1:high-tier=0:ref=4"
+    # x264 пишет baseline как Constrained Baseline — это тот же профиль
+    base = dict(PARAMS, profile='Baseline')
+    assert smart_cut.compatible(base, dict(base, profile='Constrained Baseline'))
+    assert not smart_cut.compatible(PARAMS, dict(PARAMS, level=40))
+    assert not smart_cut.compatible(PARAMS, dict(PARAMS, profile='Main'))
+    assert not smart_cut.compatible(PARAMS, None)
+
+
+def test_commands(tmp_path):
+    cmd = smart_cut.piece_cmd("in.mp4", 'copy', 2.0, 6.0, "p.ts", INFO)
+    assert cmd[cmd.index("-ss") + 1] == "2.001000" and cmd[cmd.index("-t") + 1] == "3.999000"
+    assert "copy" in cmd and "libx264" not in cmd
+    assert "libx264" in smart_cut.piece_cmd("in.mp4", 'encode', 1.5, 2.0, "p.ts", INFO, PARAMS)
+
+    lst = smart_cut.write_concat_list([str(tmp_path / "it's.ts")], str(tmp_path / "list.txt"))
+    assert open(lst, encoding='utf-8').read().endswith("it'\\''s.ts'\n")
+    cmd = smart_cut.concat_cmd(lst, "in.mp4", 1.5, 7.2, "out.mp4", INFO)
+    assert cmd[-1] == "out.mp4" and "1:a:0" in cmd
+    assert cmd[cmd.index("-c:v") + 1] == "copy"
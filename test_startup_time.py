@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Тест запуска: Whisper/torch/Gemini до начала анализа не грузятся, вкладки — лениво.
+Бюджеты в миллисекундах зависят от машины и нагрузки — они в benchmarks/bench_startup.py.
+"""
+import importlib.util
+
+import pytest
+
+from benchmarks.bench_startup import heavy_imported, measure, parse_importtime
+
+
+def test_parse_importtime():
+    text = ("import time: self [us] | cumulative | imported package\n"
+            "import time:       131 |        131 |     email.iterators\n"
+            "import time:       526 |      49219 | email.mime.text\n")
+    assert parse_importtime(text) == [('email.iterators', 131, 131, 2), ('email.mime.text', 526, 49219, 0)]
+
+
+def test_core_imports_stay_light():
+    for module in ("core.engine", "core.uniqualizer"):
+        _, rows = measure(module)
+        assert not heavy_imported(rows), module
+
+
+@pytest.mark.skipif(not (importlib.util.find_spec("PyQt6") and importlib.util.find_spec("PIL")),
+                    reason="нужны PyQt6 и Pillow")
+def test_main_window_imports_lazily():
+    _, rows = measure("ui.main_window")
+    assert not heavy_imported(rows)
+    # Вкладка уникализации строится при первом открытии
+    assert "ui.uniqualizer_tab" not in {r[0] for r in rows}
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Тест заголовков: обрезка по тексту и кэш раскладки
+"""
+import pytest
+
+pytest.importorskip("PIL")
+from utils.text_generator import TextGenerator
+
+
+def test_header_is_cropped_and_layout_cached():
+    tg = TextGenerator(width=1080, height=1920)
+    img, x, y = tg.render_header("ПРОВЕРКА ЗАГОЛОВКА", max_font_size=80, y_top_limit=150, y_bottom_limit=600)
+    assert img.width < 1080 and img.height < 450
+    assert 0 <= x and x + img.width <= 1080 and 150 <= y + img.height <= 1920
+    assert img.getbbox() is not None
+    tg.render_header("ПРОВЕРКА ЗАГОЛОВКА", max_font_size=80, y_top_limit=150, y_bottom_limit=600)
+    assert len(tg.layouts) == 1
+
+
+def test_empty_header():
+    img, x, y = TextGenerator().render_header("")
+    assert img.size == (1, 1) and (x, y) == (0, 0)
+
+
+def test_fit_finds_largest_size():
+    tg = TextGenerator()
+    words = "ОЧЕНЬ ДЛИННЫЙ ЗАГОЛОВОК ДЛЯ ПРОВЕРКИ ПЕРЕНОСА".split()
+    font, lines = tg.fit_text_to_box(tg.measure, " ".join(words), 600, 300, None, 200)
+    assert " ".join(lines).split() == words
+    if font.size < 200:
+        assert tg.try_fit(tg.measure, words, 600, 300, None, font.size + 1) is None
+
+
+def test_word_widths_bounded(monkeypatch):
+    import utils.text_generator as text_generator
+    monkeypatch.setattr(text_generator, 'WORD_CACHE_SIZE', 50)
+    tg = TextGenerator()
+    for n in range(20):
+        tg.layout(f"ЗАГОЛОВОК НОМЕР {n} С РАЗНЫМИ СЛОВАМИ", None, 120, 900, 400)
+    assert len(tg.word_widths) <= 50
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Тест глобального кэша транскрипций: ключ по содержимому и вытеснение по объему
+"""
+import os
+import shutil
+from core import transcript_cache
+
+
+def test_key_follows_content_not_path(tmp_path):
+    a = tmp_path / "a.mp4"
+    a.write_bytes(b"video-bytes" * 1000)
+    b = tmp_path / "copy" / "b.mp4"
+    b.parent.mkdir()
+    shutil.copy(a, b)
+    assert transcript_cache.cache_key(str(a), "medium") == transcript_cache.cache_key(str(b), "medium")
+    assert transcript_cache.cache_key(str(a), "medium") != transcript_cache.cache_key(str(a), "small")
+    assert transcript_cache.cache_key(str(a), "medium", "ru") != transcript_cache.cache_key(str(a), "medium", "en")
+
+    b.write_bytes(b"other-bytes" * 1000)
+    assert transcript_cache.cache_key(str(a), "medium") != transcript_cache.cache_key(str(b), "medium")
+
+
+def test_save_load_invalidate_evict(tmp_path, monkeypatch):
+    monkeypatch.setenv("VIDEOUNIQ_CACHE", str(tmp_path))
+    segs = [{'id': 0, 'start': 0.0, 'end': 1.5, 'text': "Привет"}]
+    transcript_cache.save("k1", segs)
+    assert transcript_cache.load("k1") == segs
+    assert transcript_cache.invalidate("k1")
+    assert transcript_cache.load("k1") is None
+
+    transcript_cache.save("old", segs)
+    os.utime(tmp_path / "transcripts" / "old.json", (1, 1))
+    transcript_cache.save("new", segs, max_bytes=100)
+    assert transcript_cache.load("old") is None
+    assert transcript_cache.load("new") == segs
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Тест реестра моделей: одна модель грузится один раз, разные — параллельно
+"""
+import threading
+import time
+from core import transcription
+
+
+class SlowBackend:
+    name = 'fake'
+
+    def __init__(self):
+        self.loads = []
+        self.active = 0
+        self.peak = 0
+        self.guard = threading.Lock()
+
+    def load_options(self, device):
+        return ()
+
+    def memory_mb(self, name):
+        return 100
+
+    def load(self, name, device):
+        with self.guard:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.2)
+        with self.guard:
+            self.active -= 1
+            self.loads.append(name)
+        return f"model:{name}"
+
+
+def test_get_model_locks_per_key(monkeypatch):
+    monkeypatch.setattr(transcription, '_models', type(transcription._models)())
+    monkeypatch.setattr(transcription, '_key_locks', {})
+    backend = SlowBackend()
+    results = []
+    threads = [threading.Thread(target=lambda n=n: results.append(transcription.get_model(backend, n, "cpu")))
+               for n in ("small", "small", "medium")]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert sorted(backend.loads) == ["medium", "small"]
+    # small и medium грузились одновременно
+    assert backend.peak == 2
+    assert sorted(results) == ["model:medium", "model:small", "model:small"]
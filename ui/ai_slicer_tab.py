@@ -1,5 +1,4 @@
 import os
-import subprocess
 import json
 import re
 from PyQt6.QtWidgets import (
@@ -10,16 +9,21 @@ from PyQt6.QtWidgets import (
     QColorDialog, QSlider, QSizePolicy, QPlainTextEdit, QSpacerItem
 )
 from PyQt6.QtCore import Qt, QSettings
-from PyQt6.QtGui import QPixmap
+from PyQt6.QtGui import QPixmap, QImage
 from core.ai_slicer_worker import AiSlicerWorker
+from core.highlights import DEFAULT_LLM_URL, DEFAULT_LLM_MODEL
+from core.media_probe import probe_media
 from utils.text_generator import TextGenerator
 
+# Отметка кадра превью, сек
+PREVIEW_TIME = 15
+
 
 class ApiKeyDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Настройки API")
-        self.setFixedSize(400, 150)
+        self.setFixedSize(400, 280)
         self.settings = QSettings("VideoUniq", "AiSlicer")
 
         # Стили
@@ -37,12 +41,26 @@ class ApiKeyDialog(QDialog):
         self.txt_key.setText(self.settings.value("gemini_key", ""))
         layout.addWidget(self.txt_key)
 
+        # Локальный сервер (llama.cpp, Ollama, vLLM) с OpenAI-совместимым API
+        layout.addWidget(QLabel("🖥 Локальный LLM (URL chat/completions):"))
+        self.txt_llm_url = QLineEdit()
+        self.txt_llm_url.setPlaceholderText(DEFAULT_LLM_URL)
+        self.txt_llm_url.setText(self.settings.value("llm_url", ""))
+        layout.addWidget(self.txt_llm_url)
+        layout.addWidget(QLabel("Модель:"))
+        self.txt_llm_model = QLineEdit()
+        self.txt_llm_model.setPlaceholderText(DEFAULT_LLM_MODEL)
+        self.txt_llm_model.setText(self.settings.value("llm_model", ""))
+        layout.addWidget(self.txt_llm_model)
+
         btn_save = QPushButton("Сохранить")
         btn_save.clicked.connect(self.save_and_close)
         layout.addWidget(btn_save)
 
     def save_and_close(self):
         self.settings.setValue("gemini_key", self.txt_key.text().strip())
+        self.settings.setValue("llm_url", self.txt_llm_url.text().strip())
+        self.settings.setValue("llm_model", self.txt_llm_model.text().strip())
         self.accept()
 
 
@@ -50,6 +68,7 @@ class AiSlicerTab(QWidget):
     def __init__(self):
         super().__init__()
         self.video_path = ""
+        self.batch_videos = []  # пакетный анализ папки
         self.out_path = os.path.abspath("output_reels")
         self.worker = None
         self.app_settings = QSettings("VideoUniq", "AiSlicer")
@@ -58,7 +77,7 @@ class AiSlicerTab(QWidget):
         self.text_color = "#FFD700"
         self.stroke_color = "#000000"
         self.custom_font_path = None
-        self.preview_frame_path = "temp_frame_preview.jpg"
+        self.preview_gen = TextGenerator(width=270, height=480)
 
         self.init_ui()
 
@@ -84,6 +103,11 @@ class AiSlicerTab(QWidget):
         btn_vid.setFixedWidth(40)
         btn_vid.clicked.connect(self.select_video)
 
+        btn_batch = QPushButton("📁")
+        btn_batch.setToolTip("Пакет: все видео из папки (модель Whisper загружается один раз)")
+        btn_batch.setFixedWidth(40)
+        btn_batch.clicked.connect(self.select_video_folder)
+
         btn_open = QPushButton("Папка")
         btn_open.setToolTip("Открыть папку сохранения")
         btn_open.clicked.connect(self.open_output_folder)
@@ -94,6 +118,7 @@ class AiSlicerTab(QWidget):
 
         top_layout.addWidget(self.txt_vid)
         top_layout.addWidget(btn_vid)
+        top_layout.addWidget(btn_batch)
         top_layout.addWidget(btn_open)
         top_layout.addWidget(btn_settings)
 
@@ -144,6 +169,10 @@ class AiSlicerTab(QWidget):
             "background-color: #111; color: #0f0; font-family: Consolas; font-size: 12px; border: none;")
         log_layout.addWidget(self.log_box)
 
+        self.lbl_status = QLabel("")
+        self.lbl_status.setStyleSheet("color: #888; font-size: 11px;")
+        log_layout.addWidget(self.lbl_status)
+
         self.prog = QProgressBar()
         self.prog.setTextVisible(False)
         self.prog.setFixedHeight(5)
@@ -206,12 +235,35 @@ class AiSlicerTab(QWidget):
         self.combo_lang.addItems(["Auto", "Russian", "English", "Ukrainian", "Spanish"])
         gw.addWidget(self.combo_lang, 1, 1)
 
+        gw.addWidget(QLabel("Движок:"), 2, 0)
+        self.combo_backend = QComboBox()
+        self.combo_backend.addItem("openai-whisper", "openai")
+        self.combo_backend.addItem("faster-whisper (int8, CPU)", "faster")
+        gw.addWidget(self.combo_backend, 2, 1)
+
+        gw.addWidget(QLabel("Beam / Потоки:"), 3, 0)
+        h_fw = QHBoxLayout()
+        self.spin_beam = QSpinBox()
+        self.spin_beam.setRange(1, 10)
+        self.spin_beam.setValue(5)
+        self.spin_threads = QSpinBox()
+        self.spin_threads.setRange(0, 64)
+        self.spin_threads.setSpecialValueText("Авто")
+        h_fw.addWidget(self.spin_beam)
+        h_fw.addWidget(self.spin_threads)
+        gw.addLayout(h_fw, 3, 1)
+        self.combo_backend.currentIndexChanged.connect(self.on_backend_changed)
+        self.on_backend_changed()
+
         self.chk_whisper = QCheckBox("Включить транскрибацию")
         self.chk_whisper.setChecked(True)
-        gw.addWidget(self.chk_whisper, 2, 0, 1, 2)
+        gw.addWidget(self.chk_whisper, 4, 0, 1, 2)
 
         self.chk_force_whisper = QCheckBox("Перезаписать кэш (Force)")
-        gw.addWidget(self.chk_force_whisper, 3, 0, 1, 2)
+        gw.addWidget(self.chk_force_whisper, 5, 0, 1, 2)
+
+        self.chk_chunked = QCheckBox("Параллельно по частям (длинные видео, CPU)")
+        gw.addWidget(self.chk_chunked, 6, 0, 1, 2)
 
         col1.addWidget(grp_w)
         col1.addStretch()
@@ -226,6 +278,18 @@ class AiSlicerTab(QWidget):
         self.chk_gemini.setChecked(True)
         gg.addWidget(self.chk_gemini)
 
+        h_hl = QHBoxLayout()
+        h_hl.addWidget(QLabel("Движок:"))
+        self.combo_highlights = QComboBox()
+        self.combo_highlights.addItem("Gemini (облако)", "gemini")
+        self.combo_highlights.addItem("Локальный LLM (HTTP)", "http")
+        self.combo_highlights.addItem("Эвристика (офлайн, без модели)", "local")
+        h_hl.addWidget(self.combo_highlights, 1)
+        gg.addLayout(h_hl)
+        # Флажок относится только к облаку: локальные движки включены всегда
+        self.combo_highlights.currentIndexChanged.connect(
+            lambda: self.chk_gemini.setEnabled(self.combo_highlights.currentData() == 'gemini'))
+
         gg.addWidget(QLabel("Промпт:"))
         self.txt_prompt = QTextEdit()
         self.txt_prompt.setPlaceholderText("О чем видео (для лучшего понимания контекста)...")
@@ -238,6 +302,12 @@ class AiSlicerTab(QWidget):
         main_l.addLayout(col1, 1)
         main_l.addLayout(col2, 1)
 
+    def on_backend_changed(self):
+        # Beam и потоки настраиваются только у faster-whisper
+        fast = self.combo_backend.currentData() == "faster"
+        self.spin_beam.setEnabled(fast)
+        self.spin_threads.setEnabled(fast)
+
     def init_tab_slice(self):
         l = QVBoxLayout(self.tab_slice)
         l.setSpacing(15)
@@ -466,22 +536,22 @@ class AiSlicerTab(QWidget):
         try:
             w, h = 270, 480
             scale = w / 1080
-            bg_path = None
+            bg = None
             if self.video_path and os.path.exists(self.video_path):
-                if not os.path.exists(self.preview_frame_path):
-                    subprocess.run(["ffmpeg", "-y", "-ss", "15", "-i", self.video_path, "-vf",
-                                    f"scale={w}:{h}:force_original_aspect_ratio=increase,crop={w}:{h}", "-vframes", "1",
-                                    "-f", "image2", self.preview_frame_path], stdout=subprocess.DEVNULL,
-                                   stderr=subprocess.DEVNULL)
-                bg_path = self.preview_frame_path
-
-            tg = TextGenerator(width=w, height=h)
+                # Кадр декодируется один раз на видео, дальше — из кэша превью
+                from core import preview_cache
+                info = probe_media(self.video_path)
+                ts = preview_cache.seek_time(info['duration'] if info else None, PREVIEW_TIME)
+                frame = preview_cache.cover(self.video_path, ts, (w, h))
+                bg = QImage(frame.tobytes("raw", "RGB"), w, h, w * 3, QImage.Format.Format_RGB888)
+
             txt = "ЗАГОЛОВОК ВИДЕО"
             if self.chk_caps.isChecked(): txt = txt.upper()
             if self.chk_no_text_render.isChecked(): txt = ""
 
-            tg.create_header_image(
-                txt, "preview_txt.png",
+            # Заголовок рисуется в памяти (раскладка и шрифт из кэша) и обрезан по тексту
+            img, x, y = self.preview_gen.render_header(
+                txt,
                 font_source=self.custom_font_path,
                 max_font_size=int(self.sb_font_size.value() * scale),
                 text_color=self.text_color,
@@ -490,13 +560,15 @@ class AiSlicerTab(QWidget):
                 y_top_limit=int(self.sl_top.value() * scale),
                 y_bottom_limit=int(self.sl_bot.value() * scale)
             )
+            rgba = img.tobytes("raw", "RGBA")
+            title = QImage(rgba, img.width, img.height, img.width * 4, QImage.Format.Format_RGBA8888)
 
             from PyQt6.QtGui import QPainter
             final_pix = QPixmap(w, h);
             final_pix.fill(Qt.GlobalColor.black)
             painter = QPainter(final_pix)
-            if bg_path and os.path.exists(bg_path): painter.drawPixmap(0, 0, QPixmap(bg_path))
-            if os.path.exists("preview_txt.png"): painter.drawPixmap(0, 0, QPixmap("preview_txt.png"))
+            if bg is not None: painter.drawImage(0, 0, bg)
+            painter.drawImage(x, y, title)
             painter.end()
             self.lbl_preview.setPixmap(final_pix)
         except Exception as e:
@@ -512,26 +584,36 @@ class AiSlicerTab(QWidget):
         f, _ = QFileDialog.getOpenFileName(self, "", "", "*.mp4 *.mov")
         if f:
             self.video_path = f;
+            self.batch_videos = []
             self.txt_vid.setText(os.path.basename(f))
             self.analyze_video_info(f)
-            if os.path.exists(self.preview_frame_path): os.remove(self.preview_frame_path)
             self.update_preview()
 
+    def select_video_folder(self):
+        d = QFileDialog.getExistingDirectory(self, "Папка с видео")
+        if not d: return
+        vids = sorted(os.path.join(d, n) for n in os.listdir(d) if n.lower().endswith(('.mp4', '.mov')))
+        if not vids: QMessageBox.warning(self, "Ошибка", "В папке нет видео (*.mp4, *.mov)"); return
+        self.batch_videos = vids
+        self.video_path = vids[0]
+        self.txt_vid.setText(f"📁 {os.path.basename(d)} — {len(vids)} видео")
+        self.analyze_video_info(vids[0])
+        self.update_preview()
+
     def select_output(self):
         d = QFileDialog.getExistingDirectory(self);
         if d: self.out_path = d; self.txt_out.setText(d)
 
     def analyze_video_info(self, path):
-        try:
-            si = subprocess.STARTUPINFO();
-            si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-            res = subprocess.run(["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of",
-                                  "default=noprint_wrappers=1:nokey=1", path], capture_output=True, text=True,
-                                 startupinfo=si)
-            mins = int(float(res.stdout.strip()) // 60)
-            self.lbl_video_info.setText(f"✅ {mins} мин. | Готово")
-        except:
+        info = probe_media(path)
+        if not info or not info['duration']:
             self.lbl_video_info.setText("⚠️ Загружено")
+            return
+        mins = int(info['duration'] // 60)
+        parts = [f"✅ {mins} мин."]
+        if info['has_video']: parts.append(f"{info['width']}x{info['height']} @ {info['fps']:g} fps")
+        parts.append(f"🔊 {info['sample_rate'] / 1000:g} kHz" if info['has_audio'] else "🔇 без звука")
+        self.lbl_video_info.setText(" | ".join(parts + ["Готово"]))
 
     def get_settings(self):
         key = self.app_settings.value("gemini_key", "")
@@ -541,12 +623,17 @@ class AiSlicerTab(QWidget):
         w_lang = lang_map.get(self.combo_lang.currentText())
 
         return {
-            'video': self.video_path, 'out': self.out_path, 'gemini_key': key,
+            'video': self.video_path, 'videos': list(self.batch_videos), 'out': self.out_path, 'gemini_key': key,
             'use_whisper': self.chk_whisper.isChecked(),
             'whisper_model': self.combo_model.currentText(),
             'whisper_lang': w_lang,
+            'whisper_backend': self.combo_backend.currentData(),
+            'whisper_beam': self.spin_beam.value(), 'whisper_threads': self.spin_threads.value(),
             'force_whisper': self.chk_force_whisper.isChecked(),
+            'whisper_chunked': self.chk_chunked.isChecked(),
             'use_gemini': self.chk_gemini.isChecked(),
+            'highlight_backend': self.combo_highlights.currentData(),
+            'llm_url': self.app_settings.value("llm_url", ""), 'llm_model': self.app_settings.value("llm_model", ""),
             'ai_prompt': self.txt_prompt.toPlainText().strip(),
             'no_text_render': self.chk_no_text_render.isChecked(),
             'text_color': self.text_color, 'stroke_color': self.stroke_color,
@@ -568,14 +655,20 @@ class AiSlicerTab(QWidget):
         self.btn_analyze.setEnabled(not locked);
         self.btn_slice.setEnabled(not locked);
         self.btn_stop.setEnabled(locked)
-        if not locked and os.path.exists(
-            os.path.join(self.out_path, "analysis_result.json")): self.btn_slice.setEnabled(True)
+        if not locked and os.path.exists(os.path.join(self.result_dir(), "analysis_result.json")):
+            self.btn_slice.setEnabled(True)
+
+    def result_dir(self):
+        """Папка с analysis_result.json (в пакете — подпапка первого видео)"""
+        if len(self.batch_videos) > 1:
+            return os.path.join(self.out_path, os.path.splitext(os.path.basename(self.batch_videos[0]))[0])
+        return self.out_path
 
     def start_analysis(self):
         if not self.video_path: self.log_box.append("❌ Нет видео!"); return
         s = self.get_settings()
-        if s['use_gemini'] and not s['gemini_key']: QMessageBox.warning(self, "Ошибка",
-                                                                        "Нужен API ключ Gemini!"); return
+        if s['use_gemini'] and s['highlight_backend'] == 'gemini' and not s['gemini_key']:
+            QMessageBox.warning(self, "Ошибка", "Нужен API ключ Gemini!"); return
         self.log_box.clear();
         self.log_box.append("🚀 Старт анализа...")
         self.lock_interface(True)
@@ -591,6 +684,7 @@ class AiSlicerTab(QWidget):
         self.worker = AiSlicerWorker(self.get_settings(), mode='slice')
         self.worker.log_signal.connect(self.log_box.append);
         self.worker.progress_signal.connect(self.prog.setValue)
+        self.worker.status_signal.connect(self.lbl_status.setText)
         self.worker.finished_signal.connect(self.on_slice_done)
         self.worker.start()
 
@@ -599,5 +693,6 @@ class AiSlicerTab(QWidget):
 
     def on_slice_done(self):
         self.lock_interface(False);
+        self.lbl_status.setText("");
         self.log_box.append("🏁 Готово.");
         self.open_output_folder()
\ No newline at end of file
@@ -1,7 +1,14 @@
+import importlib
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QHBoxLayout, QListWidget,
                              QStackedWidget, QListWidgetItem, QFrame)
-from ui.uniqualizer_tab import UniqualizerTab
-from ui.ai_slicer_tab import AiSlicerTab
+
+# Вкладки: (пункт меню, атрибут окна, модуль, класс).
+# Модуль импортируется и вкладка строится при первом открытии.
+TABS = [
+    ("⚙️  Уникализация", 'tab_uniq', "ui.uniqualizer_tab", "UniqualizerTab"),
+    ("🎬  Reels Maker AI", 'tab_slice', "ui.ai_slicer_tab", "AiSlicerTab"),
+]
+START_TAB = 1  # Открываем сразу Reels Maker
 
 # Темная тема (Оптимизированная)
 DARK_THEME = """
@@ -78,20 +85,36 @@ class MainWindow(QMainWindow):
         self.sidebar.setObjectName("Sidebar")
         self.sidebar.setFixedWidth(240)
 
-        self.sidebar.addItem(QListWidgetItem("⚙️  Уникализация"))
-        self.sidebar.addItem(QListWidgetItem("🎬  Reels Maker AI"))  # Переименовано
-
-        # 2. Страницы
+        # 2. Страницы: пока вкладку не открыли — пустая заглушка
         self.pages = QStackedWidget()
-        self.tab_uniq = UniqualizerTab()
-        self.tab_slice = AiSlicerTab()
-
-        self.pages.addWidget(self.tab_uniq)
-        self.pages.addWidget(self.tab_slice)
+        for title, attr, _, _ in TABS:
+            self.sidebar.addItem(QListWidgetItem(title))
+            self.pages.addWidget(QWidget())
+            setattr(self, attr, None)
 
         # Связь
-        self.sidebar.currentRowChanged.connect(self.pages.setCurrentIndex)
-        self.sidebar.setCurrentRow(1)  # Открываем сразу Reels Maker
+        self.sidebar.currentRowChanged.connect(self.show_tab)
+        self.sidebar.setCurrentRow(START_TAB)
 
         layout.addWidget(self.sidebar)
-        layout.addWidget(self.pages)
\ No newline at end of file
+        layout.addWidget(self.pages)
+        # Калибровка кодировщиков — не здесь: при первой задаче с кодеком «Авто» или по кнопке
+
+    def show_tab(self, row):
+        if row < 0: return
+        self.build_tab(row)
+        self.pages.setCurrentIndex(row)
+
+    def build_tab(self, row):
+        """Импорт модуля и создание вкладки при первом открытии"""
+        _, attr, module, cls = TABS[row]
+        tab = getattr(self, attr)
+        if tab is not None: return tab
+
+        tab = getattr(importlib.import_module(module), cls)()
+        stub = self.pages.widget(row)
+        self.pages.removeWidget(stub)
+        stub.deleteLater()
+        self.pages.insertWidget(row, tab)
+        setattr(self, attr, tab)
+        return tab
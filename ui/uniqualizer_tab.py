@@ -9,6 +9,9 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QPixmap
 from core.ffmpeg_worker import ProcessingWorker, PreviewWorker
+from core.encoder_worker import EncoderCalibrationWorker
+from core import encoders
+from core.job_manifest import JobManifest, DONE, FAILED, RUNNING, STOPPED
 
 
 # --- ВИДЖЕТ ДИАПАЗОНА ---
@@ -102,6 +105,7 @@ class UniqualizerTab(QWidget):
         # Важно: храним ссылки на воркеры, чтобы их не убил сборщик мусора
         self.worker = None
         self.preview_worker = None
+        self.preview_pending = False
         self.init_ui()
 
     def init_ui(self):
@@ -127,10 +131,13 @@ class UniqualizerTab(QWidget):
         btn_folder.clicked.connect(self.add_folder)
         btn_clear = QPushButton("🗑 Очистить список")
         btn_clear.clicked.connect(self.clear_list)
+        btn_history = QPushButton("📜 История файла")
+        btn_history.clicked.connect(self.show_history)
 
         layout_left.addWidget(btn_add)
         layout_left.addWidget(btn_folder)
         layout_left.addWidget(btn_clear)
+        layout_left.addWidget(btn_history)
         content_layout.addWidget(col_left)
 
         # === 2. ЦЕНТРАЛЬНАЯ КОЛОНКА (Превью) ===
@@ -394,12 +401,20 @@ class UniqualizerTab(QWidget):
         layout_codec.addWidget(self.cb_fmt)
 
         layout_codec.addWidget(QLabel("Кодек:"))
+        # Только кодировщики, прошедшие калибровку на этой машине
         self.cb_codec = QComboBox()
-        self.cb_codec.addItems([
-            "NVIDIA NVENC H.264", "NVIDIA NVENC HEVC",
-            "CPU x264", "CPU x265"
-        ])
+        self.refresh_encoders()
         layout_codec.addWidget(self.cb_codec)
+
+        self.btn_calibrate = QPushButton("🔬 Перекалибровать")
+        self.btn_calibrate.clicked.connect(self.recalibrate)
+        layout_codec.addWidget(self.btn_calibrate)
+
+        layout_codec.addWidget(QLabel("Параллельно файлов (0 = авто):"))
+        self.spin_workers = QSpinBox()
+        self.spin_workers.setRange(0, 32)
+        self.spin_workers.setValue(0)
+        layout_codec.addWidget(self.spin_workers)
         layout_export.addWidget(grp_codec)
 
         grp_path = QGroupBox("Папка")
@@ -444,6 +459,13 @@ class UniqualizerTab(QWidget):
 
         main_layout.addWidget(footer)
 
+        # Превью из кэша кадров перерисовывается без ffmpeg — обновляем сразу при смене настроек
+        self.list_widget.currentRowChanged.connect(self.live_preview)
+        self.combo_fx.currentTextChanged.connect(self.live_preview)
+        self.cb_fmt.currentTextChanged.connect(self.live_preview)
+        for chk in (self.chk_blur, self.chk_vignette, self.chk_rotate):
+            chk.toggled.connect(self.live_preview)
+
     # --- HANDLERS ---
     def add_video(self):
         fs, _ = QFileDialog.getOpenFileNames(self, "Video", "", "*.mp4 *.mov *.avi")
@@ -488,9 +510,33 @@ class UniqualizerTab(QWidget):
     def on_status(self, msg):
         self.lbl_status.setText(msg)
 
+    def refresh_encoders(self, calib=None):
+        """Список кодеков из калибровки; выбор пользователя сохраняется, если кодек остался"""
+        current = self.cb_codec.currentData()
+        self.cb_codec.clear()
+        codec, preset = encoders.resolve('auto')
+        label = encoders.LABELS.get(codec, codec) + (f" {preset}" if preset else "")
+        self.cb_codec.addItem(f"Авто ({label})", 'auto')
+        for name in encoders.working_codecs():
+            self.cb_codec.addItem(encoders.LABELS.get(name, name), name)
+        idx = self.cb_codec.findData(current)
+        self.cb_codec.setCurrentIndex(max(0, idx))
+
+    def recalibrate(self):
+        self.btn_calibrate.setEnabled(False)
+        self.calib_worker = EncoderCalibrationWorker(force=True)
+        self.calib_worker.log_signal.connect(self.log_box.append)
+        self.calib_worker.finished_signal.connect(self.on_calibrated)
+        self.calib_worker.start()
+
+    def on_calibrated(self, calib):
+        self.btn_calibrate.setEnabled(True)
+        self.refresh_encoders()
+        best = calib.get('best') if calib else None
+        if best: self.log_box.append(f"✅ Кодировщик: {best['codec']} {best['preset'] or ''} ({best['fps']} fps)")
+
     def get_config(self):
-        ct = self.cb_codec.currentText()
-        codec = "h264_nvenc" if "H.264" in ct else "hevc_nvenc" if "HEVC" in ct else "libx265" if "x265" in ct else "libx264"
+        codec = self.cb_codec.currentData() or 'auto'
         return {
             'out_dir': self.out_dir, 'zoom': self.wdg_zoom.get_data(), 'speed': self.wdg_speed.get_data(),
             'quality': self.wdg_quality.get_data(),
@@ -501,7 +547,7 @@ class UniqualizerTab(QWidget):
             'filter': self.combo_fx.currentText(), 'blur': self.chk_blur.isChecked(), 'mute': self.chk_mute.isChecked(),
             'vol_orig': self.sl_orig.value() / 100.0, 'music': self.audio_path if self.txt_mus.text() else "",
             'vol_mus': self.sl_mus.value() / 100.0,
-            'eq': self.chk_eq.isChecked(), 'codec': codec,
+            'eq': self.chk_eq.isChecked(), 'codec': codec, 'workers': self.spin_workers.value(),
             'fmt': 'reels' if 'Reels' in self.cb_fmt.currentText() else 'orig',
             'vignette': self.chk_vignette.isChecked(), 'rotate': self.chk_rotate.isChecked(),
             'fps_change': self.chk_fps.isChecked(),
@@ -522,18 +568,48 @@ class UniqualizerTab(QWidget):
         self.preview_worker = PreviewWorker(self.files[r], self.get_config())
         self.preview_worker.result_signal.connect(self.show_img)
         self.preview_worker.error_signal.connect(self.on_preview_error)
+        self.preview_worker.finished.connect(self.preview_done)
         self.preview_worker.start()
 
-    def show_img(self, p):
+    def live_preview(self, *_):
+        if self.list_widget.currentRow() < 0: return
+        # Превью уже считается — перерисуем по последним настройкам, когда закончит
+        if self.preview_worker and self.preview_worker.isRunning():
+            self.preview_pending = True
+            return
+        self.update_preview()
+
+    def preview_done(self):
+        """Поток превью завершился (QThread.finished)"""
         self.btn_preview.setEnabled(True)
+        if self.preview_pending:
+            self.preview_pending = False
+            self.update_preview()
+
+    def show_img(self, p):
         self.lbl_status.setText("Превью готово")
         self.preview_lbl.setPixmap(QPixmap(p).scaled(self.preview_lbl.size(), Qt.AspectRatioMode.KeepAspectRatio))
-        self.log_box.append("✅ Превью обновлено")
 
     def on_preview_error(self, err):
-        self.btn_preview.setEnabled(True)
         self.log_box.append(f"ERR: {err}")
 
+    def show_history(self):
+        """История выбранного файла из журнала папки результата"""
+        r = self.list_widget.currentRow()
+        if r < 0 or r >= len(self.files):
+            self.log_box.append("⚠️ Выберите файл!")
+            return
+        path = self.files[r]
+        records = JobManifest(self.out_dir).history(path)
+        self.log_box.append(f"📜 {os.path.basename(path)}: записей {len(records)}")
+        icons = {DONE: "✅", FAILED: "❌", RUNNING: "⏳", STOPPED: "⛔"}
+        for rec in records[-20:]:
+            line = f"   {icons.get(rec['status'], '•')} {rec['time']} {rec['status']}"
+            if rec.get('duration') is not None: line += f" • {rec['duration']:.1f} c"
+            if rec.get('output'): line += f" → {os.path.basename(rec['output'])}"
+            if rec.get('error'): line += f" • {(rec['error'].strip().splitlines() or [''])[-1][:200]}"
+            self.log_box.append(line)
+
     def run_process(self):
         if not self.files:
             self.log_box.append("⚠️ Пусто!")
@@ -556,5 +632,6 @@ class UniqualizerTab(QWidget):
         self.btn_stop.setEnabled(False)
         self.lbl_status.setText("Готово!")
         self.log_box.append("🎉 Завершено!")
+        self.refresh_encoders()
         if os.name == 'nt':
             os.startfile(self.out_dir)
\ No newline at end of file
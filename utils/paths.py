@@ -0,0 +1,12 @@
+import os
+
+
+def get_cache_dir(*parts):
+    """
+    Папка постоянного кэша приложения (по умолчанию ~/.videouniq).
+    Переопределяется переменной окружения VIDEOUNIQ_CACHE.
+    """
+    base = os.environ.get("VIDEOUNIQ_CACHE") or os.path.join(os.path.expanduser("~"), ".videouniq")
+    path = os.path.join(base, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
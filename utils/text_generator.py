@@ -1,92 +1,144 @@
 from PIL import Image, ImageDraw, ImageFont
 import os
-import textwrap
+from collections import OrderedDict
+from functools import lru_cache
 
+# Сколько раскладок заголовков держим в памяти
+LAYOUT_CACHE_SIZE = 512
+# Сколько ширин слов держим (бинарный поиск меряет слова на каждом пробном размере)
+WORD_CACHE_SIZE = 4096
 
-class TextGenerator:
-    def __init__(self, width=1080, height=1920):
-        self.width = width
-        self.height = height
 
-    def load_dynamic_font(self, font_path_or_name, size):
-        """Надежная загрузка шрифта с фолбэком"""
-        # 1. Прямой путь к файлу
-        if font_path_or_name and os.path.exists(font_path_or_name):
-            try:
-                return ImageFont.truetype(font_path_or_name, size)
-            except:
-                pass
-
-        # 2. Системный шрифт Windows
+@lru_cache(maxsize=128)
+def _load_font(font_path_or_name, size):
+    """Шрифт читается с диска один раз на (путь, размер)"""
+    # 1. Прямой путь к файлу
+    if font_path_or_name and os.path.exists(font_path_or_name):
         try:
-            return ImageFont.truetype("arialbd.ttf", size)
+            return ImageFont.truetype(font_path_or_name, size)
         except:
             pass
 
-        # 3. Дефолтный
-        return ImageFont.load_default()
-
-    def fit_text_to_box(self, draw, text, max_width, max_height, font_source, max_font_size):
-        """Рекурсивный подбор размера шрифта под коробку"""
-        size = max_font_size
-        min_size = 20
-
-        # Инициализация
-        font = self.load_dynamic_font(font_source, size)
-        final_lines = textwrap.wrap(text, width=20)
-
-        while size >= min_size:
-            font = self.load_dynamic_font(font_source, size)
-            try:
-                test_len = draw.textlength("A", font=font)
-                avg_char_width = test_len if test_len > 0 else size * 0.5
-            except:
-                avg_char_width = size * 0.5
-
-            chars_per_line = max(5, int(max_width / avg_char_width))
-            wrapper = textwrap.TextWrapper(width=chars_per_line, break_long_words=False)
-            lines = wrapper.wrap(text)
-
-            total_h = 0
-            valid = True
+    # 2. Системный шрифт Windows
+    try:
+        return ImageFont.truetype("arialbd.ttf", size)
+    except:
+        pass
 
-            for line in lines:
-                bbox = draw.textbbox((0, 0), line, font=font)
-                w = bbox[2] - bbox[0]
-                h = bbox[3] - bbox[1]
-                # Высота строки + 20% межстрочный интервал
-                total_h += h + (size * 0.2)
-
-                if w > max_width:
-                    valid = False
-                    break
-
-            if valid and total_h <= max_height:
-                return font, lines
-
-            size -= 5  # Уменьшаем размер
+    # 3. Встроенный шрифт Pillow (с 10.1 масштабируется, иначе — фиксированный мелкий)
+    try:
+        return ImageFont.load_default(size)
+    except TypeError:
+        return ImageFont.load_default()
 
-        return font, final_lines
 
-    def create_header_image(self, text, output_path,
-                            font_source="arialbd.ttf",
-                            max_font_size=120,
-                            text_color="#FFD700",
-                            stroke_color="#000000",
-                            stroke_width_pct=5,
-                            y_top_limit=150,
-                            y_bottom_limit=600):
+class TextGenerator:
+    def __init__(self, width=1080, height=1920):
+        self.width = width
+        self.height = height
+        # Холст 1x1 только для измерений текста
+        self.measure = ImageDraw.Draw(Image.new('RGBA', (1, 1)))
+        self.layouts = OrderedDict()
+        self.word_widths = OrderedDict()  # (шрифт, слово) -> ширина
 
-        # Прозрачный холст
-        img = Image.new('RGBA', (self.width, self.height), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(img)
+    def load_dynamic_font(self, font_path_or_name, size):
+        """Надежная загрузка шрифта с фолбэком (из кэша)"""
+        return _load_font(font_path_or_name, size)
+
+    def word_width(self, draw, font, word):
+        """Ширина слова в пикселях (кэш на шрифт и слово, старые вытесняются)"""
+        key = (font, word)
+        if key in self.word_widths:
+            self.word_widths.move_to_end(key)
+            return self.word_widths[key]
+        width = self.word_widths[key] = draw.textlength(word, font=font)
+        if len(self.word_widths) > WORD_CACHE_SIZE: self.word_widths.popitem(last=False)
+        return width
+
+    def wrap_words(self, draw, words, font, max_width):
+        """Жадный перенос по реальной ширине слов"""
+        space = self.word_width(draw, font, " ")
+        lines, current, current_w = [], [], 0.0
+        for word in words:
+            w = self.word_width(draw, font, word)
+            if current and current_w + space + w > max_width:
+                lines.append(" ".join(current))
+                current, current_w = [], 0.0
+            current_w = current_w + space + w if current else w
+            current.append(word)
+        if current: lines.append(" ".join(current))
+        return lines
+
+    def try_fit(self, draw, words, max_width, max_height, font_source, size):
+        """Раскладка при заданном размере или None, если не влезает"""
+        font = self.load_dynamic_font(font_source, size)
+        lines = self.wrap_words(draw, words, font, max_width)
+        total_h = 0
+        for line in lines:
+            bbox = draw.textbbox((0, 0), line, font=font)
+            # Длинное слово без переноса шире коробки
+            if bbox[2] - bbox[0] > max_width: return None
+            # Высота строки + 20% межстрочный интервал
+            total_h += bbox[3] - bbox[1] + (size * 0.2)
+            if total_h > max_height: return None
+        return font, lines
 
+    def fit_text_to_box(self, draw, text, max_width, max_height, font_source, max_font_size):
+        """Бинарный поиск наибольшего размера шрифта, при котором текст влезает в коробку"""
+        min_size = 20
+        words = text.split()
+        lo, hi = min_size, max(min_size, int(max_font_size))
+        best = None
+        while lo <= hi:
+            size = (lo + hi) // 2
+            fit = self.try_fit(draw, words, max_width, max_height, font_source, size)
+            if fit:
+                best = fit
+                lo = size + 1
+            else:
+                hi = size - 1
+
+        if best: return best
+        # Не влезает даже минимальный размер — рисуем им как есть
+        font = self.load_dynamic_font(font_source, min_size)
+        return font, self.wrap_words(draw, words, font, max_width)
+
+    def layout(self, text, font_source, max_font_size, box_width, box_height):
+        """
+        Раскладка заголовка с мемоизацией по (текст, шрифт, коробка).
+        :return: (шрифт, [(строка, ширина, высота)])
+        """
+        key = (text, font_source, max_font_size, int(box_width), int(box_height))
+        if key in self.layouts:
+            self.layouts.move_to_end(key)
+            return self.layouts[key]
+
+        font, lines = self.fit_text_to_box(self.measure, text, box_width, box_height, font_source, max_font_size)
+        rows = []
+        for line in lines:
+            bbox = self.measure.textbbox((0, 0), line, font=font)
+            rows.append((line, bbox[2] - bbox[0], bbox[3] - bbox[1]))
+
+        self.layouts[key] = (font, rows)
+        if len(self.layouts) > LAYOUT_CACHE_SIZE: self.layouts.popitem(last=False)
+        return font, rows
+
+    def render_header(self, text,
+                      font_source="arialbd.ttf",
+                      max_font_size=120,
+                      text_color="#FFD700",
+                      stroke_color="#000000",
+                      stroke_width_pct=5,
+                      y_top_limit=150,
+                      y_bottom_limit=600):
+        """
+        Заголовок, обрезанный по рамке текста.
+        :return: (RGBA картинка, x, y) — куда накладывать на кадр width x height
+        """
         box_width = self.width * 0.9
         box_height = y_bottom_limit - y_top_limit
 
-        font, lines = self.fit_text_to_box(draw, text, box_width, box_height, font_source, max_font_size)
-
-        current_y = y_top_limit + 10
+        font, rows = self.layout(text, font_source, max_font_size, box_width, box_height)
 
         try:
             real_size = font.size
@@ -95,23 +147,54 @@ class TextGenerator:
 
         stroke_w = max(2, int(real_size * (stroke_width_pct / 100.0)))
 
-        for line in lines:
-            bbox = draw.textbbox((0, 0), line, font=font)
-            text_w = bbox[2] - bbox[0]
-            line_h = bbox[3] - bbox[1]
-
+        # Позиции строк на кадре и общая рамка с учетом обводки
+        placed = []
+        left, top, right, bottom = None, None, None, None
+        current_y = y_top_limit + 10
+        for line, text_w, line_h in rows:
             x_pos = (self.width - text_w) / 2
+            bbox = self.measure.textbbox((x_pos, current_y), line, font=font, stroke_width=stroke_w)
+            left = bbox[0] if left is None else min(left, bbox[0])
+            top = bbox[1] if top is None else min(top, bbox[1])
+            right = bbox[2] if right is None else max(right, bbox[2])
+            bottom = bbox[3] if bottom is None else max(bottom, bbox[3])
+            placed.append((line, x_pos, current_y))
+            current_y += line_h + (real_size * 0.2)
+
+        if not placed or right <= left or bottom <= top:
+            # Пустой заголовок: прозрачный пиксель, чтобы графы наложения не менялись
+            return Image.new('RGBA', (1, 1), (0, 0, 0, 0)), 0, 0
 
+        left, top = max(0, int(left)), max(0, int(top))
+        right, bottom = min(self.width, int(right) + 1), min(self.height, int(bottom) + 1)
+        img = Image.new('RGBA', (right - left, bottom - top), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(img)
+        for line, x_pos, y_pos in placed:
             # Рисуем текст с обводкой
             draw.text(
-                (x_pos, current_y),
+                (x_pos - left, y_pos - top),
                 line,
                 font=font,
                 fill=text_color,
                 stroke_width=stroke_w,
                 stroke_fill=stroke_color
             )
-            current_y += line_h + (real_size * 0.2)
+        return img, left, top
 
-        img.save(output_path, "PNG")
-        return output_path
\ No newline at end of file
+    def create_header_image(self, text, output_path,
+                            font_source="arialbd.ttf",
+                            max_font_size=120,
+                            text_color="#FFD700",
+                            stroke_color="#000000",
+                            stroke_width_pct=5,
+                            y_top_limit=150,
+                            y_bottom_limit=600):
+        """
+        Сохраняет обрезанный заголовок в PNG.
+        :return: (x, y) — смещение для overlay
+        """
+        img, x, y = self.render_header(text, font_source, max_font_size, text_color, stroke_color,
+                                       stroke_width_pct, y_top_limit, y_bottom_limit)
+        # Картинка маленькая и временная: сильное сжатие только тратит время
+        img.save(output_path, "PNG", compress_level=1)
+        return x, y